@@ -0,0 +1,34 @@
+"""Shared helpers for the benchmark and load-test scripts.
+
+The integration package's ``__init__`` imports Home Assistant, but the core
+modules (recorder, ml, storage, pipeline, mqtt, dispatcher, ...) do not.
+``load_core`` registers the package directory under a private name, so those
+modules import normally without Home Assistant installed.
+"""
+
+from __future__ import annotations
+
+import importlib
+import os
+import sys
+import types
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_DIR = os.path.join(REPO_ROOT, "custom_components", "ring_local_ml")
+CORE_PACKAGE = "ring_local_ml_core"
+
+
+def load_core(module: str):
+    """Import ``module`` (e.g. ``"recorder.buffer"``) from the integration package."""
+    if CORE_PACKAGE not in sys.modules:
+        package = types.ModuleType(CORE_PACKAGE)
+        package.__path__ = [PACKAGE_DIR]
+        sys.modules[CORE_PACKAGE] = package
+    return importlib.import_module(f"{CORE_PACKAGE}.{module}")
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
@@ -0,0 +1,52 @@
+"""Synthetic frame generators at the resolutions Ring cameras deliver."""
+
+from __future__ import annotations
+
+import numpy as np
+
+# Name -> (width, height). ``recorder`` is what ``Recorder`` scales to by
+# default; the others are native Ring stream sizes.
+RESOLUTIONS = {
+    "recorder": (640, 360),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "doorbell_portrait": (1536, 2048),
+}
+
+
+class SyntheticScene:
+    """A noisy static background with a bright block that moves across it.
+
+    Consecutive frames differ the way a real scene with one moving subject
+    does, so motion detection does real work instead of short-circuiting.
+    """
+
+    def __init__(self, width: int, height: int, *, seed: int = 0, noise: int = 6):
+        self.width = width
+        self.height = height
+        rng = np.random.default_rng(seed)
+        self._rng = rng
+        self._background = rng.integers(40, 200, size=(height, width, 3), dtype=np.uint8)
+        self._noise = noise
+        self._block = (max(8, width // 10), max(8, height // 6))
+        self._index = 0
+
+    def next(self) -> np.ndarray:
+        frame = self._background.copy()
+        if self._noise:
+            jitter = self._rng.integers(-self._noise, self._noise + 1, size=(self.height, 1, 1), dtype=np.int16)
+            frame = np.clip(frame.astype(np.int16) + jitter, 0, 255).astype(np.uint8)
+        block_w, block_h = self._block
+        x = (self._index * max(1, self.width // 50)) % max(1, self.width - block_w)
+        y = self.height // 2 - block_h // 2
+        frame[y : y + block_h, x : x + block_w] = 250
+        self._index += 1
+        return frame
+
+    def frames(self, count: int):
+        return [self.next() for _ in range(count)]
+
+
+def scene_for(resolution: str, *, seed: int = 0) -> SyntheticScene:
+    width, height = RESOLUTIONS[resolution]
+    return SyntheticScene(width, height, seed=seed)
@@ -0,0 +1,414 @@
+"""End-to-end load harness: how many cameras can one box sustain?
+
+For each camera count in ``--cameras`` the harness starts that many fake
+cameras, drives the real ``Recorder``, ``EventPipeline.handle_mqtt_message``
+and storage code with Ring-MQTT traffic, and reports per stage:
+
+* event-to-clip latency (trigger to ``clip_ready``) and how late that is
+  compared to the post-roll the pipeline has to wait anyway,
+* frames received versus expected (dropped frames) per camera,
+* CPU time and peak RSS of this process plus its ffmpeg children.
+
+Camera sources:
+
+``--source file`` (default)
+    Each camera reads a short ffmpeg ``testsrc2`` clip in a loop at native
+    rate; no server needed.
+``--source rtsp --rtsp-base rtsp://127.0.0.1:8554``
+    ``testsrc2`` streams are published to an RTSP server you already run
+    (e.g. mediamtx) and the recorders pull them back over RTSP.
+
+MQTT: by default the trace is replayed straight into the dispatcher. With
+``--broker host:port`` it is published to that broker and consumed back from
+it (needs ``paho-mqtt``), exercising the broker round trip as well.
+
+Requires ``ffmpeg`` on the PATH and ``ffmpeg-python``; the face detector is
+used if OpenCV is installed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import load_core, percentile  # noqa: E402
+from traces import TraceMessage, load_trace, synthesize_trace  # noqa: E402
+
+FPS = 20
+# Pipeline timers reported per stage (see metrics.py).
+STAGE_TIMERS = ("event_wait", "queue_wait", "encode", "previews", "detect", "detect_frame", "db_commit")
+
+
+def _rss_bytes(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def _children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", encoding="ascii") as handle:
+            return [int(child) for child in handle.read().split()]
+    except OSError:
+        return []
+
+
+class ResourceSampler:
+    """Sample RSS of this process and its children; CPU from rusage."""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.peak_rss = 0
+        self._task: Optional[asyncio.Task] = None
+        self._cpu_start = 0.0
+        self._wall_start = 0.0
+
+    @staticmethod
+    def _cpu_seconds() -> float:
+        own = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        total = own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+        # RUSAGE_CHILDREN only counts reaped children; add live ffmpeg ones.
+        for child in _children(os.getpid()):
+            try:
+                with open(f"/proc/{child}/stat", encoding="ascii") as handle:
+                    fields = handle.read().rsplit(")", 1)[1].split()
+                total += (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+            except (OSError, IndexError, ValueError):
+                pass
+        return total
+
+    def start(self) -> None:
+        self._cpu_start = self._cpu_seconds()
+        self._wall_start = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            pid = os.getpid()
+            rss = _rss_bytes(pid) + sum(_rss_bytes(child) for child in _children(pid))
+            self.peak_rss = max(self.peak_rss, rss)
+            await asyncio.sleep(self.interval)
+
+    async def stop(self) -> Dict:
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        wall = time.monotonic() - self._wall_start
+        cpu = self._cpu_seconds() - self._cpu_start
+        return {
+            "cpu_seconds": round(cpu, 2),
+            "cpu_percent_of_one_core": round(cpu / wall * 100, 1) if wall else None,
+            "peak_rss_mb": round(self.peak_rss / 1048576, 1),
+        }
+
+
+def make_test_clip(path: str, width: int, height: int, seconds: int = 10) -> None:
+    subprocess.run(
+        [
+            "ffmpeg", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={FPS}",
+            "-t", str(seconds), "-c:v", "libx264", "-preset", "ultrafast", "-g", str(FPS), path,
+        ],
+        check=True,
+    )
+
+
+def publish_rtsp(url: str, width: int, height: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            "ffmpeg", "-loglevel", "error", "-re",
+            "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={FPS}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-tune", "zerolatency", "-g", str(FPS),
+            "-f", "rtsp", "-rtsp_transport", "tcp", url,
+        ],
+        stdin=subprocess.DEVNULL,
+    )
+
+
+class _RawMessage:
+    __slots__ = ("topic", "payload")
+
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload
+
+
+async def replay_direct(trace: List[TraceMessage], dispatch, speed: float, duration: float) -> int:
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    sent = 0
+    for message in trace:
+        if message.t > duration:
+            break
+        delay = started + message.t / speed - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        dispatch(_RawMessage(message.topic, message.raw_payload))
+        sent += 1
+    return sent
+
+
+async def replay_broker(trace: List[TraceMessage], dispatch, speed: float, duration: float, broker: str) -> int:
+    import paho.mqtt.client as mqtt
+
+    host, _, port = broker.partition(":")
+    port = int(port or 1883)
+    loop = asyncio.get_running_loop()
+
+    consumer = mqtt.Client()
+    consumer.on_message = lambda _c, _u, msg: loop.call_soon_threadsafe(
+        dispatch, _RawMessage(msg.topic, msg.payload)
+    )
+    consumer.connect(host, port)
+    dispatcher_module = load_core("dispatcher")
+    for topic_filter in dispatcher_module.TOPIC_FILTERS + dispatcher_module.IMAGE_TOPIC_FILTERS:
+        consumer.subscribe(topic_filter, qos=1)
+    consumer.loop_start()
+
+    producer = mqtt.Client()
+    producer.connect(host, port)
+    producer.loop_start()
+    started = loop.time()
+    sent = 0
+    try:
+        for message in trace:
+            if message.t > duration:
+                break
+            delay = started + message.t / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            producer.publish(message.topic, message.raw_payload, qos=1)
+            sent += 1
+        await asyncio.sleep(1.0)
+    finally:
+        producer.loop_stop()
+        producer.disconnect()
+        consumer.loop_stop()
+        consumer.disconnect()
+    return sent
+
+
+async def run_stage(args, cameras: int, workdir: str) -> Dict:
+    recorder_module = load_core("recorder.recorder")
+    pipeline_module = load_core("pipeline")
+    feed_module = load_core("feed")
+    jobs_module = load_core("jobs")
+    detector_module = load_core("ml.detector")
+    dispatcher_module = load_core("dispatcher")
+
+    stage_dir = tempfile.mkdtemp(prefix=f"cams{cameras}-", dir=workdir)
+    media_db = os.path.join(stage_dir, "media.db")
+    trace = load_trace(args.trace) if args.trace else synthesize_trace(cameras=cameras, duration=args.duration)
+    mqtt = load_core("mqtt")
+    trace_topics = [mqtt.parse_ring_topic(message.topic) for message in trace]
+    device_ids = sorted({topic.device_id for topic in trace_topics if topic is not None and topic.category == "camera"})
+    device_ids = device_ids[:cameras]
+    trace = [
+        message
+        for message, topic in zip(trace, trace_topics)
+        if topic is not None and topic.device_id in device_ids
+    ]
+
+    publishers: List[subprocess.Popen] = []
+    recorders = {}
+    for index, device_id in enumerate(device_ids):
+        if args.source == "rtsp":
+            url = f"{args.rtsp_base.rstrip('/')}/loadcam{index}"
+            publishers.append(publish_rtsp(url, args.width, args.height))
+        else:
+            url = args.clip
+        recorders[device_id] = recorder_module.Recorder(
+            device_id, url, 20, width=args.width, height=args.height, fps=FPS
+        )
+    if publishers:
+        await asyncio.sleep(2.0)
+
+    feed = feed_module.EventFeed(media_db)
+    await feed.async_start()
+    subscription = feed.subscribe()
+    metrics = load_core("metrics").PipelineMetrics()
+    jobs = jobs_module.JobScheduler(metrics=metrics)
+    pipeline = pipeline_module.EventPipeline(
+        recorders,
+        detector_module.Detector(),
+        stage_dir,
+        media_db,
+        feed=feed,
+        jobs=jobs,
+        metrics=metrics,
+        pre_event_seconds=args.pre,
+        post_event_seconds=args.post,
+        fps=FPS,
+    )
+
+    loop = asyncio.get_running_loop()
+    tasks = set()
+
+    def trigger_route(topic):
+        event_type = {"motion/state": "motion", "ding/state": "ding"}.get(topic.topic_suffix)
+        if event_type is None:
+            return None
+
+        def handle(message):
+            if message.text.strip().upper() != "ON":
+                return
+            task = loop.create_task(pipeline.handle_mqtt_message(topic.device_id, event_type))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        return handle
+
+    dispatcher = dispatcher_module.RingMQTTDispatcher(device_ids)
+    dispatcher.add_route_factory(trigger_route)
+
+    opened: Dict[str, float] = {}
+    latencies: List[float] = []
+
+    async def collect():
+        while True:
+            message = await subscription.queue.get()
+            if message is None:
+                return
+            key = message.data.get("event_key")
+            if message.kind == feed_module.FEED_EVENT_OPEN:
+                opened[key] = loop.time()
+            elif message.kind == feed_module.FEED_CLIP_READY and key in opened:
+                latencies.append(loop.time() - opened.pop(key))
+
+    sampler = ResourceSampler()
+    sampler.start()
+    collector = loop.create_task(collect())
+    for recorder in recorders.values():
+        recorder.start()
+    started = time.monotonic()
+    # Let every buffer fill its pre-roll before the first event.
+    await asyncio.sleep(args.pre)
+
+    if args.broker:
+        sent = await replay_broker(trace, dispatcher.dispatch, args.speed, args.duration, args.broker)
+    else:
+        sent = await replay_direct(trace, dispatcher.dispatch, args.speed, args.duration)
+    if tasks:
+        await asyncio.wait(tasks, timeout=args.post * 4 + 60)
+    elapsed = time.monotonic() - started
+    resources = await sampler.stop()
+
+    frames = {}
+    for device_id, recorder in recorders.items():
+        received = recorder.buffer.sequence
+        expected = int(elapsed * FPS)
+        frames[device_id] = {
+            "received": received,
+            "expected": expected,
+            "dropped": max(0, expected - received),
+        }
+        recorder.stop()
+    for publisher in publishers:
+        publisher.terminate()
+    collector.cancel()
+    await asyncio.gather(collector, return_exceptions=True)
+    await jobs.async_stop()
+    await feed.async_stop()
+
+    latencies.sort()
+    dropped = sum(item["dropped"] for item in frames.values())
+    expected = sum(item["expected"] for item in frames.values()) or 1
+    return {
+        "cameras": len(recorders),
+        "messages_replayed": sent,
+        "clips": len(latencies),
+        "events_without_clip": len(opened),
+        "event_to_clip_s": {
+            "p50": round(percentile(latencies, 0.5), 2),
+            "p90": round(percentile(latencies, 0.9), 2),
+            "max": round(latencies[-1], 2) if latencies else None,
+        },
+        # The pipeline always waits at least the post-roll; anything beyond
+        # it is processing delay.
+        "clip_late_s_p90": round(max(0.0, percentile(latencies, 0.9) - args.post), 2) if latencies else None,
+        "dropped_frame_ratio": round(dropped / expected, 4),
+        "frames": frames,
+        "jobs": jobs.stats(),
+        "stage_seconds": {name: pipeline.metrics.summary(name) for name in STAGE_TIMERS},
+        **resources,
+    }
+
+
+async def main_async(args) -> Dict:
+    if shutil.which("ffmpeg") is None:
+        raise SystemExit("ffmpeg is required on the PATH")
+    workdir = tempfile.mkdtemp(prefix="ringload-")
+    if args.source == "file" and not args.clip:
+        args.clip = os.path.join(workdir, "testsrc.mp4")
+        make_test_clip(args.clip, args.width, args.height)
+
+    stages = []
+    for count in args.cameras:
+        print(f"running {count} camera(s) for {args.duration}s ...", file=sys.stderr)
+        stage = await run_stage(args, count, workdir)
+        stages.append(stage)
+        print(
+            f"  clips {stage['clips']}, p90 event-to-clip {stage['event_to_clip_s']['p90']}s, "
+            f"dropped {stage['dropped_frame_ratio']:.1%}, CPU {stage['cpu_percent_of_one_core']}%, "
+            f"RSS {stage['peak_rss_mb']} MB",
+            file=sys.stderr,
+        )
+    return {
+        "config": {
+            "source": args.source,
+            "resolution": f"{args.width}x{args.height}",
+            "fps": FPS,
+            "duration_s": args.duration,
+            "pre_s": args.pre,
+            "post_s": args.post,
+            "broker": args.broker,
+            "trace": args.trace or "synthetic",
+        },
+        "stages": stages,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ring Local ML end-to-end load harness")
+    parser.add_argument("--cameras", type=lambda text: [int(n) for n in text.split(",")], default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of trace per stage")
+    parser.add_argument("--speed", type=float, default=1.0, help="trace replay speed multiplier")
+    parser.add_argument("--source", choices=["file", "rtsp"], default="file")
+    parser.add_argument("--clip", help="video file for --source file (default: generated testsrc2)")
+    parser.add_argument("--rtsp-base", default="rtsp://127.0.0.1:8554")
+    parser.add_argument("--broker", help="host:port of an MQTT broker to replay through")
+    parser.add_argument("--trace", help="Ring-MQTT trace (JSON lines); synthetic if omitted")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=360)
+    parser.add_argument("--pre", type=int, default=5, help="pre-roll seconds")
+    parser.add_argument("--post", type=int, default=10, help="post-roll seconds")
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""Microbenchmarks for the integration's hot paths.
+
+Usage::
+
+    python benchmarks/run.py                      # all benchmarks, JSON to stdout
+    python benchmarks/run.py -o after.json --compare before.json
+    python benchmarks/run.py --only motion_detect --resolution 1080p
+
+Each benchmark reports calls, throughput, per-call latency percentiles and
+the peak Python-tracked memory (``tracemalloc``; NumPy buffers included) of
+a separate, shorter pass. Benchmarks whose dependency is missing (OpenCV,
+ffmpeg, ...) are reported as skipped rather than failing the run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import REPO_ROOT, load_core, percentile  # noqa: E402
+from frames import RESOLUTIONS, scene_for  # noqa: E402
+from traces import load_trace, synthesize_trace  # noqa: E402
+
+
+class Skip(Exception):
+    """Raised by a benchmark's setup when a dependency is unavailable."""
+
+
+def measure(call: Callable[[], object], *, iterations: int, warmup: int, memory_iterations: int) -> Dict:
+    for _ in range(warmup):
+        call()
+    gc.collect()
+    samples: List[int] = []
+    started = time.perf_counter_ns()
+    for _ in range(iterations):
+        before = time.perf_counter_ns()
+        call()
+        samples.append(time.perf_counter_ns() - before)
+    elapsed = (time.perf_counter_ns() - started) / 1e9
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for _ in range(memory_iterations):
+            call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    samples.sort()
+    to_ms = 1e-6
+    return {
+        "calls": iterations,
+        "seconds": round(elapsed, 4),
+        "throughput_per_s": round(iterations / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "mean": round(sum(samples) / len(samples) * to_ms, 4),
+            "p50": round(percentile(samples, 0.50) * to_ms, 4),
+            "p90": round(percentile(samples, 0.90) * to_ms, 4),
+            "p99": round(percentile(samples, 0.99) * to_ms, 4),
+            "max": round(samples[-1] * to_ms, 4),
+        },
+        "peak_memory_bytes": peak,
+    }
+
+
+# Each benchmark takes the parsed args and returns ``(call, units, extra)``:
+# the callable to time, what one call processes, and extra metadata. Files go
+# under ``args.workdir``, a temporary directory ``run`` removes afterwards.
+
+
+def bench_buffer_add(args):
+    buffer_module = load_core("recorder.buffer")
+    buffer = buffer_module.CircularBuffer(20)
+    frames = scene_for(args.resolution).frames(8)
+    state = {"i": 0}
+
+    def call():
+        state["i"] += 1
+        buffer.add(frames[state["i"] % len(frames)], dt.datetime.now())
+
+    return call, "frame", {}
+
+
+def bench_motion_detect(args):
+    motion = load_core("ml.motion")
+    detector = motion.MotionDetector()
+    frames = scene_for(args.resolution).frames(16)
+    detector.detect(frames[0])
+    state = {"i": 0}
+
+    def call():
+        state["i"] += 1
+        detector.detect(frames[state["i"] % len(frames)])
+
+    return call, "frame", {}
+
+
+def bench_face_detect(args):
+    face = load_core("ml.face")
+    detector = face.FaceDetector(cascade_path=os.path.join(REPO_ROOT, "haarcascade_frontalface_default.xml"))
+    if not detector.face_cascade:
+        raise Skip("OpenCV or the face cascade is unavailable")
+    frames = scene_for(args.resolution).frames(4)
+    state = {"i": 0}
+
+    def call():
+        state["i"] += 1
+        detector.detect(frames[state["i"] % len(frames)])
+
+    return call, "frame", {}
+
+
+def bench_save_clip(args):
+    try:
+        wrapper = load_core("recorder.ffmpeg_wrapper")
+    except ImportError as err:
+        raise Skip(str(err))
+    if shutil.which("ffmpeg") is None:
+        raise Skip("ffmpeg binary not found")
+    fps = 20
+    frames = scene_for(args.resolution).frames(fps * 2)
+    workdir = tempfile.mkdtemp(prefix="clip-", dir=args.workdir)
+    state = {"i": 0}
+
+    def call():
+        state["i"] += 1
+        path = os.path.join(workdir, f"clip_{state['i'] % 4}.mp4")
+        wrapper.save_clip(frames, path, fps)
+
+    return call, "clip(2s)", {"frames_per_clip": len(frames), "workdir": workdir}
+
+
+def bench_clip_previews(args):
+    thumbnails = load_core("storage.thumbnails")
+    frames = scene_for(args.resolution).frames(60)
+    workdir = tempfile.mkdtemp(prefix="previews-", dir=args.workdir)
+    clip_path = os.path.join(workdir, "clip.mp4")
+
+    def call():
+        thumbnails.write_clip_previews(frames, clip_path, 20)
+
+    return call, "clip", {"frames_per_clip": len(frames)}
+
+
+def bench_record_event(args):
+    db = load_core("storage.db")
+    path = os.path.join(tempfile.mkdtemp(prefix="db-", dir=args.workdir), "media.db")
+    db.init_db(path)
+
+    def call():
+        db.record_event(
+            path,
+            camera_id="bench",
+            event_type="motion",
+            clip_path="/media/bench/clip.mp4",
+            snapshot_path=None,
+            face_detected=False,
+            duration=15,
+        )
+
+    return call, "row", {"db": path}
+
+
+def bench_mqtt_dispatch(args):
+    dispatcher_module = load_core("dispatcher")
+    mqtt = load_core("mqtt")
+    messages = load_trace(args.trace) if args.trace else synthesize_trace(cameras=8, duration=300)
+
+    class _Msg:
+        __slots__ = ("topic", "payload")
+
+        def __init__(self, topic, payload):
+            self.topic = topic
+            self.payload = payload
+
+    raw = [_Msg(message.topic, message.raw_payload) for message in messages]
+    triggers = {"motion/state", "ding/state"}
+    seen = {"values": 0, "triggers": 0}
+
+    def mirror_route(topic):
+        if topic.last_segment == "image":
+            return None
+
+        def handle(message):
+            seen["values"] += message.value is not None
+
+        return handle
+
+    def trigger_route(topic):
+        if topic.topic_suffix not in triggers:
+            return None
+
+        def handle(message):
+            seen["triggers"] += message.text.strip().upper() == "ON"
+
+        return handle
+
+    dispatcher = dispatcher_module.RingMQTTDispatcher()
+    dispatcher.add_route_factory(mirror_route)
+    dispatcher.add_route_factory(trigger_route)
+    state = {"i": 0}
+
+    def call():
+        msg = raw[state["i"] % len(raw)]
+        state["i"] += 1
+        dispatcher.dispatch(msg)
+
+    mqtt.parse_ring_topic.cache_clear()
+    return call, "message", {"trace": args.trace or "synthetic", "trace_messages": len(raw)}
+
+
+BENCHMARKS = {
+    "buffer_add": (bench_buffer_add, 2000),
+    "motion_detect": (bench_motion_detect, 200),
+    "face_detect": (bench_face_detect, 30),
+    "save_clip": (bench_save_clip, 5),
+    "clip_previews": (bench_clip_previews, 20),
+    "record_event": (bench_record_event, 300),
+    "mqtt_dispatch": (bench_mqtt_dispatch, 20000),
+}
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run(args) -> Dict:
+    with tempfile.TemporaryDirectory(prefix="ringbench-") as workdir:
+        args.workdir = workdir
+        results = _run_benchmarks(args)
+    return {
+        "meta": {
+            "timestamp": dt.datetime.utcnow().isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "resolution": args.resolution,
+            "frame_size": RESOLUTIONS[args.resolution],
+        },
+        "results": results,
+    }
+
+
+def _run_benchmarks(args) -> Dict:
+    results = {}
+    for name, (factory, default_iterations) in BENCHMARKS.items():
+        if args.only and name not in args.only:
+            continue
+        iterations = max(1, int(default_iterations * args.scale))
+        try:
+            call, unit, extra = factory(args)
+        except Skip as err:
+            results[name] = {"skipped": str(err)}
+            continue
+        result = measure(
+            call,
+            iterations=iterations,
+            warmup=max(1, iterations // 10),
+            memory_iterations=max(1, min(iterations, 20)),
+        )
+        result["unit"] = unit
+        result.update({key: value for key, value in extra.items() if key not in ("workdir", "db")})
+        results[name] = result
+        print(f"{name:>14}: {result['throughput_per_s']} {unit}/s, p50 {result['latency_ms']['p50']} ms", file=sys.stderr)
+    return results
+
+
+def compare(current: Dict, baseline: Dict) -> List[str]:
+    """Human-readable p50/throughput deltas against a previous run."""
+    lines = []
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if "skipped" in result or not before or "skipped" in before:
+            continue
+        p50, old_p50 = result["latency_ms"]["p50"], before["latency_ms"]["p50"]
+        change = (p50 - old_p50) / old_p50 * 100 if old_p50 else 0.0
+        memory = result["peak_memory_bytes"] - before["peak_memory_bytes"]
+        lines.append(f"{name:>14}: p50 {old_p50:.4f} -> {p50:.4f} ms ({change:+.1f}%), peak memory {memory:+d} B")
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ring Local ML microbenchmarks")
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--resolution", default="recorder", choices=sorted(RESOLUTIONS))
+    parser.add_argument("--trace", help="Ring-MQTT trace (JSON lines) for mqtt_dispatch")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply iteration counts")
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    parser.add_argument("--compare", help="previous JSON output to compare against")
+    args = parser.parse_args()
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            for line in compare(report, json.load(handle)):
+                print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
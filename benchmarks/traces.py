@@ -0,0 +1,197 @@
+"""Ring-MQTT message traces: load, save, synthesise and record.
+
+A trace is a JSON-lines file with one message per line::
+
+    {"t": 0.125, "topic": "ring/<loc>/camera/<id>/motion/state", "payload": "ON"}
+
+Binary payloads (snapshot images) are stored as ``{"b64": "..."}``. Record a
+real trace from a broker with ``python benchmarks/traces.py record``; when no
+trace is given, the benchmarks use ``synthesize_trace``, which mimics the
+topic mix Ring-MQTT publishes for a set of cameras.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Union
+
+Payload = Union[str, bytes]
+
+
+@dataclass(frozen=True)
+class TraceMessage:
+    t: float
+    topic: str
+    payload: Payload
+
+    @property
+    def raw_payload(self) -> bytes:
+        return self.payload if isinstance(self.payload, bytes) else self.payload.encode()
+
+    def to_json(self) -> str:
+        payload = {"b64": base64.b64encode(self.payload).decode()} if isinstance(self.payload, bytes) else self.payload
+        return json.dumps({"t": round(self.t, 4), "topic": self.topic, "payload": payload})
+
+    @classmethod
+    def from_json(cls, line: str) -> "TraceMessage":
+        data = json.loads(line)
+        payload = data["payload"]
+        if isinstance(payload, dict) and "b64" in payload:
+            payload = base64.b64decode(payload["b64"])
+        return cls(float(data["t"]), data["topic"], payload)
+
+
+def load_trace(path: str) -> List[TraceMessage]:
+    with open(path, encoding="utf-8") as handle:
+        return [TraceMessage.from_json(line) for line in handle if line.strip()]
+
+
+def save_trace(path: str, messages: Iterable[TraceMessage]) -> None:
+    with open(path, "w", encoding="utf-8") as handle:
+        for message in messages:
+            handle.write(message.to_json() + "\n")
+
+
+def _tiny_jpeg(seed: int) -> bytes:
+    try:
+        import io
+
+        import numpy as np
+        from PIL import Image
+    except ImportError:
+        return b"\xff\xd8\xff\xd9"
+    rng = np.random.default_rng(seed)
+    out = io.BytesIO()
+    Image.fromarray(rng.integers(0, 255, size=(180, 320, 3), dtype=np.uint8)).save(out, format="JPEG")
+    return out.getvalue()
+
+
+def synthesize_trace(
+    cameras: int = 4,
+    duration: float = 60.0,
+    *,
+    seed: int = 1,
+    location_id: str = "5a1b2c3d-loc",
+    images: bool = False,
+) -> List[TraceMessage]:
+    """Build a trace with Ring-MQTT's topic mix for ``cameras`` devices.
+
+    Every camera publishes its status and info/attribute topics periodically
+    and gets motion bursts (state plus attributes, ON then OFF). Roughly one
+    camera in four is a doorbell with occasional dings.
+    """
+    rng = random.Random(seed)
+    messages: List[TraceMessage] = []
+    jpeg = _tiny_jpeg(seed) if images else None
+
+    for index in range(cameras):
+        device_id = f"{rng.getrandbits(48):012x}"
+        base = f"ring/{location_id}/camera/{device_id}"
+        doorbell = index % 4 == 0
+
+        def emit(t, suffix, payload):
+            messages.append(TraceMessage(t, f"{base}/{suffix}", payload))
+
+        emit(0.0, "status", "online")
+        t = 0.0
+        while t < duration:
+            emit(t, "info/state", json.dumps({
+                "batteryLevel": rng.randint(20, 100),
+                "firmwareStatus": "Up to Date",
+                "lastUpdate": int(time.time()),
+                "wirelessNetwork": "ring-net",
+                "wirelessSignal": -rng.randint(40, 80),
+            }))
+            emit(t + 0.01, "wireless/attributes", json.dumps({"wirelessSignal": -rng.randint(40, 80)}))
+            emit(t + 0.02, "light/state", rng.choice(["ON", "OFF"]))
+            emit(t + 0.03, "snapshot/attributes", json.dumps({"timestamp": int(time.time()), "type": "interval"}))
+            if jpeg is not None:
+                emit(t + 0.04, "snapshot/image", jpeg)
+            t += rng.uniform(5.0, 15.0)
+
+        t = rng.uniform(0.0, 5.0)
+        while t < duration:
+            emit(t, "motion/state", "ON")
+            emit(t + 0.001, "motion/attributes", json.dumps({
+                "lastMotion": int(time.time()),
+                "lastMotionTime": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "personDetected": rng.random() < 0.3,
+                "motionDetectionEnabled": True,
+            }))
+            if doorbell and rng.random() < 0.2:
+                emit(t + 0.5, "ding/state", "ON")
+                emit(t + 0.501, "ding/attributes", json.dumps({"lastDing": int(time.time())}))
+                emit(t + 5.5, "ding/state", "OFF")
+            emit(t + rng.uniform(3.0, 8.0), "motion/state", "OFF")
+            t += rng.uniform(10.0, 30.0)
+
+    messages.sort(key=lambda message: message.t)
+    return messages
+
+
+def record(host: str, port: int, output: str, seconds: float, username=None, password=None) -> int:
+    """Subscribe to ``ring/#`` and write every message to ``output``."""
+    import paho.mqtt.client as mqtt
+
+    recorded: List[TraceMessage] = []
+    started = time.monotonic()
+
+    def on_message(_client, _userdata, msg):
+        payload = msg.payload
+        try:
+            payload = payload.decode("utf-8")
+        except UnicodeDecodeError:
+            pass
+        recorded.append(TraceMessage(time.monotonic() - started, msg.topic, payload))
+
+    client = mqtt.Client()
+    if username:
+        client.username_pw_set(username, password)
+    client.on_message = on_message
+    client.connect(host, port)
+    client.subscribe("ring/#")
+    client.loop_start()
+    try:
+        time.sleep(seconds)
+    finally:
+        client.loop_stop()
+        client.disconnect()
+    save_trace(output, recorded)
+    return len(recorded)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="record ring/# from a broker")
+    rec.add_argument("--host", default="localhost")
+    rec.add_argument("--port", type=int, default=1883)
+    rec.add_argument("--username")
+    rec.add_argument("--password")
+    rec.add_argument("--seconds", type=float, default=300)
+    rec.add_argument("output")
+
+    syn = sub.add_parser("synthesize", help="write a synthetic trace")
+    syn.add_argument("--cameras", type=int, default=4)
+    syn.add_argument("--duration", type=float, default=60)
+    syn.add_argument("--images", action="store_true", help="include snapshot/image payloads")
+    syn.add_argument("output")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        count = record(args.host, args.port, args.output, args.seconds, args.username, args.password)
+    else:
+        messages = synthesize_trace(args.cameras, args.duration, images=args.images)
+        save_trace(args.output, messages)
+        count = len(messages)
+    print(f"wrote {count} messages to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,133 @@
 """The Ring Local ML integration."""
 import asyncio
+import copy
 import logging
+import re
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import issue_registry as ir
+from homeassistant.helpers.event import async_call_later
 
-from .const import DOMAIN
-from .mqtt import parse_ring_topic, SUPPORTED_RING_CATEGORIES
+from .const import DOMAIN, ISSUE_API_TOKEN_GENERATED
+from .dispatcher import IMAGE_TOPIC_FILTERS, TOPIC_FILTERS, RingMQTTDispatcher
+from .mqtt import ParsedMessage
 
 _LOGGER = logging.getLogger(__name__)
 
+# Seconds to collect newly discovered cameras before updating the options.
+DISCOVERY_BATCH_DELAY = 2.0
+
+_RTSP_RE = re.compile(r"rtsp://[\w:@\-\._~%/]+")
+
+
+def _extract_rtsp_url(message: ParsedMessage):
+    """Best-effort RTSP URL hint from a discovery payload."""
+    parsed = message.value
+    if isinstance(parsed, dict):
+        for key in ("rtsp", "rtsp_url", "stream", "path", "url"):
+            value = parsed.get(key)
+            if isinstance(value, str) and value.startswith("rtsp"):
+                return value
+        return None
+    m = _RTSP_RE.search(message.text)
+    return m.group(0) if m else None
+
+
+def _discover_camera(hass: HomeAssistant, entry: ConfigEntry, message: ParsedMessage):
+    """Queue a camera seen on MQTT for addition to the entry options.
+
+    Only called by the dispatcher for devices it does not know yet, so the
+    payload work below happens once per new device rather than per message.
+    Discoveries are batched so a burst of new devices (e.g. Ring-MQTT
+    restarting) results in a single options update.
+    """
+    topic = message.topic
+    device_id = topic.device_id
+    if any(c.get("id") == device_id for c in entry.options.get("cameras", [])):
+        return
+
+    entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if entry_data is None:
+        return
+    pending = entry_data.setdefault("discovered", {})
+    pending.setdefault(
+        device_id,
+        {
+            "location_id": topic.location_id,
+            "category": topic.category,
+            "rtsp_url": _extract_rtsp_url(message),
+        },
+    )
+    if entry_data.get("discovery_unsub") is None:
+
+        @callback
+        def _flush(_now):
+            entry_data["discovery_unsub"] = None
+            _apply_discovered(hass, entry, entry_data.pop("discovered", {}))
+
+        entry_data["discovery_unsub"] = async_call_later(hass, DISCOVERY_BATCH_DELAY, _flush)
+
+
+def _apply_discovered(hass: HomeAssistant, entry: ConfigEntry, discovered):
+    """Write a batch of discovered cameras to the options in one update.
+
+    The sensor platform's update listener applies the change by starting
+    recorders for the new cameras only; the entry is not reloaded.
+    """
+    if not discovered:
+        return
+    options = copy.deepcopy(dict(entry.options))
+    cameras = options.setdefault("cameras", [])
+    changed = False
+    for device_id, info in discovered.items():
+        if any(c.get("id") == device_id for c in cameras):
+            continue
+        location_id = info["location_id"]
+        rtsp_url = info["rtsp_url"]
+
+        legacy_camera = next((c for c in cameras if c.get("id") == location_id), None)
+        if legacy_camera:
+            legacy_camera["id"] = device_id
+            legacy_camera.setdefault("location_id", location_id)
+            legacy_camera.setdefault("category", info["category"])
+            if rtsp_url and not legacy_camera.get("rtsp_url"):
+                legacy_camera["rtsp_url"] = rtsp_url
+            changed = True
+            _LOGGER.info(
+                "Updated Ring camera '%s' to device id %s",
+                legacy_camera.get("name", device_id),
+                device_id,
+            )
+            continue
+
+        suffix = device_id[-4:] if device_id else ""
+        cameras.append(
+            {
+                "id": device_id,
+                "name": f"Ring Camera {suffix}" if suffix else f"Ring Camera {device_id}",
+                "rtsp_url": rtsp_url or "",
+                "location_id": location_id,
+                "category": info["category"],
+            }
+        )
+        changed = True
+        _LOGGER.info("Discovered Ring camera '%s' via MQTT; added to options", device_id)
+
+    if changed:
+        hass.config_entries.async_update_entry(entry, options=options)
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up Ring Local ML from a config entry."""
     hass.data.setdefault(DOMAIN, {})
+    entry_data = hass.data[DOMAIN].setdefault(entry.entry_id, {})
+
+    # One dispatcher per entry; the sensor platform registers its routes on
+    # it during setup and this module owns the MQTT subscriptions.
+    configured = [c["id"] for c in entry.options.get("cameras", []) if c.get("id")]
+    dispatcher = RingMQTTDispatcher(configured)
+    entry_data["dispatcher"] = dispatcher
 
     # Forward the setup to the sensor platform. Wrap in try/except so errors
     # are logged and do not raise uncaught exceptions that surface as 500.
@@ -26,101 +141,38 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         _LOGGER.exception("Failed to forward entry setup to sensor platform for %s", entry.entry_id)
         return False
 
-    # Best-effort: automatically discover Ring-MQTT cameras by listening to
-    # MQTT topics under `ring/+/+`. When a camera id is observed we append it
-    # to the config entry options so the integration can manage recorders.
+    # Best-effort: automatically discover Ring-MQTT cameras. Unknown device
+    # ids are appended to the config entry options so the integration can
+    # manage recorders for them.
     try:
         import homeassistant.components.mqtt as mqtt
-        from homeassistant.core import callback
-        import json
-        import re
+
+        dispatcher.add_unknown_device_handler(lambda message: _discover_camera(hass, entry, message))
 
         @callback
         def _on_mqtt_message(msg):
-            try:
-                topic = parse_ring_topic(msg.topic)
-                if not topic or topic.category not in SUPPORTED_RING_CATEGORIES:
-                    return
-
-                if topic.topic_suffix.endswith("image"):
-                    return
-
-                last_segment = topic.topic_suffix.split("/")[-1] if topic.topic_suffix else ""
-                if last_segment.endswith("command"):
-                    return
-
-                device_id = topic.device_id
-                location_id = topic.location_id
-                if not device_id:
-                    return
-
-                # Decode payload
-                payload = msg.payload
-                if isinstance(payload, bytes):
-                    try:
-                        payload_text = payload.decode("utf-8")
-                    except Exception:
-                        payload_text = str(payload)
-                else:
-                    payload_text = str(payload)
-
-                # Try JSON first for RTSP hints
-                rtsp_url = None
-                try:
-                    parsed = json.loads(payload_text)
-                    for key in ("rtsp", "rtsp_url", "stream", "path", "url"):
-                        value = parsed.get(key)
-                        if isinstance(value, str) and value.startswith("rtsp"):
-                            rtsp_url = value
-                            break
-                except Exception:
-                    m = re.search(r"rtsp://[\w:@\-\._~%/]+", payload_text)
-                    if m:
-                        rtsp_url = m.group(0)
-
-                options = dict(entry.options)
-                cameras = options.setdefault("cameras", [])
-                if any(c.get("id") == device_id for c in cameras):
-                    return
-
-                legacy_camera = next((c for c in cameras if c.get("id") == location_id), None)
-                if legacy_camera:
-                    legacy_camera["id"] = device_id
-                    legacy_camera.setdefault("location_id", location_id)
-                    legacy_camera.setdefault("category", topic.category)
-                    if rtsp_url and not legacy_camera.get("rtsp_url"):
-                        legacy_camera["rtsp_url"] = rtsp_url
-                    hass.config_entries.async_update_entry(entry, options=options)
-                    hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
-                    _LOGGER.info(
-                        "Updated Ring camera '%s' to device id %s",
-                        legacy_camera.get("name", device_id),
-                        device_id,
-                    )
-                    return
-
-                suffix = device_id[-4:] if device_id else ""
-                candidate = {
-                    "id": device_id,
-                    "name": f"Ring Camera {suffix}" if suffix else f"Ring Camera {device_id}",
-                    "rtsp_url": rtsp_url or "",
-                    "location_id": location_id,
-                    "category": topic.category,
-                }
-
-                cameras.append(candidate)
-                hass.config_entries.async_update_entry(entry, options=options)
-                hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
-                _LOGGER.info("Discovered Ring camera '%s' via MQTT; added to options", device_id)
-            except Exception:
-                _LOGGER.debug("Error handling MQTT discovery message", exc_info=True)
-
-        # Subscribe to ring topics for this entry. Keep the returned unsubscribe
-        # callable so we can remove the subscription on unload.
-        unsub = await mqtt.async_subscribe(hass, "ring/#", _on_mqtt_message, 1)
-        hass.data[DOMAIN].setdefault(entry.entry_id, {})["mqtt_unsub"] = unsub
+            dispatcher.dispatch(msg)
+
+        # Keep the returned unsubscribe callables so we can remove the
+        # subscriptions on unload. Subscribe to every filter at once rather
+        # than waiting on the broker for each in turn.
+        unsubs = list(
+            await asyncio.gather(
+                *(mqtt.async_subscribe(hass, topic_filter, _on_mqtt_message, 1) for topic_filter in TOPIC_FILTERS),
+                *(
+                    mqtt.async_subscribe(hass, topic_filter, _on_mqtt_message, 1, encoding=None)
+                    for topic_filter in IMAGE_TOPIC_FILTERS
+                ),
+            )
+        )
+
+        def _unsubscribe_all():
+            while unsubs:
+                unsubs.pop()()
+
+        entry_data["mqtt_unsub"] = _unsubscribe_all
     except Exception:
-        _LOGGER.debug("MQTT discovery unavailable; skipping auto-discovery of Ring cameras")
+        _LOGGER.debug("MQTT unavailable; Ring-MQTT messages will not be processed", exc_info=True)
 
     return True
 
@@ -128,17 +180,25 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload a config entry."""
     try:
-        # Remove MQTT discovery subscription if present
+        # Remove Ring-MQTT subscriptions if present
         entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id, {})
         unsub = entry_data.get("mqtt_unsub")
         try:
             if callable(unsub):
                 unsub()
         except Exception:
-            _LOGGER.debug("Failed to unsubscribe MQTT discovery", exc_info=True)
+            _LOGGER.debug("Failed to unsubscribe from Ring-MQTT topics", exc_info=True)
+        discovery_unsub = entry_data.pop("discovery_unsub", None)
+        if discovery_unsub is not None:
+            discovery_unsub()
 
         # Forward the unload to the sensor platform
         return await hass.config_entries.async_forward_entry_unload(entry, "sensor")
     except Exception:
         _LOGGER.exception("Failed to unload entry %s", entry.entry_id)
         return False
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Drop the entry's pending token issue along with the entry."""
+    ir.async_delete_issue(hass, DOMAIN, f"{ISSUE_API_TOKEN_GENERATED}_{entry.entry_id}")
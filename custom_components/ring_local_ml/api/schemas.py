@@ -0,0 +1,195 @@
+"""Request and response schemas for the media HTTP API.
+
+The schemas are plain dataclasses so the API does not pull in pydantic; each
+one validates its input on construction and serialises with ``to_dict``.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Mapping, Optional
+
+from ..ml.activity import MAX_SCORE, zone_mask
+
+MAX_PAGE_SIZE = 200
+DEFAULT_PAGE_SIZE = 50
+
+
+class SchemaError(ValueError):
+    """Raised when request parameters fail validation."""
+
+
+def _optional_int(query: Mapping[str, str], key: str) -> Optional[int]:
+    raw = query.get(key)
+    if raw in (None, ""):
+        return None
+    try:
+        return int(raw)
+    except (TypeError, ValueError) as err:
+        raise SchemaError(f"'{key}' must be an integer") from err
+
+
+@dataclass(frozen=True)
+class EventQuery:
+    """Filters accepted by ``GET /api/events``."""
+
+    camera_id: Optional[str] = None
+    event_type: Optional[str] = None
+    before_id: Optional[int] = None
+    since: Optional[str] = None
+    until: Optional[str] = None
+    face_only: bool = False
+    limit: int = DEFAULT_PAGE_SIZE
+
+    def __post_init__(self):
+        if not 1 <= self.limit <= MAX_PAGE_SIZE:
+            raise SchemaError(f"'limit' must be between 1 and {MAX_PAGE_SIZE}")
+
+    @classmethod
+    def from_query(cls, query: Mapping[str, str]) -> "EventQuery":
+        limit = _optional_int(query, "limit")
+        return cls(
+            camera_id=query.get("camera_id") or None,
+            event_type=query.get("event_type") or None,
+            before_id=_optional_int(query, "before"),
+            since=query.get("since") or None,
+            until=query.get("until") or None,
+            face_only=query.get("face") in ("1", "true", "yes"),
+            limit=limit if limit is not None else DEFAULT_PAGE_SIZE,
+        )
+
+
+@dataclass(frozen=True)
+class ActivityQuery:
+    """Filters accepted by ``GET /api/activity``.
+
+    ``zone`` is ``x0,y0,x1,y1`` in fractions of the frame and ``min_score``
+    a fraction (0-1) of the index's full-scale motion score.
+    """
+
+    zone: Optional[int] = None
+    min_score: int = 0
+    camera_id: Optional[str] = None
+    since: Optional[str] = None
+    until: Optional[str] = None
+    before_id: Optional[int] = None
+    limit: int = DEFAULT_PAGE_SIZE
+
+    def __post_init__(self):
+        if not 1 <= self.limit <= MAX_PAGE_SIZE:
+            raise SchemaError(f"'limit' must be between 1 and {MAX_PAGE_SIZE}")
+
+    @classmethod
+    def from_query(cls, query: Mapping[str, str]) -> "ActivityQuery":
+        zone = None
+        if query.get("zone"):
+            try:
+                zone = zone_mask(*(float(value) for value in query["zone"].split(",")))
+            except (TypeError, ValueError) as err:
+                raise SchemaError("'zone' must be x0,y0,x1,y1 with 0 <= x0 < x1 <= 1 and 0 <= y0 < y1 <= 1") from err
+        try:
+            min_score = float(query.get("min_score") or 0)
+        except ValueError as err:
+            raise SchemaError("'min_score' must be a number") from err
+        if not 0 <= min_score <= 1:
+            raise SchemaError("'min_score' must be between 0 and 1")
+        limit = _optional_int(query, "limit")
+        return cls(
+            zone=zone,
+            min_score=int(round(min_score * MAX_SCORE)),
+            camera_id=query.get("camera_id") or None,
+            since=query.get("since") or None,
+            until=query.get("until") or None,
+            before_id=_optional_int(query, "before"),
+            limit=limit if limit is not None else DEFAULT_PAGE_SIZE,
+        )
+
+
+@dataclass(frozen=True)
+class EventSchema:
+    """Public representation of a row in the ``events`` table."""
+
+    id: int
+    timestamp: str
+    camera_id: str
+    event_type: str
+    face_detected: bool
+    duration: Optional[int]
+    clip_url: Optional[str] = None
+    snapshot_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    sprite_url: Optional[str] = None
+    sprite: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any], base_url: str = "/api") -> "EventSchema":
+        event_id = row["id"]
+        prefix = f"{base_url}/events/{event_id}"
+        sprite_meta = row["sprite_meta"] if "sprite_meta" in row.keys() else None
+        try:
+            sprite = json.loads(sprite_meta) if sprite_meta else {}
+        except (TypeError, ValueError):
+            sprite = {}
+        return cls(
+            id=event_id,
+            timestamp=row["timestamp"],
+            camera_id=row["camera_id"],
+            event_type=row["event_type"],
+            face_detected=bool(row["face_detected"]),
+            duration=row["duration"],
+            clip_url=f"{prefix}/clip" if row["clip_path"] else None,
+            snapshot_url=f"{prefix}/snapshot" if row["snapshot_path"] else None,
+            thumbnail_url=f"{prefix}/thumbnail" if row["thumbnail_path"] else None,
+            sprite_url=f"{prefix}/sprite" if row["sprite_path"] else None,
+            sprite=sprite,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class EventListResponse:
+    """Page of events plus the cursor for the next page."""
+
+    events: List[EventSchema]
+    next_before: Optional[int]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "events": [event.to_dict() for event in self.events],
+            "next_before": self.next_before,
+        }
+
+
+@dataclass(frozen=True)
+class ActivityMatch:
+    """An event whose clip matched an activity search, and the matching seconds."""
+
+    event: EventSchema
+    seconds: List[int]
+    peak: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"event": self.event.to_dict(), "seconds": self.seconds, "peak": self.peak}
+
+
+@dataclass(frozen=True)
+class ActivitySearchResponse:
+    matches: List[ActivityMatch]
+    next_before: Optional[int]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "matches": [match.to_dict() for match in self.matches],
+            "next_before": self.next_before,
+        }
+
+
+@dataclass(frozen=True)
+class ErrorResponse:
+    error: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
@@ -0,0 +1,544 @@
+"""Standalone aiohttp server that exposes recorded media to dashboards.
+
+The server runs on its own port next to Home Assistant so gallery and scrub
+traffic never goes through HA's HTTP stack. Clips are served with
+``FileResponse`` which handles ``Range`` requests with zero-copy ``sendfile``
+and answers conditional requests with ``304 Not Modified``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import hmac
+import ipaddress
+import logging
+import math
+import os
+import zlib
+from typing import Optional, Sequence
+
+from aiohttp import web
+
+from ..const import DEFAULT_API_HOST, DEFAULT_API_PORT
+from ..recorder.preview import LivePreview
+from ..ml.activity import MAX_SCORE, ActivityIndex
+from ..storage.db import get_activity, get_event, list_events, search_activity
+from .schemas import (
+    ActivityMatch,
+    ActivityQuery,
+    ActivitySearchResponse,
+    ErrorResponse,
+    EventListResponse,
+    EventQuery,
+    EventSchema,
+    SchemaError,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+PREVIEW_MAX_AGE = 3600
+DEFAULT_LIVE_FPS = 2.0
+MIN_LIVE_FPS = 0.2
+MJPEG_BOUNDARY = "ringlocalmlframe"
+FEED_KEEPALIVE_SECONDS = 15
+PROFILER_DEFAULT_SECONDS = 60.0
+CORS_ALLOW_METHODS = "GET, HEAD, POST"
+CORS_ALLOW_HEADERS = "Authorization, Last-Event-ID"
+CORS_MAX_AGE = 600
+# Candidate rows read per query while refining an activity search.
+ACTIVITY_SCAN_BATCH = 200
+ACTIVITY_SCAN_MAX_ROWS = 5000
+
+_MEDIA_COLUMNS = {
+    "clip": "clip_path",
+    "snapshot": "snapshot_path",
+    "thumbnail": "thumbnail_path",
+    "sprite": "sprite_path",
+}
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _error(status: int, message: str) -> web.Response:
+    return web.json_response(ErrorResponse(message).to_dict(), status=status)
+
+
+class MediaAPIServer:
+    """Serve events, clips, snapshots and previews over HTTP."""
+
+    def __init__(
+        self,
+        media_dir: str,
+        media_db: str,
+        *,
+        host: str = DEFAULT_API_HOST,
+        port: int = DEFAULT_API_PORT,
+        token: Optional[str] = None,
+        cors_origins: Sequence[str] = (),
+        thumbnail_cache=None,
+        recorders=None,
+        feed=None,
+        metrics=None,
+        profiler=None,
+        reanalyzer=None,
+        summaries=None,
+        tiering=None,
+    ):
+        self.media_dir = os.path.realpath(media_dir)
+        self.media_db = media_db
+        self.host = host
+        self.port = port
+        self.token = token or None
+        self.cors_origins = frozenset(origin.rstrip("/") for origin in cors_origins if origin)
+        self.thumbnail_cache = thumbnail_cache
+        self.recorders = recorders if recorders is not None else {}
+        self._previews: dict = {}
+        self.feed = feed
+        self.metrics = metrics
+        self.profiler = profiler
+        self.reanalyzer = reanalyzer
+        self.summaries = summaries
+        self.tiering = tiering
+        self.app = self._build_app()
+        self._runner: Optional[web.AppRunner] = None
+
+    def _build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._cors_middleware, self._auth_middleware])
+        app.router.add_get("/api/events", self.handle_list_events)
+        app.router.add_get("/api/events/{event_id:\\d+}", self.handle_get_event)
+        app.router.add_get("/api/events/{event_id:\\d+}/{kind:clip|snapshot}", self.handle_media_file)
+        app.router.add_get("/api/events/{event_id:\\d+}/{kind:thumbnail|sprite}", self.handle_preview)
+        app.router.add_get("/api/events/{event_id:\\d+}/activity", self.handle_event_activity)
+        app.router.add_get("/api/activity", self.handle_activity_search)
+        app.router.add_get("/api/cameras/{camera_id}/live.jpg", self.handle_live_jpeg)
+        app.router.add_get("/api/cameras/{camera_id}/live.mjpeg", self.handle_live_mjpeg)
+        app.router.add_get("/api/feed", self.handle_feed)
+        app.router.add_get("/metrics", self.handle_metrics)
+        app.router.add_get("/api/debug/profiler", self.handle_profiler_report)
+        app.router.add_post("/api/debug/profiler", self.handle_profiler_control)
+        app.router.add_get("/api/reanalysis", self.handle_reanalysis_status)
+        app.router.add_post("/api/reanalysis", self.handle_reanalysis_control)
+        app.router.add_get("/api/tiering", self.handle_tiering_status)
+        app.router.add_get("/api/summaries", self.handle_list_summaries)
+        app.router.add_get("/api/summaries/{camera_id}/{date:\\d{4}-\\d{2}-\\d{2}}", self.handle_get_summary)
+        app.router.add_get(
+            "/api/summaries/{camera_id}/{date:\\d{4}-\\d{2}-\\d{2}}.mp4", self.handle_summary_video
+        )
+        app.on_response_prepare.append(self._add_cors_headers)
+        return app
+
+    async def start(self) -> None:
+        if self.token is None and not _is_loopback(self.host):
+            raise ValueError(f"refusing to serve the media API on {self.host} without a token")
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        _LOGGER.info("Ring Local ML media API listening on %s:%s", self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @web.middleware
+    async def _auth_middleware(self, request: web.Request, handler):
+        if self.token:
+            supplied = request.query.get("token", "")
+            header = request.headers.get("Authorization", "")
+            if header.startswith("Bearer "):
+                supplied = header[len("Bearer "):]
+            if not hmac.compare_digest(supplied.encode(), self.token.encode()):
+                return _error(401, "unauthorized")
+        return await handler(request)
+
+    @web.middleware
+    async def _cors_middleware(self, request: web.Request, handler):
+        """Answer CORS preflights; no route handles ``OPTIONS`` itself."""
+        if request.method == "OPTIONS" and "Access-Control-Request-Method" in request.headers:
+            if request.headers.get("Origin") not in self.cors_origins:
+                return _error(403, "origin not allowed")
+            return web.Response(
+                status=204,
+                headers={
+                    "Access-Control-Allow-Methods": CORS_ALLOW_METHODS,
+                    "Access-Control-Allow-Headers": CORS_ALLOW_HEADERS,
+                    "Access-Control-Max-Age": str(CORS_MAX_AGE),
+                },
+            )
+        return await handler(request)
+
+    async def _add_cors_headers(self, request: web.Request, response: web.StreamResponse) -> None:
+        """Allow cross-origin requests from the configured origins only."""
+        if not self.cors_origins:
+            return
+        response.headers.add("Vary", "Origin")
+        origin = request.headers.get("Origin")
+        if origin in self.cors_origins:
+            response.headers.setdefault("Access-Control-Allow-Origin", origin)
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+    def _resolve_media_path(self, path: Optional[str]) -> Optional[str]:
+        """Only serve files that live inside the configured media directory."""
+        if not path:
+            return None
+        resolved = os.path.realpath(path)
+        if os.path.commonpath([resolved, self.media_dir]) != self.media_dir:
+            _LOGGER.warning("Refusing to serve %s outside of %s", path, self.media_dir)
+            return None
+        return resolved
+
+    async def _load_event(self, request: web.Request):
+        return await self._run_blocking(get_event, self.media_db, int(request.match_info["event_id"]))
+
+    async def handle_list_events(self, request: web.Request) -> web.Response:
+        try:
+            query = EventQuery.from_query(request.query)
+        except SchemaError as err:
+            return _error(400, str(err))
+
+        rows = await self._run_blocking(
+            list_events,
+            self.media_db,
+            camera_id=query.camera_id,
+            event_type=query.event_type,
+            before_id=query.before_id,
+            since=query.since,
+            until=query.until,
+            face_only=query.face_only,
+            limit=query.limit,
+        )
+        events = [EventSchema.from_row(row) for row in rows]
+        next_before = events[-1].id if len(events) == query.limit else None
+        return web.json_response(EventListResponse(events, next_before).to_dict())
+
+    async def handle_get_event(self, request: web.Request) -> web.Response:
+        row = await self._load_event(request)
+        if row is None:
+            return _error(404, "event not found")
+        return web.json_response(EventSchema.from_row(row).to_dict())
+
+    async def handle_event_activity(self, request: web.Request) -> web.Response:
+        row = await self._run_blocking(get_activity, self.media_db, int(request.match_info["event_id"]))
+        if row is None:
+            return _error(404, "no activity index for this event")
+        return web.json_response(ActivityIndex.from_row(row).to_dict())
+
+    async def handle_activity_search(self, request: web.Request) -> web.Response:
+        """Clips with motion in a zone, above an intensity, in a time range."""
+        try:
+            query = ActivityQuery.from_query(request.query)
+        except SchemaError as err:
+            return _error(400, str(err))
+        matches, next_before = await self._run_blocking(self._search_activity, query)
+        return web.json_response(ActivitySearchResponse(matches, next_before).to_dict())
+
+    def _search_activity(self, query: ActivityQuery):
+        """SQL narrows by camera, time, peak and zone; the per-second check runs here.
+
+        Scans at most ``ACTIVITY_SCAN_MAX_ROWS`` candidates per request and
+        returns a cursor to continue from when it stops early.
+        """
+        matches = []
+        before_id = query.before_id
+        scanned = 0
+        while len(matches) < query.limit and scanned < ACTIVITY_SCAN_MAX_ROWS:
+            rows = search_activity(
+                self.media_db,
+                zone=query.zone,
+                min_peak=query.min_score,
+                camera_id=query.camera_id,
+                since=query.since,
+                until=query.until,
+                before_id=before_id,
+                limit=ACTIVITY_SCAN_BATCH,
+            )
+            for row in rows:
+                scanned += 1
+                before_id = row["id"]
+                seconds = ActivityIndex.from_row(row).matching_seconds(query.zone, query.min_score)
+                if seconds:
+                    matches.append(ActivityMatch(EventSchema.from_row(row), seconds, round(row["peak"] / MAX_SCORE, 3)))
+                    if len(matches) == query.limit:
+                        return matches, before_id
+            if len(rows) < ACTIVITY_SCAN_BATCH:
+                return matches, None
+        return matches, before_id
+
+    async def handle_media_file(self, request: web.Request) -> web.StreamResponse:
+        row = await self._load_event(request)
+        if row is None:
+            return _error(404, "event not found")
+        path = self._resolve_media_path(row[_MEDIA_COLUMNS[request.match_info["kind"]]])
+        if not path or not os.path.isfile(path):
+            return _error(404, "media not found")
+        # FileResponse answers Range with 206 via sendfile and emits an ETag
+        # derived from mtime and size, returning 304 on If-None-Match.
+        return web.FileResponse(path, headers={"Cache-Control": "private, max-age=0, must-revalidate"})
+
+    async def handle_preview(self, request: web.Request) -> web.Response:
+        row = await self._load_event(request)
+        if row is None:
+            return _error(404, "event not found")
+        path = self._resolve_media_path(row[_MEDIA_COLUMNS[request.match_info["kind"]]])
+        if not path:
+            return _error(404, "preview not found")
+
+        data = None
+        if self.thumbnail_cache is not None:
+            data = self.thumbnail_cache.peek(path)
+            if data is None:
+                data = await self._run_blocking(self.thumbnail_cache.load, path)
+        else:
+            data = await self._run_blocking(_read_file, path)
+        if data is None:
+            return _error(404, "preview not found")
+
+        etag = f"{zlib.crc32(data):08x}-{len(data):x}"
+        headers = {"Cache-Control": f"private, max-age={PREVIEW_MAX_AGE}"}
+        if request.if_none_match and any(tag.value == etag for tag in request.if_none_match):
+            response = web.Response(status=304, headers=headers)
+        else:
+            response = web.Response(body=data, content_type="image/jpeg", headers=headers)
+        response.etag = etag
+        return response
+
+    def _get_preview(self, camera_id: str) -> Optional[LivePreview]:
+        recorder = self.recorders.get(camera_id)
+        if recorder is None:
+            return None
+        preview = self._previews.get(camera_id)
+        if preview is None or preview.recorder is not recorder:
+            preview = LivePreview(recorder)
+            self._previews[camera_id] = preview
+        return preview
+
+    async def handle_live_jpeg(self, request: web.Request) -> web.Response:
+        preview = self._get_preview(request.match_info["camera_id"])
+        if preview is None:
+            return _error(404, "camera not found")
+        result = await preview.async_get()
+        if result is None:
+            return _error(503, "no frames buffered yet")
+
+        sequence, jpeg = result
+        etag = f"{preview.recorder.instance_id}-{sequence:x}"
+        headers = {"Cache-Control": "no-cache"}
+        if request.if_none_match and any(tag.value == etag for tag in request.if_none_match):
+            response = web.Response(status=304, headers=headers)
+        else:
+            response = web.Response(body=jpeg, content_type="image/jpeg", headers=headers)
+        response.etag = etag
+        return response
+
+    async def handle_live_mjpeg(self, request: web.Request) -> web.StreamResponse:
+        preview = self._get_preview(request.match_info["camera_id"])
+        if preview is None:
+            return _error(404, "camera not found")
+        try:
+            fps = float(request.query.get("fps", DEFAULT_LIVE_FPS))
+        except ValueError:
+            return _error(400, "'fps' must be a number")
+        fps = max(MIN_LIVE_FPS, min(fps, preview.max_fps))
+        interval = 1.0 / fps
+
+        response = web.StreamResponse(
+            headers={
+                "Content-Type": f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}",
+                "Cache-Control": "no-store",
+            }
+        )
+        await response.prepare(request)
+
+        loop = asyncio.get_running_loop()
+        last_sequence = -1
+        try:
+            while True:
+                started = loop.time()
+                result = await preview.async_get()
+                if result is not None and result[0] != last_sequence:
+                    last_sequence, jpeg = result
+                    header = (
+                        f"--{MJPEG_BOUNDARY}\r\n"
+                        f"Content-Type: image/jpeg\r\n"
+                        f"Content-Length: {len(jpeg)}\r\n\r\n"
+                    ).encode()
+                    # write() waits for the transport to drain, so a slow
+                    # client only slows down its own stream.
+                    await response.write(header + jpeg + b"\r\n")
+                await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+        except ConnectionResetError:
+            pass
+        return response
+
+    async def handle_feed(self, request: web.Request) -> web.StreamResponse:
+        """Server-Sent Events stream of pipeline progress.
+
+        Clients resume with the standard ``Last-Event-ID`` header (or a
+        ``cursor`` query parameter) and receive everything after it from the
+        persisted feed before switching to live delivery.
+        """
+        if self.feed is None:
+            return _error(404, "event feed disabled")
+        raw_cursor = request.headers.get("Last-Event-ID") or request.query.get("cursor")
+        try:
+            cursor = int(raw_cursor) if raw_cursor else self.feed.last_seq
+        except ValueError:
+            return _error(400, "'cursor' must be an integer")
+        camera_id = request.query.get("camera_id")
+
+        # Subscribe before replaying so nothing published meanwhile is lost.
+        subscription = self.feed.subscribe()
+        response = web.StreamResponse(
+            headers={
+                "Content-Type": "text/event-stream",
+                "Cache-Control": "no-store",
+                "X-Accel-Buffering": "no",
+            }
+        )
+        try:
+            await response.prepare(request)
+            while True:
+                batch = await self.feed.async_replay(cursor)
+                if not batch:
+                    break
+                for message in batch:
+                    if camera_id is None or message.camera_id == camera_id:
+                        await response.write(message.to_sse())
+                cursor = batch[-1].seq
+
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), FEED_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    await response.write(b": keepalive\n\n")
+                    continue
+                if message is None:
+                    # Too slow or shutting down: close so the client
+                    # reconnects with Last-Event-ID and replays from the store.
+                    break
+                if message.seq <= cursor:
+                    continue
+                cursor = message.seq
+                if camera_id is None or message.camera_id == camera_id:
+                    await response.write(message.to_sse())
+        except ConnectionResetError:
+            pass
+        finally:
+            subscription.close()
+        return response
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        """Pipeline timers, counters and queue depths for Prometheus."""
+        if self.metrics is None:
+            return _error(404, "metrics disabled")
+        return web.Response(
+            text=self.metrics.render_prometheus(),
+            content_type="text/plain",
+            charset="utf-8",
+            headers={"Cache-Control": "no-store"},
+        )
+
+    async def handle_profiler_report(self, request: web.Request) -> web.Response:
+        """Profiler status and hottest functions; ``?format=collapsed`` for flamegraphs."""
+        if self.profiler is None:
+            return _error(404, "profiler disabled")
+        if request.query.get("format") == "collapsed":
+            return web.Response(text=self.profiler.collapsed(), content_type="text/plain")
+        try:
+            limit = int(request.query.get("limit", 25))
+        except ValueError:
+            return _error(400, "'limit' must be an integer")
+        return web.json_response({**self.profiler.status(), "top": self.profiler.top(limit)})
+
+    async def handle_profiler_control(self, request: web.Request) -> web.Response:
+        """``?action=start[&seconds=N]`` or ``?action=stop``."""
+        if self.profiler is None:
+            return _error(404, "profiler disabled")
+        action = request.query.get("action")
+        if action == "start":
+            try:
+                seconds = float(request.query.get("seconds", PROFILER_DEFAULT_SECONDS))
+            except ValueError:
+                return _error(400, "'seconds' must be a number")
+            if not math.isfinite(seconds):
+                return _error(400, "'seconds' must be finite")
+            self.profiler.start(seconds)
+        elif action == "stop":
+            self.profiler.stop()
+        else:
+            return _error(400, "'action' must be 'start' or 'stop'")
+        return web.json_response(self.profiler.status())
+
+    async def handle_reanalysis_status(self, request: web.Request) -> web.Response:
+        if self.reanalyzer is None:
+            return _error(404, "re-analysis disabled")
+        return web.json_response(self.reanalyzer.status())
+
+    async def handle_reanalysis_control(self, request: web.Request) -> web.Response:
+        """``?action=start[&camera_id=ID][&restart=1]`` or ``?action=stop``."""
+        if self.reanalyzer is None:
+            return _error(404, "re-analysis disabled")
+        action = request.query.get("action")
+        if action == "start":
+            restart = request.query.get("restart", "").lower() in ("1", "true", "yes")
+            if not self.reanalyzer.start(camera_id=request.query.get("camera_id") or None, restart=restart):
+                return _error(409, "re-analysis already running")
+        elif action == "stop":
+            await self.reanalyzer.stop()
+        else:
+            return _error(400, "'action' must be 'start' or 'stop'")
+        return web.json_response(self.reanalyzer.status())
+
+    async def handle_tiering_status(self, request: web.Request) -> web.Response:
+        if self.tiering is None:
+            return _error(404, "storage tiering disabled")
+        return web.json_response(self.tiering.status())
+
+    async def handle_list_summaries(self, request: web.Request) -> web.Response:
+        if self.summaries is None:
+            return _error(404, "summaries disabled")
+        days = await self._run_blocking(self.summaries.list_days, request.query.get("camera_id") or None)
+        return web.json_response({**self.summaries.status(), "summaries": days})
+
+    async def handle_get_summary(self, request: web.Request) -> web.Response:
+        if self.summaries is None:
+            return _error(404, "summaries disabled")
+        day_dir = self.summaries.day_dir(request.match_info["camera_id"], request.match_info["date"])
+        info = await self._run_blocking(self.summaries.describe, day_dir) if day_dir else None
+        if info is None:
+            return _error(404, "summary not found")
+        return web.json_response(info)
+
+    async def handle_summary_video(self, request: web.Request) -> web.StreamResponse:
+        """The day's summary, brought up to date with the latest clips first."""
+        if self.summaries is None:
+            return _error(404, "summaries disabled")
+        try:
+            path = await self.summaries.async_summary(request.match_info["camera_id"], request.match_info["date"])
+        except Exception:
+            _LOGGER.exception("Failed to build summary for %s", request.path)
+            return _error(500, "failed to build summary")
+        path = self._resolve_media_path(path)
+        if not path or not os.path.isfile(path):
+            return _error(404, "summary not found")
+        return web.FileResponse(path, headers={"Cache-Control": "private, max-age=0, must-revalidate"})
+
+
+def _read_file(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as handle:
+            return handle.read()
+    except OSError:
+        return None
@@ -1,10 +1,46 @@
 """Config flow for Ring Local ML integration."""
+import secrets
+
 import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.core import callback
 
-from .const import DOMAIN, CONF_MQTT_HOST, CONF_MQTT_PORT, CONF_MEDIA_DIR
+from .const import (
+    DOMAIN,
+    CONF_MQTT_HOST,
+    CONF_MQTT_PORT,
+    CONF_MEDIA_DIR,
+    CONF_CLIP_CONTAINER,
+    CONF_KEYFRAME_INTERVAL,
+    CONF_API_CORS_ORIGINS,
+    CONF_API_HOST,
+    CONF_API_PORT,
+    CONF_API_TOKEN,
+    CONF_STREAM_MODE,
+    CONF_WARM_SECONDS,
+    CONF_PRIORITY,
+    CONF_FRAME_MEMORY_MB,
+    CONF_SUMMARY_MODE,
+    CONF_TIER_AFTER_DAYS,
+    CONF_TIER_PRUNE_PREVIEWS,
+    CAMERA_PRIORITIES,
+    CLIP_CONTAINERS,
+    DEFAULT_API_PORT,
+    DEFAULT_CLIP_CONTAINER,
+    DEFAULT_KEYFRAME_INTERVAL,
+    DEFAULT_STREAM_MODE,
+    DEFAULT_WARM_SECONDS,
+    DEFAULT_FRAME_MEMORY_MB,
+    DEFAULT_PRIORITY,
+    DEFAULT_SUMMARY_MODE,
+    DEFAULT_TIER_AFTER_DAYS,
+    DEFAULT_TIER_PRUNE_PREVIEWS,
+    STREAM_MODES,
+    SUMMARY_MODES,
+)
+
+WARM_SECONDS_SCHEMA = vol.All(vol.Coerce(float), vol.Range(min=0, max=600))
 
 class RingLocalMLConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Ring Local ML."""
@@ -27,6 +63,27 @@ class RingLocalMLConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     vol.Required(CONF_MQTT_HOST, default="localhost"): str,
                     vol.Required(CONF_MQTT_PORT, default=1883): int,
                     vol.Required(CONF_MEDIA_DIR, default="/media/ring_local_ml"): str,
+                    vol.Optional(CONF_CLIP_CONTAINER, default=DEFAULT_CLIP_CONTAINER): vol.In(CLIP_CONTAINERS),
+                    vol.Optional(CONF_KEYFRAME_INTERVAL, default=DEFAULT_KEYFRAME_INTERVAL): vol.All(
+                        vol.Coerce(float), vol.Range(min=0.5, max=10)
+                    ),
+                    vol.Optional(CONF_API_PORT, default=DEFAULT_API_PORT): vol.All(
+                        int, vol.Range(min=0, max=65535)
+                    ),
+                    # Empty listens on Home Assistant's internal interface.
+                    vol.Optional(CONF_API_HOST, default=""): str,
+                    vol.Required(CONF_API_TOKEN, default=secrets.token_urlsafe(24)): vol.All(
+                        str, vol.Length(min=16)
+                    ),
+                    vol.Optional(CONF_API_CORS_ORIGINS, default=""): str,
+                    vol.Optional(CONF_FRAME_MEMORY_MB, default=DEFAULT_FRAME_MEMORY_MB): vol.All(
+                        int, vol.Range(min=64, max=65536)
+                    ),
+                    vol.Optional(CONF_SUMMARY_MODE, default=DEFAULT_SUMMARY_MODE): vol.In(SUMMARY_MODES),
+                    vol.Optional(CONF_TIER_AFTER_DAYS, default=DEFAULT_TIER_AFTER_DAYS): vol.All(
+                        vol.Coerce(float), vol.Range(min=0, max=3650)
+                    ),
+                    vol.Optional(CONF_TIER_PRUNE_PREVIEWS, default=DEFAULT_TIER_PRUNE_PREVIEWS): bool,
                 }
             ),
             errors=errors,
@@ -50,8 +107,10 @@ class RingLocalMLOptionsFlowHandler(config_entries.OptionsFlow):
         # Do NOT overwrite the base class' `config_entry` property; store
         # the passed entry in a private attribute instead.
         self._config_entry = config_entry
+        # Copy the camera dicts too: editing them in place would make the
+        # saved options compare equal and the update listener never fire.
         self.options = dict(self._config_entry.options)
-        self.options.setdefault("cameras", [])
+        self.options["cameras"] = [dict(c) for c in self.options.get("cameras", [])]
         self._editing_index = None
 
     def _suggest_name(self, camera_id: str) -> str:
@@ -74,6 +133,15 @@ class RingLocalMLOptionsFlowHandler(config_entries.OptionsFlow):
                 vol.Required("id", default=defaults.get("id", "")): str,
                 vol.Optional("name", default=suggested): str,
                 vol.Required("rtsp_url", default=defaults.get("rtsp_url", "")): str,
+                vol.Optional(
+                    CONF_STREAM_MODE, default=defaults.get(CONF_STREAM_MODE, DEFAULT_STREAM_MODE)
+                ): vol.In(STREAM_MODES),
+                vol.Optional(
+                    CONF_WARM_SECONDS, default=defaults.get(CONF_WARM_SECONDS, DEFAULT_WARM_SECONDS)
+                ): WARM_SECONDS_SCHEMA,
+                vol.Optional(
+                    CONF_PRIORITY, default=defaults.get(CONF_PRIORITY, DEFAULT_PRIORITY)
+                ): vol.In(CAMERA_PRIORITIES),
             }
         )
 
@@ -89,6 +157,9 @@ class RingLocalMLOptionsFlowHandler(config_entries.OptionsFlow):
                     "id": camera_id,
                     "name": name.strip(),
                     "rtsp_url": user_input.get("rtsp_url", "").strip(),
+                    CONF_STREAM_MODE: user_input.get(CONF_STREAM_MODE, DEFAULT_STREAM_MODE),
+                    CONF_WARM_SECONDS: user_input.get(CONF_WARM_SECONDS, DEFAULT_WARM_SECONDS),
+                    CONF_PRIORITY: user_input.get(CONF_PRIORITY, DEFAULT_PRIORITY),
                 }
                 self.options["cameras"].append(camera)
                 return await self.async_step_camera_menu()
@@ -166,17 +237,26 @@ class RingLocalMLOptionsFlowHandler(config_entries.OptionsFlow):
         defaults = {
             "name": camera.get("name", self._suggest_name(camera["id"])),
             "rtsp_url": camera.get("rtsp_url", ""),
+            CONF_STREAM_MODE: camera.get(CONF_STREAM_MODE, DEFAULT_STREAM_MODE),
+            CONF_WARM_SECONDS: camera.get(CONF_WARM_SECONDS, DEFAULT_WARM_SECONDS),
+            CONF_PRIORITY: camera.get(CONF_PRIORITY, DEFAULT_PRIORITY),
         }
         schema = vol.Schema(
             {
                 vol.Optional("name", default=defaults["name"]): str,
                 vol.Required("rtsp_url", default=defaults["rtsp_url"]): str,
+                vol.Optional(CONF_STREAM_MODE, default=defaults[CONF_STREAM_MODE]): vol.In(STREAM_MODES),
+                vol.Optional(CONF_WARM_SECONDS, default=defaults[CONF_WARM_SECONDS]): WARM_SECONDS_SCHEMA,
+                vol.Optional(CONF_PRIORITY, default=defaults[CONF_PRIORITY]): vol.In(CAMERA_PRIORITIES),
             }
         )
 
         if user_input is not None:
             camera["name"] = user_input.get("name") or self._suggest_name(camera["id"])
             camera["rtsp_url"] = user_input.get("rtsp_url", "")
+            camera[CONF_STREAM_MODE] = user_input.get(CONF_STREAM_MODE, DEFAULT_STREAM_MODE)
+            camera[CONF_WARM_SECONDS] = user_input.get(CONF_WARM_SECONDS, DEFAULT_WARM_SECONDS)
+            camera[CONF_PRIORITY] = user_input.get(CONF_PRIORITY, DEFAULT_PRIORITY)
             self.options["cameras"][self._editing_index] = camera
             self._editing_index = None
             return await self.async_step_camera_menu()
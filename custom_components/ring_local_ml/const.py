@@ -5,3 +5,54 @@ DOMAIN = "ring_local_ml"
 CONF_MQTT_HOST = "mqtt_host"
 CONF_MQTT_PORT = "mqtt_port"
 CONF_MEDIA_DIR = "media_dir"
+CONF_CLIP_CONTAINER = "clip_container"
+CONF_KEYFRAME_INTERVAL = "keyframe_interval"
+CONF_API_HOST = "api_host"
+CONF_API_PORT = "api_port"
+CONF_API_TOKEN = "api_token"
+CONF_API_CORS_ORIGINS = "api_cors_origins"
+CONF_STREAM_MODE = "stream_mode"
+CONF_WARM_SECONDS = "warm_seconds"
+CONF_PRIORITY = "priority"
+CONF_FRAME_MEMORY_MB = "frame_memory_mb"
+CONF_SUMMARY_MODE = "summary_mode"
+CONF_TIER_AFTER_DAYS = "tier_after_days"
+CONF_TIER_PRUNE_PREVIEWS = "tier_prune_previews"
+
+DEFAULT_CLIP_CONTAINER = "faststart"
+DEFAULT_KEYFRAME_INTERVAL = 2.0
+CLIP_CONTAINERS = ["faststart", "fragmented"]
+DEFAULT_API_PORT = 8765
+# The media API refuses to listen beyond loopback without a token.
+DEFAULT_API_HOST = "127.0.0.1"
+# Repair issue raised when setup had to generate the media API token.
+ISSUE_API_TOKEN_GENERATED = "api_token_generated"
+
+# Per-camera video source: a persistent RTSP pull, an RTSP session opened
+# only for events and viewers, or only the snapshot images Ring-MQTT
+# publishes over MQTT.
+STREAM_MODE_CONTINUOUS = "continuous"
+STREAM_MODE_ON_DEMAND = "on_demand"
+STREAM_MODE_SNAPSHOT = "snapshot"
+STREAM_MODES = [STREAM_MODE_CONTINUOUS, STREAM_MODE_ON_DEMAND, STREAM_MODE_SNAPSHOT]
+DEFAULT_STREAM_MODE = STREAM_MODE_CONTINUOUS
+DEFAULT_WARM_SECONDS = 30.0
+
+# Frame buffer memory shared by all cameras; lower priority cameras are
+# degraded first when it runs out.
+DEFAULT_FRAME_MEMORY_MB = 512
+CAMERA_PRIORITIES = ["high", "normal", "low"]
+DEFAULT_PRIORITY = "normal"
+
+# Per-camera daily summary video: a few seconds around each event's peak
+# motion, a timelapse of each clip's keyframes, or nothing.
+SUMMARY_MODE_OFF = "off"
+SUMMARY_MODE_HIGHLIGHTS = "highlights"
+SUMMARY_MODE_TIMELAPSE = "timelapse"
+SUMMARY_MODES = [SUMMARY_MODE_HIGHLIGHTS, SUMMARY_MODE_TIMELAPSE, SUMMARY_MODE_OFF]
+DEFAULT_SUMMARY_MODE = SUMMARY_MODE_HIGHLIGHTS
+
+# Clips older than this many days are re-encoded smaller in the background;
+# 0 keeps every clip as recorded.
+DEFAULT_TIER_AFTER_DAYS = 0
+DEFAULT_TIER_PRUNE_PREVIEWS = True
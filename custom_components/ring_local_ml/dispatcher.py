@@ -0,0 +1,117 @@
+"""Single dispatcher for all Ring-MQTT messages of a config entry.
+
+The integration subscribes once per narrowed topic filter and every message
+goes through ``RingMQTTDispatcher.dispatch``. Handlers for a given
+``(device_id, topic_suffix)`` pair are resolved once by the registered route
+factories and cached, so the steady-state cost of a message is a cached topic
+parse, one dict lookup and the handlers themselves. Devices that are already
+known skip discovery with a single set lookup.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .mqtt import SUPPORTED_RING_CATEGORIES, ParsedMessage, RingTopic, parse_ring_topic
+
+_LOGGER = logging.getLogger(__name__)
+
+# Topics the integration consumes. Everything else Ring-MQTT publishes
+# (commands, nested debug topics, ...) is filtered out by the broker.
+TOPIC_FILTERS = tuple(
+    topic_filter
+    for category in sorted(SUPPORTED_RING_CATEGORIES)
+    for topic_filter in (
+        f"ring/+/{category}/+/status",
+        f"ring/+/{category}/+/+/state",
+        f"ring/+/{category}/+/+/attributes",
+    )
+)
+
+# Binary snapshot JPEGs; subscribed without payload decoding.
+IMAGE_TOPIC_FILTERS = tuple(
+    f"ring/+/{category}/+/snapshot/image" for category in sorted(SUPPORTED_RING_CATEGORIES)
+)
+
+MessageHandler = Callable[[ParsedMessage], None]
+RouteFactory = Callable[[RingTopic], Optional[MessageHandler]]
+
+
+class RingMQTTDispatcher:
+    """Route parsed Ring-MQTT messages to the handlers that consume them."""
+
+    def __init__(self, known_devices: Iterable[str] = ()):
+        self.known_devices: Set[str] = set(known_devices)
+        self._route_factories: List[RouteFactory] = []
+        self._unknown_device_handlers: List[MessageHandler] = []
+        self._routes: Dict[Tuple[str, str], Tuple[MessageHandler, ...]] = {}
+        self.messages = 0
+
+    def add_route_factory(self, factory: RouteFactory) -> Callable[[], None]:
+        """Register ``factory(topic) -> handler | None``; returns an unregister callable."""
+        self._route_factories.append(factory)
+        self._routes.clear()
+
+        def _remove():
+            if factory in self._route_factories:
+                self._route_factories.remove(factory)
+                self._routes.clear()
+
+        return _remove
+
+    def add_unknown_device_handler(self, handler: MessageHandler) -> Callable[[], None]:
+        """Register a handler that only sees messages from unknown devices."""
+        self._unknown_device_handlers.append(handler)
+
+        def _remove():
+            if handler in self._unknown_device_handlers:
+                self._unknown_device_handlers.remove(handler)
+
+        return _remove
+
+    def add_known_device(self, device_id: str) -> None:
+        self.known_devices.add(device_id)
+
+    def forget_device(self, device_id: str) -> None:
+        self.known_devices.discard(device_id)
+        for key in [key for key in self._routes if key[0] == device_id]:
+            del self._routes[key]
+
+    def _resolve(self, topic: RingTopic) -> Tuple[MessageHandler, ...]:
+        handlers = []
+        for factory in self._route_factories:
+            try:
+                handler = factory(topic)
+            except Exception:
+                _LOGGER.exception("Failed to build MQTT route for %s", topic.raw)
+                continue
+            if handler is not None:
+                handlers.append(handler)
+        return tuple(handlers)
+
+    def dispatch(self, msg) -> None:
+        """Handle a raw MQTT message (anything with ``topic`` and ``payload``)."""
+        topic = parse_ring_topic(msg.topic)
+        if topic is None or topic.category not in SUPPORTED_RING_CATEGORIES or not topic.device_id:
+            return
+        self.messages += 1
+        message = ParsedMessage(topic, msg.payload)
+
+        if topic.device_id not in self.known_devices:
+            for handler in list(self._unknown_device_handlers):
+                try:
+                    handler(message)
+                except Exception:
+                    _LOGGER.exception("Error handling message from new device %s", topic.device_id)
+            self.known_devices.add(topic.device_id)
+
+        key = (topic.device_id, topic.topic_suffix or "state")
+        route = self._routes.get(key)
+        if route is None:
+            route = self._routes[key] = self._resolve(topic)
+        for handler in route:
+            try:
+                handler(message)
+            except Exception:
+                _LOGGER.exception("Error handling MQTT message on %s", topic.raw)
@@ -0,0 +1,208 @@
+"""Push feed of pipeline progress for dashboards.
+
+Every message gets a monotonically increasing sequence number and is
+persisted to the ``event_feed`` table, so a client that reconnects with the
+last sequence it saw gets everything it missed, as long as that is within
+the last ``retention`` messages; older rows are pruned as new ones are
+written. Live delivery goes through a
+bounded queue per subscriber; a subscriber that falls behind is cut off and
+resumes from the store instead of growing memory without bound.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import datetime as dt
+import functools
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from .storage.db import append_feed, last_feed_seq, read_feed
+
+_LOGGER = logging.getLogger(__name__)
+
+FEED_EVENT_OPEN = "event_open"
+FEED_EVENT_EXTENDED = "event_extended"
+FEED_CLIP_READY = "clip_ready"
+FEED_SNAPSHOT_READY = "snapshot_ready"
+# An existing event row changed, e.g. after re-analysis.
+FEED_EVENT_UPDATED = "event_updated"
+
+FEED_HISTORY = 512
+SUBSCRIBER_QUEUE_SIZE = 256
+FLUSH_DELAY = 0.5
+# Messages kept in ``event_feed`` for clients resuming with Last-Event-ID.
+FEED_RETENTION = 10000
+
+
+@dataclass(frozen=True)
+class FeedMessage:
+    seq: int
+    kind: str
+    camera_id: str
+    timestamp: str
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_row(cls, row) -> "FeedMessage":
+        try:
+            data = json.loads(row["payload"]) if row["payload"] else {}
+        except (TypeError, ValueError):
+            data = {}
+        return cls(row["seq"], row["kind"], row["camera_id"], row["timestamp"], data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "seq": self.seq,
+            "kind": self.kind,
+            "camera_id": self.camera_id,
+            "timestamp": self.timestamp,
+            "data": self.data,
+        }
+
+    def to_row(self):
+        return (self.seq, self.timestamp, self.camera_id, self.kind, json.dumps(self.data))
+
+    def to_sse(self) -> bytes:
+        payload = json.dumps(self.to_dict(), separators=(",", ":"))
+        return f"id: {self.seq}\nevent: {self.kind}\ndata: {payload}\n\n".encode()
+
+
+class FeedSubscription:
+    """Bounded live queue for one client; ``None`` means it was cut off."""
+
+    def __init__(self, feed: "EventFeed", maxsize: int):
+        self._feed = feed
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def offer(self, message: FeedMessage) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Drop what is queued and signal the consumer to disconnect; the
+            # client resumes from its last seq against the persisted feed.
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    def close(self) -> None:
+        self._feed.unsubscribe(self)
+
+
+class EventFeed:
+    """Sequence, persist and fan out pipeline progress messages."""
+
+    def __init__(
+        self,
+        media_db: str,
+        *,
+        history: int = FEED_HISTORY,
+        subscriber_queue: int = SUBSCRIBER_QUEUE_SIZE,
+        retention: int = FEED_RETENTION,
+    ):
+        self.media_db = media_db
+        self.retention = max(retention, history)
+        self._history: Deque[FeedMessage] = collections.deque(maxlen=history)
+        self._pending: List[FeedMessage] = []
+        self._subscribers: Set[FeedSubscription] = set()
+        self._subscriber_queue = subscriber_queue
+        self._seq = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    async def async_start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._seq = await self._loop.run_in_executor(None, last_feed_seq, self.media_db)
+
+    async def async_stop(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        await self._async_flush()
+        for subscription in list(self._subscribers):
+            subscription.offer(None)
+        self._subscribers.clear()
+
+    def publish(self, kind: str, camera_id: str, **data) -> FeedMessage:
+        """Publish a message; must be called from the event loop."""
+        self._seq += 1
+        message = FeedMessage(
+            seq=self._seq,
+            kind=kind,
+            camera_id=camera_id,
+            timestamp=dt.datetime.utcnow().isoformat(),
+            data=data,
+        )
+        self._history.append(message)
+        self._pending.append(message)
+        for subscription in self._subscribers:
+            subscription.offer(message)
+        self._schedule_flush()
+        return message
+
+    def publish_threadsafe(self, kind: str, camera_id: str, **data) -> None:
+        """Publish from a worker thread."""
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(lambda: self.publish(kind, camera_id, **data))
+
+    def subscribe(self) -> FeedSubscription:
+        subscription = FeedSubscription(self, self._subscriber_queue)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: FeedSubscription) -> None:
+        self._subscribers.discard(subscription)
+
+    async def async_replay(self, after_seq: int, limit: int = 1000) -> List[FeedMessage]:
+        """Return messages with ``seq > after_seq`` from history and the store."""
+        if after_seq >= self._seq:
+            return []
+        replay: List[FeedMessage] = []
+        oldest_in_memory = self._history[0].seq if self._history else self._seq + 1
+        if after_seq + 1 < oldest_in_memory:
+            rows = await asyncio.get_running_loop().run_in_executor(
+                None, read_feed, self.media_db, after_seq, oldest_in_memory, limit
+            )
+            replay.extend(FeedMessage.from_row(row) for row in rows)
+        replay.extend(message for message in self._history if message.seq > after_seq)
+        return replay[:limit]
+
+    def _schedule_flush(self) -> None:
+        if self._loop is None or self._flush_handle is not None:
+            return
+        delay = 0 if len(self._pending) > self._history.maxlen // 2 else FLUSH_DELAY
+        self._flush_handle = self._loop.call_later(delay, self._start_flush)
+
+    def _start_flush(self) -> None:
+        self._flush_handle = None
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = self._loop.create_task(self._async_flush())
+        else:
+            self._schedule_flush()
+
+    async def _async_flush(self) -> None:
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None,
+                functools.partial(
+                    append_feed, self.media_db, [message.to_row() for message in batch], keep=self.retention
+                ),
+            )
+        except Exception:
+            _LOGGER.exception("Failed to persist %d feed messages", len(batch))
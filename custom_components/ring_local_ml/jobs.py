@@ -0,0 +1,199 @@
+"""Bounded, prioritised job stages for clip processing.
+
+Clip encodes, face scans and SQLite writes used to go to the loop's default
+executor, which inside Home Assistant is shared with every other
+integration. Each stage here owns a small thread pool and a bounded
+priority queue instead: dings are served before motion, a full queue sheds
+its lowest priority job, and callers can check ``saturated`` to skip
+optional work (such as the face scan) while a stage is backed up.
+
+This module has no Home Assistant dependency.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .metrics import TIMER_QUEUE_WAIT
+
+_LOGGER = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# Lower runs first. Unknown event types are treated as normal priority.
+EVENT_PRIORITIES = {
+    "ding": PRIORITY_HIGH,
+    "motion": PRIORITY_NORMAL,
+    "snapshot": PRIORITY_LOW,
+}
+
+STAGE_ENCODE = "encode"
+STAGE_DETECT = "detect"
+STAGE_PERSIST = "persist"
+
+
+class JobShed(Exception):
+    """Raised to the submitter of a job that was dropped under load."""
+
+
+class JobStage:
+    """A bounded priority queue drained by a dedicated thread pool."""
+
+    def __init__(
+        self,
+        name: str,
+        workers: int,
+        max_queue: int,
+        *,
+        degrade_at: Optional[int] = None,
+        metrics=None,
+    ):
+        self.name = name
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.degrade_at = degrade_at if degrade_at is not None else max(1, self.max_queue // 2)
+        self.metrics = metrics
+        self._heap: List[Tuple[int, int, Callable, tuple, asyncio.Future, float]] = []
+        self._counter = itertools.count()
+        self._available: Optional[asyncio.Semaphore] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: List[asyncio.Task] = []
+        self.completed = 0
+        self.failed = 0
+        self.shed = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._heap)
+
+    @property
+    def saturated(self) -> bool:
+        return len(self._heap) >= self.degrade_at
+
+    def _ensure_started(self) -> None:
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._available = asyncio.Semaphore(0)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix=f"ring_local_ml_{self.name}"
+        )
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, func: Callable, *args, priority: int = PRIORITY_NORMAL) -> Any:
+        """Run ``func(*args)`` on this stage and return its result.
+
+        Raises ``JobShed`` if the job is dropped to make room for more
+        important work, or is refused because the queue is full of it.
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._counter), func, args, future, time.monotonic())
+
+        if len(self._heap) >= self.max_queue:
+            worst = max(self._heap)
+            if entry >= worst:
+                self.shed += 1
+                raise JobShed(f"{self.name} queue full")
+            # Replace the least important queued job; the semaphore count is
+            # unchanged because the queue length is.
+            self._heap.remove(worst)
+            heapq.heapify(self._heap)
+            heapq.heappush(self._heap, entry)
+            self.shed += 1
+            if not worst[4].done():
+                worst[4].set_exception(JobShed(f"{self.name} job shed for higher priority work"))
+        else:
+            heapq.heappush(self._heap, entry)
+            self._available.release()
+        return await future
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._available.acquire()
+            _, _, func, args, future, enqueued = heapq.heappop(self._heap)
+            if future.done():
+                continue
+            if self.metrics is not None:
+                self.metrics.observe(TIMER_QUEUE_WAIT, time.monotonic() - enqueued, stage=self.name)
+            try:
+                result = await loop.run_in_executor(self._executor, func, *args)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as err:
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(err)
+            else:
+                self.completed += 1
+                if not future.done():
+                    future.set_result(result)
+
+    async def async_stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while self._heap:
+            future = heapq.heappop(self._heap)[4]
+            if not future.done():
+                future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "depth": self.depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "shed": self.shed,
+        }
+
+
+class JobScheduler:
+    """The encode, detect and persist stages used by the event pipeline.
+
+    Persist has a single worker so SQLite writes never contend with each
+    other; encode gets up to two workers because clip encodes dominate.
+    """
+
+    def __init__(
+        self,
+        *,
+        encode_workers: Optional[int] = None,
+        detect_workers: int = 1,
+        max_queue: int = 8,
+        metrics=None,
+    ):
+        if encode_workers is None:
+            encode_workers = min(2, os.cpu_count() or 1)
+        self.encode = JobStage(STAGE_ENCODE, encode_workers, max_queue, metrics=metrics)
+        self.detect = JobStage(STAGE_DETECT, detect_workers, max_queue, metrics=metrics)
+        self.persist = JobStage(STAGE_PERSIST, 1, max_queue * 4, metrics=metrics)
+        self.degraded = 0
+
+    @property
+    def stages(self) -> Tuple[JobStage, ...]:
+        return (self.encode, self.detect, self.persist)
+
+    async def async_stop(self) -> None:
+        await asyncio.gather(*(stage.async_stop() for stage in self.stages))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        stats = {stage.name: stage.stats() for stage in self.stages}
+        stats["degraded"] = {"face_scans_skipped": self.degraded}
+        return stats
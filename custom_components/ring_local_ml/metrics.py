@@ -0,0 +1,440 @@
+"""Per-stage timers and counters for the clip pipeline.
+
+When a clip shows up late the question is which stage took the time: the
+post-roll wait, the encode, the face scan, the snapshot write or SQLite.
+``PipelineMetrics`` keeps a running count/sum/max and a window of recent
+samples for every timed stage, plus counters, and renders everything (and
+whatever its collectors report, e.g. recorder frame counts and job queue
+depths) in the Prometheus text format.
+
+``SamplingProfiler`` is an opt-in wall-clock profiler that periodically
+samples every thread's stack; it is off unless started at runtime.
+
+This module has no Home Assistant dependency.
+"""
+
+from __future__ import annotations
+
+import collections
+import contextlib
+import logging
+import math
+import sys
+import threading
+import time
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+METRIC_PREFIX = "ring_local_ml"
+RECENT_SAMPLES = 256
+QUANTILES = (0.5, 0.9, 0.99)
+
+# Timed stages (seconds).
+TIMER_EVENT_WAIT = "event_wait"
+TIMER_EVENT_TO_CLIP = "event_to_clip"
+TIMER_QUEUE_WAIT = "queue_wait"
+TIMER_ENCODE = "encode"
+TIMER_PREVIEWS = "previews"
+TIMER_DETECT = "detect"
+TIMER_DETECT_FRAME = "detect_frame"
+TIMER_SNAPSHOT_WRITE = "snapshot_write"
+TIMER_DB_COMMIT = "db_commit"
+TIMER_SETUP = "setup"
+TIMER_ACTIVITY = "activity_index"
+TIMER_SUMMARY = "summary_segment"
+TIMER_TIER = "tier_reencode"
+
+# Counters.
+COUNTER_CLIPS = "clips"
+COUNTER_FRAMES_SCANNED = "frames_scanned"
+COUNTER_TIER_BYTES_SAVED = "tier_bytes_saved"
+
+# name -> (type, help). Timers are exported as summaries in seconds.
+METRICS = {
+    TIMER_EVENT_WAIT: ("summary", "Post-roll wait between the trigger and the clip cut"),
+    TIMER_EVENT_TO_CLIP: ("summary", "Trigger to clip_ready, including the post-roll wait"),
+    TIMER_QUEUE_WAIT: ("summary", "Time a job spent queued before a worker picked it up"),
+    TIMER_ENCODE: ("summary", "Clip encode time"),
+    TIMER_PREVIEWS: ("summary", "Thumbnail and sprite generation time"),
+    TIMER_DETECT: ("summary", "Face scan time per clip or snapshot"),
+    TIMER_DETECT_FRAME: ("summary", "Face scan time per frame examined"),
+    TIMER_SNAPSHOT_WRITE: ("summary", "Face snapshot or MQTT snapshot write time"),
+    TIMER_DB_COMMIT: ("summary", "SQLite insert/update time"),
+    TIMER_SETUP: ("summary", "Setup and background warm-up time per step"),
+    TIMER_ACTIVITY: ("summary", "Motion activity index build time per clip"),
+    TIMER_SUMMARY: ("summary", "Daily summary segment cut or encode time per clip"),
+    TIMER_TIER: ("summary", "Storage tier re-encode time per clip"),
+    COUNTER_CLIPS: ("counter", "Clips written"),
+    COUNTER_FRAMES_SCANNED: ("counter", "Frames examined by the face detector"),
+    COUNTER_TIER_BYTES_SAVED: ("counter", "Bytes freed by re-encoding aging clips"),
+    "frames_decoded": ("counter", "Frames read from the camera stream"),
+    "frames_dropped": ("counter", "Frames missing from the camera stream"),
+    "recorder_streaming": ("gauge", "1 while the camera's stream is open"),
+    "stream_fps": ("gauge", "Frames per second delivered over the last few seconds"),
+    "stream_target_fps": ("gauge", "Frame rate the recorder asks ffmpeg for"),
+    "stream_gaps": ("counter", "Pauses of several frame intervals in the camera stream"),
+    "stream_reconnects": ("counter", "Stream sessions that ended unexpectedly and were reopened"),
+    "stream_stalls": ("counter", "Sessions killed by the read watchdog"),
+    "job_queue_depth": ("gauge", "Jobs waiting in a pipeline stage"),
+    "jobs_completed": ("counter", "Jobs finished by a pipeline stage"),
+    "jobs_failed": ("counter", "Jobs that raised in a pipeline stage"),
+    "jobs_shed": ("counter", "Jobs dropped or refused under load"),
+    "face_scans_skipped": ("counter", "Face scans skipped while the detect stage was backed up"),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+# ``(name, labels, value)`` reported by a collector at scrape time.
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+
+class StageTimer:
+    """Running totals plus a window of recent samples for quantiles."""
+
+    __slots__ = ("count", "total", "max", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = collections.deque(maxlen=RECENT_SAMPLES)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        if not self.recent:
+            return None
+        samples = sorted(self.recent)
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 4) if self.count else None,
+            "p50": _round(self.quantile(0.5)),
+            "p90": _round(self.quantile(0.9)),
+            "max": round(self.max, 4) if self.count else None,
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
+
+
+class PipelineMetrics:
+    """Thread-safe timers and counters; stages record from worker threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timers: Dict[Tuple[str, Labels], StageTimer] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            timer = self._timers.get(key)
+            if timer is None:
+                timer = self._timers[key] = StageTimer()
+            timer.add(seconds)
+
+    @contextlib.contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> Callable[[], None]:
+        """Register a callable polled at render time; returns a remover."""
+        self._collectors.append(collector)
+
+        def _remove():
+            if collector in self._collectors:
+                self._collectors.remove(collector)
+
+        return _remove
+
+    def summary(self, name: str, **labels) -> Dict[str, Optional[float]]:
+        """Summary of one timer; with no labels, all label sets are merged."""
+        wanted = _labels(labels)
+        merged = StageTimer()
+        with self._lock:
+            for (timer_name, timer_labels), timer in self._timers.items():
+                if timer_name != name or not set(wanted) <= set(timer_labels):
+                    continue
+                merged.count += timer.count
+                merged.total += timer.total
+                merged.max = max(merged.max, timer.max)
+                merged.recent.extend(timer.recent)
+        return merged.summary()
+
+    def counter(self, name: str, **labels) -> float:
+        wanted = set(_labels(labels))
+        with self._lock:
+            return sum(
+                value
+                for (counter_name, counter_labels), value in self._counters.items()
+                if counter_name == name and wanted <= set(counter_labels)
+            )
+
+    def _collect(self) -> List[Sample]:
+        samples: List[Sample] = []
+        for collector in list(self._collectors):
+            try:
+                samples.extend(collector())
+            except Exception:
+                _LOGGER.debug("Metrics collector %s failed", collector, exc_info=True)
+        return samples
+
+    def render_prometheus(self) -> str:
+        """Everything in the Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            timers = [(name, labels, timer.count, timer.total, [timer.quantile(q) for q in QUANTILES])
+                      for (name, labels), timer in self._timers.items()]
+            counters = list(self._counters.items())
+        series: Dict[str, List[str]] = collections.defaultdict(list)
+
+        for name, labels, count, total, quantiles in timers:
+            metric = f"{METRIC_PREFIX}_{name}_seconds"
+            for fraction, value in zip(QUANTILES, quantiles):
+                if value is not None:
+                    series[name].append(_line(metric, labels + (("quantile", str(fraction)),), value))
+            series[name].append(_line(f"{metric}_sum", labels, total))
+            series[name].append(_line(f"{metric}_count", labels, count))
+        for (name, labels), value in counters:
+            series[name].append(_line(f"{METRIC_PREFIX}_{name}_total", labels, value))
+        for name, labels, value in self._collect():
+            kind = METRICS.get(name, ("gauge", ""))[0]
+            suffix = "_total" if kind == "counter" else ""
+            series[name].append(_line(f"{METRIC_PREFIX}_{name}{suffix}", _labels(labels), value))
+
+        lines = []
+        for name in sorted(series):
+            kind, help_text = METRICS.get(name, ("gauge", name))
+            metric = f"{METRIC_PREFIX}_{name}" + {"summary": "_seconds", "counter": "_total"}.get(kind, "")
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.extend(series[name])
+        return "\n".join(lines) + "\n"
+
+
+class SetupTimer:
+    """Wall-clock breakdown of a setup sequence for the log.
+
+    Steps may overlap (``measure`` wraps awaitables run with ``gather``), so
+    their sum can exceed ``elapsed``. Each step is also observed as
+    ``TIMER_SETUP`` when ``metrics`` is given.
+    """
+
+    def __init__(self, metrics: Optional[PipelineMetrics] = None):
+        self.metrics = metrics
+        self.steps: List[Tuple[str, float]] = []
+        self._started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def record(self, step: str, seconds: float) -> None:
+        self.steps.append((step, seconds))
+        if self.metrics is not None:
+            self.metrics.observe(TIMER_SETUP, seconds, step=step)
+
+    @contextlib.contextmanager
+    def step(self, step: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(step, time.perf_counter() - started)
+
+    async def measure(self, step: str, awaitable):
+        with self.step(step):
+            return await awaitable
+
+    def format(self) -> str:
+        """``"0.42s (feed 0.05s, api 0.01s)"``."""
+        breakdown = ", ".join(f"{step} {seconds:.2f}s" for step, seconds in self.steps)
+        return f"{self.elapsed:.2f}s ({breakdown})" if breakdown else f"{self.elapsed:.2f}s"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    """Exact exposition value; ``:g`` would round counters to 6 digits."""
+    if isinstance(value, int):
+        return str(int(value))
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _line(metric: str, labels: Labels, value: float) -> str:
+    if labels:
+        rendered = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+        return f"{metric}{{{rendered}}} {_format_value(value)}"
+    return f"{metric} {_format_value(value)}"
+
+
+def recorder_samples(recorders: Dict) -> Iterable[Sample]:
+    """Frame counters and stream health of every recorder (aliases reported once)."""
+    seen = set()
+    for recorder in list(recorders.values()):
+        if id(recorder) in seen:
+            continue
+        seen.add(id(recorder))
+        labels = {"camera": recorder.camera_id}
+        yield "frames_decoded", labels, recorder.frames_decoded
+        yield "frames_dropped", labels, recorder.frames_dropped
+        yield "recorder_streaming", labels, 1 if recorder.streaming else 0
+        yield "stream_fps", labels, round(recorder.measured_fps, 2)
+        yield "stream_target_fps", labels, recorder.fps
+        yield "stream_gaps", labels, recorder.gaps
+        yield "stream_reconnects", labels, recorder.reconnects
+        yield "stream_stalls", labels, recorder.stalls
+
+
+def job_samples(jobs) -> Iterable[Sample]:
+    """Queue depth and outcome counters of every job stage."""
+    for stage in jobs.stages:
+        labels = {"stage": stage.name}
+        yield "job_queue_depth", labels, stage.depth
+        yield "jobs_completed", labels, stage.completed
+        yield "jobs_failed", labels, stage.failed
+        yield "jobs_shed", labels, stage.shed
+    yield "face_scans_skipped", {}, jobs.degraded
+
+
+# Profiler defaults: ~200 Hz and a hard stop so it is never left running.
+PROFILER_INTERVAL = 0.005
+PROFILER_MAX_SECONDS = 600.0
+PROFILER_MAX_STACKS = 20000
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler over all Python threads.
+
+    A daemon thread snapshots ``sys._current_frames()`` every ``interval``
+    seconds and counts collapsed stacks (``thread;module:function;...``), the
+    input format of flamegraph tools. Overhead is paid only while running.
+    """
+
+    def __init__(self, interval: float = PROFILER_INTERVAL):
+        self.interval = interval
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self._stacks: Dict[str, int] = collections.Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._deadline = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float = PROFILER_MAX_SECONDS, *, reset: bool = True) -> None:
+        """Start sampling for at most ``seconds``; restarting extends the run."""
+        if not math.isfinite(seconds):
+            # ``min``/``max`` pass NaN through, which would never time out.
+            seconds = PROFILER_MAX_SECONDS
+        self._deadline = time.monotonic() + min(max(seconds, 1.0), PROFILER_MAX_SECONDS)
+        if self.running:
+            return
+        if reset:
+            with self._lock:
+                self._stacks.clear()
+                self.samples = 0
+        self.started_at = time.time()
+        self.stopped_at = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ring_local_ml_profiler", daemon=True)
+        self._thread.start()
+        _LOGGER.info("Sampling profiler started")
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=1)
+        self._thread = None
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            if time.monotonic() > self._deadline:
+                break
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            sampled = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    parts.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+                    frame = frame.f_back
+                parts.append(names.get(ident, str(ident)))
+                sampled.append(";".join(reversed(parts)))
+            with self._lock:
+                self.samples += 1
+                for stack in sampled:
+                    if stack in self._stacks or len(self._stacks) < PROFILER_MAX_STACKS:
+                        self._stacks[stack] += 1
+        self.stopped_at = time.time()
+        _LOGGER.info("Sampling profiler stopped after %s samples", self.samples)
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, one ``stack count`` line each, busiest first."""
+        with self._lock:
+            stacks = sorted(self._stacks.items(), key=lambda item: item[1], reverse=True)
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def top(self, limit: int = 25) -> List[Dict[str, object]]:
+        """Functions by samples on top of a stack (self) and anywhere (total)."""
+        own: Dict[str, int] = collections.Counter()
+        total: Dict[str, int] = collections.Counter()
+        with self._lock:
+            stacks = list(self._stacks.items())
+        for stack, count in stacks:
+            frames = stack.split(";")[1:]
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for function in set(frames):
+                total[function] += count
+        return [
+            {"function": function, "self": own[function], "total": total[function]}
+            for function, _ in sorted(total.items(), key=lambda item: (own[item[0]], item[1]), reverse=True)[:limit]
+        ]
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "interval": self.interval,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+            "seconds_left": round(max(0.0, self._deadline - time.monotonic()), 1) if self.running else 0.0,
+        }
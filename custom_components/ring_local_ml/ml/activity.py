@@ -0,0 +1,165 @@
+"""Per-clip motion activity index.
+
+Each clip is summarised as one motion score per second plus a coarse
+``GRID_COLS`` x ``GRID_ROWS`` grid: for every second, a 64-bit mask of the
+cells that moved, and for every cell the strongest motion seen in the clip.
+Scores are single bytes, so a 15 second clip's index is about 200 bytes,
+and searches by zone, intensity and time run against it without decoding
+any video.
+"""
+
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+GRID_COLS = 8
+GRID_ROWS = 8
+# Frames compared per second of video; more adds cost, not information.
+SAMPLE_FPS = 5.0
+# Every DOWNSCALE-th pixel in each direction is compared.
+DOWNSCALE = 4
+PIXEL_THRESHOLD = 20
+# A cell counts as moving when this fraction of its pixels changed.
+CELL_ACTIVE_FRACTION = 0.02
+# Fraction of pixels changed that maps to the top score (255).
+SCORE_FULL_SCALE = 0.25
+MAX_SCORE = 255
+
+
+def _quantize(fraction: float) -> int:
+    return min(MAX_SCORE, int(round(fraction / SCORE_FULL_SCALE * MAX_SCORE)))
+
+
+def zone_mask(x0: float, y0: float, x1: float, y1: float) -> int:
+    """Cells overlapping the rectangle given in fractions of the frame (0-1)."""
+    if not (0 <= x0 < x1 <= 1 and 0 <= y0 < y1 <= 1):
+        raise ValueError("zone must satisfy 0 <= x0 < x1 <= 1 and 0 <= y0 < y1 <= 1")
+    mask = 0
+    for row in range(GRID_ROWS):
+        if (row + 1) / GRID_ROWS <= y0 or row / GRID_ROWS >= y1:
+            continue
+        for col in range(GRID_COLS):
+            if (col + 1) / GRID_COLS <= x0 or col / GRID_COLS >= x1:
+                continue
+            mask |= 1 << (row * GRID_COLS + col)
+    return mask
+
+
+@dataclass
+class ActivityIndex:
+    """Motion summary of one clip; see the module docstring."""
+
+    scores: bytes
+    masks: List[int]
+    grid: bytes
+
+    @property
+    def seconds(self) -> int:
+        return len(self.scores)
+
+    @property
+    def peak(self) -> int:
+        return max(self.scores, default=0)
+
+    @property
+    def active_cells(self) -> int:
+        combined = 0
+        for mask in self.masks:
+            combined |= mask
+        return combined
+
+    def pack_masks(self) -> bytes:
+        return struct.pack(f"<{len(self.masks)}Q", *self.masks)
+
+    @classmethod
+    def from_row(cls, row) -> "ActivityIndex":
+        masks_blob = row["masks"]
+        return cls(
+            scores=bytes(row["scores"]),
+            masks=list(struct.unpack(f"<{len(masks_blob) // 8}Q", masks_blob)),
+            grid=bytes(row["grid"]),
+        )
+
+    def matching_seconds(self, zone: Optional[int] = None, min_score: int = 0) -> List[int]:
+        """Seconds with at least ``min_score`` motion, inside ``zone`` if given.
+
+        With a zone, the per-second score is the whole frame's, so a second
+        matches when the zone moved and the frame as a whole was busy enough.
+        """
+        return [
+            second
+            for second, (score, mask) in enumerate(zip(self.scores, self.masks))
+            if score >= min_score and mask and (zone is None or mask & zone)
+        ]
+
+    def to_dict(self) -> Dict:
+        return {
+            "seconds": self.seconds,
+            "peak": round(self.peak / MAX_SCORE, 3),
+            "scores": [round(score / MAX_SCORE, 3) for score in self.scores],
+            "grid": [
+                [round(self.grid[row * GRID_COLS + col] / MAX_SCORE, 3) for col in range(GRID_COLS)]
+                for row in range(GRID_ROWS)
+            ],
+            # Cell numbers are row * GRID_COLS + col.
+            "active_cells": [[cell for cell in range(GRID_COLS * GRID_ROWS) if mask >> cell & 1] for mask in self.masks],
+        }
+
+
+class ActivityAccumulator:
+    """Build an ``ActivityIndex`` from frames fed one at a time."""
+
+    def __init__(self, sample_fps: float = SAMPLE_FPS):
+        self._interval = 1.0 / sample_fps if sample_fps else 0.0
+        self._previous = None
+        self._last_sampled: Optional[float] = None
+        self._scores: List[float] = []
+        self._masks: List[int] = []
+        self._grid = None
+
+    def add(self, frame, seconds: float) -> None:
+        import numpy as np
+
+        if self._last_sampled is not None and seconds - self._last_sampled < self._interval:
+            return
+        self._last_sampled = seconds
+        small = frame[::DOWNSCALE, ::DOWNSCALE]
+        # Crop to a whole number of cells so the grid reshape is exact.
+        rows = small.shape[0] - small.shape[0] % GRID_ROWS
+        cols = small.shape[1] - small.shape[1] % GRID_COLS
+        if not rows or not cols:
+            return
+        gray = small[:rows, :cols].mean(axis=2, dtype=np.float32)
+        previous, self._previous = self._previous, gray
+        if previous is None or previous.shape != gray.shape:
+            return
+
+        changed = np.abs(gray - previous) > PIXEL_THRESHOLD
+        cells = changed.reshape(GRID_ROWS, rows // GRID_ROWS, GRID_COLS, cols // GRID_COLS).mean(axis=(1, 3))
+        second = int(seconds)
+        while len(self._scores) <= second:
+            self._scores.append(0.0)
+            self._masks.append(0)
+        self._scores[second] = max(self._scores[second], float(changed.mean()))
+        active = np.packbits((cells >= CELL_ACTIVE_FRACTION).ravel(), bitorder="little")
+        self._masks[second] |= int(active.view("<u8")[0])
+        self._grid = cells if self._grid is None else np.maximum(self._grid, cells)
+
+    def result(self) -> Optional[ActivityIndex]:
+        if self._grid is None:
+            return None
+        return ActivityIndex(
+            scores=bytes(_quantize(score) for score in self._scores),
+            masks=list(self._masks),
+            grid=bytes(_quantize(float(value)) for value in self._grid.ravel()),
+        )
+
+
+def build_activity_index(frames: Sequence, fps: float) -> Optional[ActivityIndex]:
+    """Index a clip's frames (as kept in memory by the pipeline) at ``fps``."""
+    accumulator = ActivityAccumulator()
+    for index, frame in enumerate(frames):
+        accumulator.add(frame, index / fps)
+    return accumulator.result()
@@ -6,6 +6,10 @@ class Detector:
         self.motion_detector = MotionDetector(min_area=motion_min_area)
         self.face_detector = FaceDetector(cascade_path=face_cascade_path)
 
+    def warm_up(self):
+        """Load the face model now instead of on the first detection (blocking)."""
+        return self.face_detector.load() is not None
+
     def detect(self, frame, detect_motion=True, detect_faces=True, min_face_confidence=0.5):
         motion_detected = False
         face_detected = False
@@ -1,10 +1,17 @@
 import logging
 import os
+import threading
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class FaceDetector:
+    """Haar cascade face detector.
+
+    OpenCV and the cascade are loaded on first use (or by ``load``), not in
+    the constructor, so creating a detector during setup is free.
+    """
+
     def __init__(self, cascade_path='haarcascade_frontalface_default.xml'):
         # Allow absolute or packaged relative paths; warn if cascade fails to load
         if not os.path.isabs(cascade_path):
@@ -13,33 +20,50 @@ class FaceDetector:
             local_path = os.path.join(here, cascade_path)
             if os.path.exists(local_path):
                 cascade_path = local_path
+        self.cascade_path = cascade_path
+        self._cascade = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+
+    @property
+    def face_cascade(self):
+        return self.load()
+
+    def load(self):
+        """Load OpenCV and the cascade once; returns the cascade or None."""
+        if self._loaded:
+            return self._cascade
+        with self._load_lock:
+            if not self._loaded:
+                self._cascade = self._load_cascade()
+                self._loaded = True
+        return self._cascade
 
+    def _load_cascade(self):
         try:
             import cv2
         except Exception:
             _LOGGER.warning("OpenCV not available; face detection disabled for %s", self.__class__.__name__)
-            self.face_cascade = None
-            return
+            return None
 
-        self.face_cascade = cv2.CascadeClassifier(cascade_path)
-        if self.face_cascade is None or getattr(self.face_cascade, 'empty', lambda: False)():
+        cascade = cv2.CascadeClassifier(self.cascade_path)
+        if cascade is None or getattr(cascade, 'empty', lambda: False)():
             _LOGGER.warning(
                 "Failed to load face cascade from path '%s' — face detection will be disabled",
-                cascade_path,
+                self.cascade_path,
             )
+            return None
+        return cascade
 
     def detect(self, frame, min_confidence=0.5):
-        if not self.face_cascade:
+        face_cascade = self.load()
+        if not face_cascade:
             return False, []
 
-        try:
-            import cv2
-        except Exception:
-            _LOGGER.debug("OpenCV still unavailable; skipping face detection")
-            return False, []
+        import cv2
 
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
+        faces = face_cascade.detectMultiScale(gray, 1.1, 4)
 
         face_detected = len(faces) > 0
         return face_detected, faces
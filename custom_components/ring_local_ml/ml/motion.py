@@ -1,6 +1,3 @@
-import numpy as np
-
-
 class MotionDetector:
     """Simple frame differencing detector implemented with NumPy only."""
 
@@ -11,6 +8,8 @@ class MotionDetector:
         self._background = None
 
     def detect(self, frame):
+        import numpy as np
+
         if frame is None:
             return False, None
 
@@ -0,0 +1,209 @@
+"""Process pool for face detection, fed through shared memory.
+
+Running the Haar cascade in a thread inside Home Assistant competes with the
+event loop for the GIL. ``MLWorkerPool`` runs it in separate processes that
+load the cascade once at start-up. Frames are copied into a ``SharedMemory``
+block and workers receive only its name and shape, so frames are never
+pickled. The block holds one batch of at most ``batch_bytes``, not the whole
+clip: Docker gives containers a 64 MB ``/dev/shm`` by default, and a clip
+usually has its face in the first few seconds anyway.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Optional, Sequence
+
+_LOGGER = logging.getLogger(__name__)
+
+MAX_WORKERS = 4
+# Shared memory per scan; the detect stage may run one scan per worker.
+DEFAULT_BATCH_BYTES = 16 * 1024 * 1024
+
+# Per-process state, set by ``_init_worker``.
+_FACE_DETECTOR = None
+
+
+def default_worker_count() -> int:
+    """Leave one core for Home Assistant itself."""
+    return max(1, min(MAX_WORKERS, (os.cpu_count() or 2) - 1))
+
+
+def _init_worker(cascade_path: Optional[str]) -> None:
+    global _FACE_DETECTOR
+    from .face import FaceDetector
+
+    if cascade_path:
+        _FACE_DETECTOR = FaceDetector(cascade_path=cascade_path)
+    else:
+        _FACE_DETECTOR = FaceDetector()
+    _FACE_DETECTOR.load()
+
+
+def _ready() -> bool:
+    return _FACE_DETECTOR is not None
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers the attach with the resource
+        # tracker. Pool workers share the parent's tracker, where the block
+        # is already registered, so this is harmless; the parent unlinks it.
+        return shared_memory.SharedMemory(name=name)
+
+
+def _first_face(name: str, shape, start: int, stop: int) -> int:
+    """Return the index of the first frame in ``[start, stop)`` with a face, or -1."""
+    import numpy as np
+
+    shm = _attach(name)
+    try:
+        frames = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        found_at = -1
+        for index in range(start, stop):
+            found, _ = _FACE_DETECTOR.detect(frames[index])
+            if found:
+                found_at = index
+                break
+        # Drop the view before closing or the buffer is still exported.
+        del frames
+        return found_at
+    finally:
+        shm.close()
+
+
+class MLWorkerPool:
+    """Face detection on a pool of processes sized to the host's cores."""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        *,
+        cascade_path: Optional[str] = None,
+        batch_bytes: int = DEFAULT_BATCH_BYTES,
+    ):
+        self.workers = workers or default_worker_count()
+        self.cascade_path = cascade_path
+        self.batch_bytes = batch_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.scans = 0
+        self.frames = 0
+        # Set when a worker died; scans then run in-process until restart.
+        self.broken = False
+
+    def start(self) -> None:
+        if self._executor is not None or self.broken:
+            return
+        # Never fork the Home Assistant process.
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.cascade_path,),
+        )
+
+    def warm_up(self) -> bool:
+        """Spawn the worker processes and load their models now (blocking).
+
+        The executor only spawns processes on the first submit, which would
+        otherwise put process start-up and cascade loading on the first
+        clip's face scan.
+        """
+        if self._executor is None:
+            return False
+        try:
+            futures = [self._executor.submit(_ready) for _ in range(self.workers)]
+            return all(future.result() for future in futures)
+        except BrokenProcessPool:
+            self._mark_broken()
+            raise
+
+    def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def _mark_broken(self) -> None:
+        if not self.broken:
+            _LOGGER.warning("An ML worker process died; face detection continues in-process")
+        self.broken = True
+        self.stop()
+
+    def find_first_face(self, frames: Sequence) -> Optional[int]:
+        """Return the index of the first frame containing a face, or None.
+
+        Blocks the calling (worker) thread. Frames are scanned in batches
+        that fit ``batch_bytes``, each split into one contiguous chunk per
+        process; the earliest hit wins and later batches are skipped.
+        """
+        import numpy as np
+
+        if not frames:
+            return None
+        executor = self._executor
+        if executor is None:
+            raise RuntimeError("ML worker pool is not running")
+        first_shape = frames[0].shape
+        if any(frame.shape != first_shape for frame in frames):
+            raise ValueError("frames must share one shape")
+
+        frame_bytes = max(1, math.prod(first_shape))
+        batch = max(1, min(len(frames), self.batch_bytes // frame_bytes))
+        shm = shared_memory.SharedMemory(create=True, size=batch * frame_bytes)
+        scanned = 0
+        found = None
+        try:
+            block = np.ndarray((batch, *first_shape), dtype=np.uint8, buffer=shm.buf)
+            try:
+                for offset in range(0, len(frames), batch):
+                    count = min(batch, len(frames) - offset)
+                    for index in range(count):
+                        block[index] = frames[offset + index]
+                    chunk = math.ceil(count / self.workers)
+                    futures = [
+                        executor.submit(_first_face, shm.name, block.shape, start, min(start + chunk, count))
+                        for start in range(0, count, chunk)
+                    ]
+                    hits = [index for index in (future.result() for future in futures) if index >= 0]
+                    scanned += count
+                    if hits:
+                        found = offset + min(hits)
+                        break
+            finally:
+                # Drop the view before closing or the buffer is still exported.
+                del block
+        except BrokenProcessPool:
+            self._mark_broken()
+            raise
+        finally:
+            shm.close()
+            shm.unlink()
+        self.scans += 1
+        self.frames += scanned
+        return found
+
+
+def find_first_face(pool: Optional[MLWorkerPool], detector, frames: Sequence) -> Optional[int]:
+    """Use ``pool`` when it is running, else ``detector`` in the calling thread."""
+    if pool is not None and pool.running:
+        try:
+            return pool.find_first_face(frames)
+        except (BrokenProcessPool, OSError, RuntimeError, ValueError) as err:
+            _LOGGER.warning("ML worker pool unavailable (%s); detecting in-process", err)
+    for index, frame in enumerate(frames):
+        _, face = detector.detect(frame, detect_motion=False, detect_faces=True)
+        if face:
+            return index
+    return None
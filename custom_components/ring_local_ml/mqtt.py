@@ -1,11 +1,23 @@
 """MQTT helpers for Ring topic parsing."""
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Optional
 
 SUPPORTED_RING_CATEGORIES = {"camera"}
 
+# Topic suffixes whose ON message triggers a clip, and the event type it records.
+EVENT_TRIGGER_SUFFIXES = {
+    "motion/state": "motion",
+    "ding/state": "ding",
+}
+SNAPSHOT_IMAGE_SUFFIX = "snapshot/image"
+
+_UNSET = object()
+_JSON_LITERALS = {"true": True, "false": False, "null": None}
+
 
 @dataclass(frozen=True)
 class RingTopic:
@@ -17,10 +29,16 @@ class RingTopic:
     device_id: str
     topic_suffix: str
     entity: str
+    last_segment: str = ""
 
 
+@lru_cache(maxsize=2048)
 def parse_ring_topic(topic: str) -> Optional[RingTopic]:
-    """Break down a `ring/<location>/<category>/<device>/...` topic."""
+    """Break down a `ring/<location>/<category>/<device>/...` topic.
+
+    Ring-MQTT republishes the same few topics per device over and over, so
+    results are cached; ``RingTopic`` is immutable which makes that safe.
+    """
 
     if not topic:
         return None
@@ -41,4 +59,92 @@ def parse_ring_topic(topic: str) -> Optional[RingTopic]:
         device_id=device_id,
         topic_suffix=suffix,
         entity=entity,
+        last_segment=suffix_parts[-1] if suffix_parts else "",
     )
+
+
+def decode_payload(payload) -> str:
+    """Return a safe string representation of an MQTT payload."""
+    if isinstance(payload, (bytes, bytearray)):
+        try:
+            return payload.decode("utf-8")
+        except UnicodeDecodeError:
+            return payload.decode("utf-8", "ignore")
+    return str(payload)
+
+
+def parse_payload_value(text: Optional[str]) -> Any:
+    """Parse payload text into a Python value, skipping JSON for plain scalars.
+
+    Returns ``None`` for empty payloads, the decoded JSON value for objects,
+    arrays, strings, numbers and literals, and the stripped text otherwise.
+    """
+    if text is None:
+        return None
+    stripped = text.strip()
+    if not stripped:
+        return None
+
+    first = stripped[0]
+    if first in "{[\"" or first == "-" or first.isdigit():
+        try:
+            return json.loads(stripped)
+        except ValueError:
+            return stripped
+    literal = _JSON_LITERALS.get(stripped, _UNSET)
+    if literal is not _UNSET:
+        return literal
+    # "ON", "idle", "online", ... are never valid JSON; skip the parser.
+    return stripped
+
+
+class ParsedMessage:
+    """One MQTT message, decoded and parsed at most once.
+
+    Handlers share this object instead of re-decoding and re-parsing the
+    payload; ``text`` and ``value`` are computed lazily on first access.
+    """
+
+    __slots__ = ("topic", "payload", "_text", "_value")
+
+    def __init__(self, topic: RingTopic, payload):
+        self.topic = topic
+        self.payload = payload
+        self._text = _UNSET
+        self._value = _UNSET
+
+    @property
+    def text(self) -> str:
+        if self._text is _UNSET:
+            self._text = decode_payload(self.payload)
+        return self._text
+
+    @property
+    def value(self) -> Any:
+        if self._value is _UNSET:
+            self._value = parse_payload_value(self.text)
+        return self._value
+
+
+_NEGATIVE_STRINGS = {"false", "off", "idle", "inactive", "0", "standby", "clear"}
+
+
+def _value_truthy(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() not in _NEGATIVE_STRINGS
+    return bool(value)
+
+
+def payload_is_active(parsed) -> bool:
+    """Determine whether a parsed payload signifies an active motion/ding event."""
+
+    if parsed is None:
+        return False
+
+    if isinstance(parsed, dict):
+        for key in ("state", "value", "event", "active", "level"):
+            if key in parsed:
+                return _value_truthy(parsed[key])
+        return True
+
+    return _value_truthy(parsed)
@@ -0,0 +1,310 @@
+"""Event pipeline that turns motion/ding triggers into clips and DB rows.
+
+The pipeline has no Home Assistant dependency. Blocking work runs on the
+dedicated, bounded stages of a ``JobScheduler`` rather than on the loop's
+default executor, which inside HA is shared with every other integration.
+Every stage reports its timing to a ``PipelineMetrics``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .feed import FEED_CLIP_READY, FEED_EVENT_EXTENDED, FEED_EVENT_OPEN, FEED_SNAPSHOT_READY
+from .jobs import EVENT_PRIORITIES, PRIORITY_NORMAL, JobScheduler, JobShed
+from .metrics import (
+    COUNTER_CLIPS,
+    COUNTER_FRAMES_SCANNED,
+    TIMER_ACTIVITY,
+    TIMER_DB_COMMIT,
+    TIMER_DETECT,
+    TIMER_DETECT_FRAME,
+    TIMER_ENCODE,
+    TIMER_EVENT_TO_CLIP,
+    TIMER_EVENT_WAIT,
+    TIMER_PREVIEWS,
+    TIMER_SNAPSHOT_WRITE,
+    PipelineMetrics,
+)
+from .ml.activity import build_activity_index
+from .ml.workers import find_first_face
+from .storage.db import record_event, update_event
+from .storage.filesystem import create_media_paths, get_clip_path, get_snapshot_path
+from .storage.thumbnails import write_clip_previews
+
+_LOGGER = logging.getLogger(__name__)
+
+PRE_EVENT_SECONDS = 5
+POST_EVENT_SECONDS = 10
+CLIP_FPS = 20
+# Extra seconds kept in each recorder buffer beyond pre + post roll; this is
+# also how far a repeated trigger can extend an open event.
+BUFFER_SLACK_SECONDS = 5
+
+
+def _save_snapshot(path: str, frame):
+    import numpy as np
+    from PIL import Image
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    rgb_frame = frame[:, :, ::-1]
+    image = Image.fromarray(rgb_frame.astype(np.uint8))
+    image.save(path)
+
+
+@dataclass
+class OpenEvent:
+    """An event whose post-roll window has not elapsed yet."""
+
+    key: str
+    camera_id: str
+    event_type: str
+    started: float
+    deadline: float
+    extensions: int = 0
+    data: Dict = field(default_factory=dict)
+    # Wall clock at the end of the post-roll, in the frame buffer's time
+    # base; the clip window is cut back from here, not from encode time.
+    ended_at: Optional[dt.datetime] = None
+
+
+@dataclass
+class EncodedClip:
+    """Output of the encode stage handed to persist and detect."""
+
+    media_path: str
+    clip_path: str
+    frames: List
+    duration: int
+    previews: Optional[object] = None
+    activity: Optional[object] = None
+    clip_bytes: Optional[int] = None
+
+
+class EventPipeline:
+    """Record a clip, previews and face snapshot for each Ring event."""
+
+    def __init__(
+        self,
+        recorders,
+        detector,
+        media_dir: str,
+        media_db: str,
+        *,
+        thumbnail_cache=None,
+        feed=None,
+        encode_options=None,
+        jobs: Optional[JobScheduler] = None,
+        ml_pool=None,
+        metrics: Optional[PipelineMetrics] = None,
+        pre_event_seconds: int = PRE_EVENT_SECONDS,
+        post_event_seconds: int = POST_EVENT_SECONDS,
+        fps: int = CLIP_FPS,
+    ):
+        self.recorders = recorders
+        self.detector = detector
+        self.media_dir = media_dir
+        self.media_db = media_db
+        self.thumbnail_cache = thumbnail_cache
+        self.feed = feed
+        self.encode_options = encode_options or {}
+        self.metrics = metrics or PipelineMetrics()
+        self.jobs = jobs or JobScheduler(metrics=self.metrics)
+        self.ml_pool = ml_pool
+        self.pre_event_seconds = pre_event_seconds
+        self.post_event_seconds = post_event_seconds
+        self.fps = fps
+        self.open_events: Dict[Tuple[str, str], OpenEvent] = {}
+
+    @property
+    def buffer_seconds(self) -> int:
+        return self.pre_event_seconds + self.post_event_seconds + BUFFER_SLACK_SECONDS
+
+    @property
+    def min_buffer_seconds(self) -> int:
+        """Shortest buffer that still holds a full post-roll (pre-roll is sacrificed)."""
+        return self.post_event_seconds + BUFFER_SLACK_SECONDS
+
+    def _publish(self, kind: str, event: OpenEvent, **data) -> None:
+        if self.feed is not None:
+            self.feed.publish(kind, event.camera_id, event_key=event.key, event_type=event.event_type, **data)
+
+    async def handle_mqtt_message(self, camera_id: str, event_type: str) -> None:
+        """Handle a motion/ding trigger that should produce a clip.
+
+        A repeated trigger while the event is still open extends its
+        post-roll instead of producing an overlapping clip.
+        """
+        recorder = self.recorders.get(camera_id)
+        if not recorder:
+            return
+
+        # Opens (or keeps open) the stream of an on-demand camera.
+        recorder.request_stream(self.post_event_seconds + BUFFER_SLACK_SECONDS)
+
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        key = (camera_id, event_type)
+        event = self.open_events.get(key)
+        if event is not None:
+            latest = event.started + self.post_event_seconds + BUFFER_SLACK_SECONDS
+            event.deadline = min(now + self.post_event_seconds, latest)
+            event.extensions += 1
+            self._publish(FEED_EVENT_EXTENDED, event, extensions=event.extensions)
+            return
+
+        event = OpenEvent(
+            key=f"{camera_id}-{event_type}-{int(time.time() * 1000)}",
+            camera_id=camera_id,
+            event_type=event_type,
+            started=now,
+            deadline=now + self.post_event_seconds,
+        )
+        self.open_events[key] = event
+        self._publish(FEED_EVENT_OPEN, event)
+        try:
+            while (remaining := event.deadline - loop.time()) > 0:
+                await asyncio.sleep(remaining)
+        finally:
+            self.open_events.pop(key, None)
+
+        event.ended_at = dt.datetime.now()
+        post_seconds = loop.time() - event.started
+        self.metrics.observe(TIMER_EVENT_WAIT, post_seconds, camera=event.camera_id)
+        await self._process_event(event, recorder, post_seconds)
+
+    async def _process_event(self, event: OpenEvent, recorder, post_seconds: float) -> None:
+        """Run the encode, persist and detect stages for a closed event."""
+        priority = EVENT_PRIORITIES.get(event.event_type, PRIORITY_NORMAL)
+        try:
+            clip = await self.jobs.encode.submit(self._encode_clip, event, recorder, post_seconds, priority=priority)
+            if clip is None:
+                return
+            event_id = await self.jobs.persist.submit(self._persist_clip, event, clip, priority=priority)
+        except JobShed as err:
+            _LOGGER.warning("Dropped %s clip for %s under load: %s", event.event_type, event.camera_id, err)
+            return
+        except Exception as e:
+            _LOGGER.exception("Error during save and detect: %s", e)
+            return
+
+        previews = clip.previews
+        self.metrics.inc(COUNTER_CLIPS, camera=event.camera_id)
+        self.metrics.observe(
+            TIMER_EVENT_TO_CLIP, asyncio.get_running_loop().time() - event.started, camera=event.camera_id
+        )
+        self._publish(
+            FEED_CLIP_READY,
+            event,
+            event_id=event_id,
+            duration=clip.duration,
+            has_thumbnail=bool(previews and previews.thumbnail_path),
+        )
+
+        if self.jobs.detect.saturated:
+            # The clip is safe; the face scan is the optional part.
+            self.jobs.degraded += 1
+            _LOGGER.debug("Detect stage backed up; skipping face scan for %s", event.key)
+            return
+        try:
+            snapshot_path = await self.jobs.detect.submit(self._scan_faces, event, clip.frames, priority=priority)
+            if snapshot_path is None:
+                return
+            await self.jobs.persist.submit(self._persist_face, event, event_id, snapshot_path, priority=priority)
+        except JobShed:
+            self.jobs.degraded += 1
+            return
+        except Exception as e:
+            _LOGGER.exception("Error during face detection: %s", e)
+            return
+        self._publish(FEED_SNAPSHOT_READY, event, event_id=event_id, face_detected=True)
+
+    def _encode_clip(self, event: OpenEvent, recorder, post_seconds: float) -> Optional[EncodedClip]:
+        media_path = create_media_paths(self.media_dir, event.camera_id)
+        clip_path = get_clip_path(media_path, event.event_type)
+        clip_frames = recorder.clip_frames(self.pre_event_seconds, post_seconds, end=event.ended_at)
+        # The memory governor may have lowered this recorder's frame rate.
+        fps = recorder.fps or self.fps
+        with self.metrics.timer(TIMER_ENCODE, camera=event.camera_id):
+            recorder.save_clip(
+                clip_path,
+                self.pre_event_seconds,
+                post_seconds,
+                fps,
+                frames=clip_frames,
+                **self.encode_options,
+            )
+        try:
+            with self.metrics.timer(TIMER_PREVIEWS, camera=event.camera_id):
+                previews = write_clip_previews(clip_frames, clip_path, fps)
+        except Exception:
+            _LOGGER.exception("Failed to write previews for %s", clip_path)
+            previews = None
+        if previews and self.thumbnail_cache is not None:
+            self.thumbnail_cache.prime(previews)
+        try:
+            clip_bytes = os.path.getsize(clip_path)
+        except OSError:
+            clip_bytes = None
+        try:
+            with self.metrics.timer(TIMER_ACTIVITY, camera=event.camera_id):
+                activity = build_activity_index(clip_frames, fps)
+        except Exception:
+            _LOGGER.exception("Failed to index motion activity for %s", clip_path)
+            activity = None
+        return EncodedClip(
+            media_path=media_path,
+            clip_path=clip_path,
+            frames=clip_frames,
+            duration=int(round(self.pre_event_seconds + post_seconds)),
+            previews=previews,
+            activity=activity,
+            clip_bytes=clip_bytes,
+        )
+
+    def _persist_clip(self, event: OpenEvent, clip: EncodedClip) -> int:
+        previews = clip.previews
+        with self.metrics.timer(TIMER_DB_COMMIT, camera=event.camera_id):
+            event_id = record_event(
+                self.media_db,
+                camera_id=event.camera_id,
+                event_type=event.event_type,
+                clip_path=clip.clip_path,
+                snapshot_path=None,
+                face_detected=False,
+                duration=clip.duration,
+                thumbnail_path=previews.thumbnail_path if previews else None,
+                sprite_path=previews.sprite_path if previews else None,
+                sprite_meta=previews.sprite_meta if previews else None,
+                clip_bytes=clip.clip_bytes,
+                activity=clip.activity,
+            )
+        return event_id
+
+    def _persist_face(self, event: OpenEvent, event_id: int, snapshot_path: str) -> None:
+        with self.metrics.timer(TIMER_DB_COMMIT, camera=event.camera_id):
+            update_event(self.media_db, event_id, snapshot_path=snapshot_path, face_detected=True)
+
+    def _scan_faces(self, event: OpenEvent, frames) -> Optional[str]:
+        """Save a snapshot of the first frame with a face; return its path."""
+        started = time.perf_counter()
+        index = find_first_face(self.ml_pool, self.detector, frames)
+        elapsed = time.perf_counter() - started
+        scanned = len(frames) if index is None else index + 1
+        self.metrics.observe(TIMER_DETECT, elapsed, camera=event.camera_id, source="clip")
+        if scanned:
+            self.metrics.observe(TIMER_DETECT_FRAME, elapsed / scanned, camera=event.camera_id)
+            self.metrics.inc(COUNTER_FRAMES_SCANNED, scanned, camera=event.camera_id)
+        if index is None:
+            return None
+        media_path = create_media_paths(self.media_dir, event.camera_id)
+        snapshot_path = get_snapshot_path(media_path, f"{event.event_type}_face")
+        with self.metrics.timer(TIMER_SNAPSHOT_WRITE, camera=event.camera_id):
+            _save_snapshot(snapshot_path, frames[index])
+        return snapshot_path
@@ -0,0 +1,423 @@
+"""Batch re-analysis of archived clips.
+
+When detection improves, ``ClipReanalyzer`` runs the current detector over
+the clips already in the media directory and updates their ``events`` rows
+and face snapshots in place. Clips are decoded strided (a couple of frames
+per second, or keyframes only) and scanned in a niced, spawn-context process
+pool, so neither decoding nor detection runs in the Home Assistant process.
+Clips recorded before the motion activity index existed get one from the
+same frames.
+
+Progress is checkpointed to ``reanalysis.json`` next to the database after
+every clip, so a run interrupted by a restart or ``stop`` resumes where it
+left off. New clips are not starved: the run pauses while the host's own
+(non-niced) CPU use is high or the persist stage is backed up.
+
+This module has no Home Assistant dependency.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import datetime as dt
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from .feed import FEED_EVENT_UPDATED
+from .jobs import PRIORITY_LOW, JobShed
+from .ml.activity import ActivityAccumulator
+from .ml.workers import default_worker_count
+from .storage.db import count_clip_events, list_clip_events, max_event_id, record_activity, update_event
+
+_LOGGER = logging.getLogger(__name__)
+
+CHECKPOINT_FILENAME = "reanalysis.json"
+DEFAULT_SAMPLE_FPS = 2.0
+PAGE_SIZE = 100
+# Pause while non-niced CPU use is above this fraction of all cores.
+DEFAULT_MAX_BUSY = 0.6
+THROTTLE_POLL_SECONDS = 2.0
+# Shortest window over which CPU use is measured.
+MIN_SAMPLE_SECONDS = 0.5
+WORKER_NICENESS = 19
+
+STATE_IDLE = "idle"
+STATE_RUNNING = "running"
+STATE_THROTTLED = "throttled"
+STATE_DONE = "done"
+STATE_STOPPED = "stopped"
+STATE_FAILED = "failed"
+
+# Per-process state, set by ``_init_worker``.
+_DETECTOR = None
+
+
+def _init_worker(cascade_path: Optional[str]) -> None:
+    global _DETECTOR
+    from .ml.detector import Detector
+
+    try:
+        os.nice(WORKER_NICENESS)
+    except (AttributeError, OSError):
+        pass
+    _DETECTOR = Detector(face_cascade_path=cascade_path) if cascade_path else Detector()
+    _DETECTOR.warm_up()
+
+
+def _write_snapshot(path: str, frame) -> None:
+    from PIL import Image
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    Image.fromarray(frame[:, :, ::-1]).save(tmp_path, format="JPEG")
+    os.replace(tmp_path, path)
+
+
+def _analyze_clip(clip_path: str, snapshot_path: str, sample_fps: float, keyframes_only: bool) -> Dict[str, Any]:
+    """Scan one clip in a worker; write ``snapshot_path`` on the first face.
+
+    In strided mode every decoded frame also feeds the clip's motion
+    activity index; keyframes carry no reliable timing, so they do not.
+    """
+    import ffmpeg
+
+    from .recorder.ffmpeg_wrapper import ClipReader
+
+    frames = 0
+    face = False
+    activity = None if keyframes_only else ActivityAccumulator(sample_fps=None)
+    started = time.perf_counter()
+    try:
+        with ClipReader(clip_path, sample_fps=sample_fps, keyframes_only=keyframes_only) as reader:
+            for frame in reader:
+                if activity is not None:
+                    activity.add(frame, frames / sample_fps)
+                frames += 1
+                if not face:
+                    _, face = _DETECTOR.detect(frame, detect_motion=False, detect_faces=True)
+                    if face:
+                        _write_snapshot(snapshot_path, frame)
+                        if activity is None:
+                            break
+    except (ffmpeg.Error, OSError, StopIteration, KeyError, ValueError) as err:
+        return {"error": str(err) or err.__class__.__name__, "frames": frames}
+    if not frames:
+        return {"error": "no frames decoded", "frames": 0}
+    return {
+        "face": face,
+        "frames": frames,
+        "activity": activity.result() if activity is not None else None,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def face_snapshot_path(clip_path: str) -> str:
+    """``<ts>_<type>.mp4`` -> ``<ts>_<type>_face.jpg``, as the pipeline names them."""
+    return f"{os.path.splitext(clip_path)[0]}_face.jpg"
+
+
+class CpuSampler:
+    """Fraction of all cores busy with non-niced work, from ``/proc/stat``."""
+
+    def __init__(self):
+        self._last: Optional[Tuple[float, int, int]] = None
+        self._busy = 0.0
+
+    @staticmethod
+    def _read() -> Optional[Tuple[int, int]]:
+        try:
+            with open("/proc/stat", encoding="ascii") as handle:
+                fields = [int(value) for value in handle.readline().split()[1:9]]
+        except (OSError, ValueError):
+            return None
+        # user nice system idle iowait irq softirq steal; niced time is our
+        # own workers (and anything else that asked to run in the background).
+        user, _nice, system, _idle, _iowait, irq, softirq, steal = (fields + [0] * 8)[:8]
+        return user + system + irq + softirq + steal, sum(fields)
+
+    def busy_fraction(self) -> Optional[float]:
+        now = time.monotonic()
+        if self._last is not None and now - self._last[0] < MIN_SAMPLE_SECONDS:
+            return self._busy
+        sample = self._read()
+        if sample is None:
+            return None
+        if self._last is not None:
+            _, last_busy, last_total = self._last
+            elapsed = sample[1] - last_total
+            if elapsed > 0:
+                self._busy = (sample[0] - last_busy) / elapsed
+        self._last = (now, *sample)
+        return self._busy
+
+
+class ClipReanalyzer:
+    """Re-run face detection over archived clips with checkpoints and throttling."""
+
+    def __init__(
+        self,
+        media_dir: str,
+        media_db: str,
+        *,
+        cascade_path: Optional[str] = None,
+        workers: Optional[int] = None,
+        sample_fps: float = DEFAULT_SAMPLE_FPS,
+        keyframes_only: bool = False,
+        max_busy: float = DEFAULT_MAX_BUSY,
+        jobs=None,
+        feed=None,
+    ):
+        self.media_dir = media_dir
+        self.media_db = media_db
+        self.cascade_path = cascade_path
+        self.workers = workers or default_worker_count()
+        self.sample_fps = sample_fps
+        self.keyframes_only = keyframes_only
+        self.max_busy = max_busy
+        self.jobs = jobs
+        self.feed = feed
+        self.checkpoint_path = os.path.join(os.path.dirname(media_db) or ".", CHECKPOINT_FILENAME)
+        self.state = STATE_IDLE
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._progress: Dict[str, Any] = {}
+        self._started: Optional[float] = None
+        self._session_done = 0
+        self._throttled_seconds = 0.0
+        self._cpu = CpuSampler()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, *, camera_id: Optional[str] = None, restart: bool = False) -> bool:
+        """Start (or resume) a run; returns False if one is already running.
+
+        An unfinished run for the same camera filter is resumed from its
+        checkpoint unless ``restart`` is set.
+        """
+        if self.running:
+            return False
+        self.last_error = None
+        self._task = asyncio.get_running_loop().create_task(self._run(camera_id, restart))
+        return True
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def status(self) -> Dict[str, Any]:
+        progress = self._progress
+        total = progress.get("total", 0)
+        processed = progress.get("processed", 0)
+        rate = None
+        eta = None
+        if self._started is not None and self._session_done:
+            elapsed = time.monotonic() - self._started
+            rate = self._session_done / elapsed * 60
+            if self.running and rate:
+                eta = round((total - processed) / rate * 60)
+        return {
+            "state": self.state,
+            "camera_id": progress.get("camera_id"),
+            "total": total,
+            "processed": processed,
+            "percent": round(100 * processed / total, 1) if total else None,
+            "faces_found": progress.get("faces_found", 0),
+            "faces_removed": progress.get("faces_removed", 0),
+            "errors": progress.get("errors", 0),
+            "last_event_id": progress.get("last_id"),
+            "clips_per_minute": round(rate, 1) if rate is not None else None,
+            "eta_seconds": eta,
+            "throttled_seconds": round(self._throttled_seconds, 1),
+            "sample_fps": None if self.keyframes_only else self.sample_fps,
+            "keyframes_only": self.keyframes_only,
+            "workers": self.workers,
+            "last_error": self.last_error,
+        }
+
+    async def _run(self, camera_id: Optional[str], restart: bool) -> None:
+        loop = asyncio.get_running_loop()
+        checkpoint = None if restart else await loop.run_in_executor(None, self._read_checkpoint)
+        if checkpoint and not checkpoint.get("completed") and checkpoint.get("camera_id") == camera_id:
+            progress = checkpoint
+            _LOGGER.info("Resuming clip re-analysis after event %s", progress["last_id"])
+        else:
+            progress = {
+                "camera_id": camera_id,
+                "last_id": 0,
+                # Clips recorded after the run starts already use the
+                # current detector.
+                "until_id": await loop.run_in_executor(None, max_event_id, self.media_db),
+                "processed": 0,
+                "faces_found": 0,
+                "faces_removed": 0,
+                "errors": 0,
+                "completed": False,
+            }
+        progress["total"] = progress["processed"] + await loop.run_in_executor(
+            None,
+            lambda: count_clip_events(
+                self.media_db, after_id=progress["last_id"], until_id=progress["until_id"], camera_id=camera_id
+            ),
+        )
+        self._progress = progress
+        self._started = time.monotonic()
+        self._session_done = 0
+        self._throttled_seconds = 0.0
+        self.state = STATE_RUNNING
+
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.cascade_path,),
+        )
+        in_flight: Deque[Tuple[Any, str, asyncio.Future]] = collections.deque()
+        try:
+            after_id = progress["last_id"]
+            while True:
+                rows = await loop.run_in_executor(
+                    None,
+                    lambda: list_clip_events(
+                        self.media_db,
+                        after_id=after_id,
+                        until_id=progress["until_id"],
+                        camera_id=camera_id,
+                        limit=PAGE_SIZE,
+                    ),
+                )
+                if not rows:
+                    break
+                for row in rows:
+                    await self._wait_until_idle()
+                    snapshot_path = row["snapshot_path"] or face_snapshot_path(row["clip_path"])
+                    future = loop.run_in_executor(
+                        executor,
+                        _analyze_clip,
+                        row["clip_path"],
+                        snapshot_path,
+                        self.sample_fps,
+                        self.keyframes_only,
+                    )
+                    in_flight.append((row, snapshot_path, future))
+                    # Results are applied in id order so the checkpoint
+                    # never skips a clip that has not been handled.
+                    while len(in_flight) >= self.workers * 2:
+                        await self._finish(*in_flight.popleft())
+                after_id = rows[-1]["id"]
+            while in_flight:
+                await self._finish(*in_flight.popleft())
+            progress["completed"] = True
+            await loop.run_in_executor(None, self._write_checkpoint, dict(progress))
+            self.state = STATE_DONE
+            _LOGGER.info(
+                "Clip re-analysis finished: %s clips, %s faces found, %s removed, %s errors",
+                progress["processed"],
+                progress["faces_found"],
+                progress["faces_removed"],
+                progress["errors"],
+            )
+        except asyncio.CancelledError:
+            self.state = STATE_STOPPED
+            raise
+        except Exception as err:  # the run is resumable; report and stop
+            _LOGGER.exception("Clip re-analysis failed")
+            self.state = STATE_FAILED
+            self.last_error = str(err)
+        finally:
+            for _, _, future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _wait_until_idle(self) -> None:
+        while True:
+            busy = self._cpu.busy_fraction()
+            persist_backed_up = self.jobs is not None and self.jobs.persist.saturated
+            if not persist_backed_up and (busy is None or busy <= self.max_busy):
+                self.state = STATE_RUNNING
+                return
+            self.state = STATE_THROTTLED
+            await asyncio.sleep(THROTTLE_POLL_SECONDS)
+            self._throttled_seconds += THROTTLE_POLL_SECONDS
+
+    async def _finish(self, row, snapshot_path: str, future: asyncio.Future) -> None:
+        result = await future
+        progress = self._progress
+        if "error" in result:
+            progress["errors"] += 1
+            _LOGGER.debug("Re-analysis skipped event %s (%s): %s", row["id"], row["clip_path"], result["error"])
+        else:
+            change = await self._persist(self._apply, row, snapshot_path, result["face"], result["activity"])
+            if change == "found":
+                progress["faces_found"] += 1
+            elif change == "removed":
+                progress["faces_removed"] += 1
+            if change and self.feed is not None:
+                self.feed.publish(
+                    FEED_EVENT_UPDATED,
+                    row["camera_id"],
+                    event_id=row["id"],
+                    event_type=row["event_type"],
+                    face_detected=result["face"],
+                    source="reanalysis",
+                )
+        progress["processed"] += 1
+        progress["last_id"] = row["id"]
+        self._session_done += 1
+        await asyncio.get_running_loop().run_in_executor(None, self._write_checkpoint, dict(progress))
+
+    async def _persist(self, func, *args):
+        """Run a DB write on the shared persist stage, behind live clips."""
+        if self.jobs is None:
+            return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+        while True:
+            try:
+                return await self.jobs.persist.submit(func, *args, priority=PRIORITY_LOW)
+            except JobShed:
+                await asyncio.sleep(THROTTLE_POLL_SECONDS)
+
+    def _apply(self, row, snapshot_path: str, face: bool, activity) -> Optional[str]:
+        """Update the row for the new result; return 'found', 'removed' or None."""
+        if activity is not None:
+            # An index built by the live pipeline saw every frame; keep it.
+            record_activity(self.media_db, row["id"], activity, replace=False)
+        had_face = bool(row["face_detected"])
+        if face:
+            # The worker already (over)wrote the snapshot in place.
+            if had_face and row["snapshot_path"] == snapshot_path:
+                return None
+            update_event(self.media_db, row["id"], face_detected=True, snapshot_path=snapshot_path)
+            return None if had_face else "found"
+        if not had_face and not row["snapshot_path"]:
+            return None
+        update_event(self.media_db, row["id"], face_detected=False, snapshot_path=None)
+        if row["snapshot_path"]:
+            try:
+                os.remove(row["snapshot_path"])
+            except OSError:
+                pass
+        return "removed" if had_face else None
+
+    def _read_checkpoint(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        return data if isinstance(data, dict) and "last_id" in data else None
+
+    def _write_checkpoint(self, progress: Dict[str, Any]) -> None:
+        progress["updated"] = dt.datetime.utcnow().isoformat()
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(progress, handle)
+        os.replace(tmp_path, self.checkpoint_path)
@@ -2,22 +2,42 @@ import collections
 import datetime
 
 class CircularBuffer:
-    def __init__(self, size_seconds):
+    def __init__(self, size_seconds, max_bytes=None):
         self.size_seconds = size_seconds
+        # Optional hard cap on the bytes held, enforced on top of the time
+        # window; set by the frame memory governor.
+        self.max_bytes = max_bytes
         self.buffer = collections.deque()
+        # Monotonic count of frames ever added; lets consumers tell whether
+        # the newest frame changed without comparing arrays.
+        self.sequence = 0
+        self.nbytes = 0
 
     def add(self, frame, timestamp):
         self.buffer.append((frame, timestamp))
+        self.sequence += 1
+        self.nbytes += frame.nbytes
         self.trim()
 
     def trim(self):
         now = datetime.datetime.now()
         while self.buffer:
             frame, timestamp = self.buffer[0]
-            if (now - timestamp).total_seconds() > self.size_seconds:
+            too_old = (now - timestamp).total_seconds() > self.size_seconds
+            too_big = self.max_bytes is not None and self.nbytes > self.max_bytes and len(self.buffer) > 1
+            if too_old or too_big:
                 self.buffer.popleft()
+                self.nbytes -= frame.nbytes
             else:
                 break
 
     def get_all(self):
         return list(self.buffer)
+
+    def latest(self):
+        """Return ``(sequence, frame, timestamp)`` for the newest frame, or None."""
+        try:
+            frame, timestamp = self.buffer[-1]
+        except IndexError:
+            return None
+        return self.sequence, frame, timestamp
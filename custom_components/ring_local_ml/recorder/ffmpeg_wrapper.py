@@ -1,4 +1,24 @@
-def save_clip(frames, output_path, fps):
+import logging
+import shutil
+
+_LOGGER = logging.getLogger(__name__)
+
+CONTAINER_FRAGMENTED = "fragmented"
+CONTAINER_FASTSTART = "faststart"
+
+# Faststart produces a regular MP4 whose moov (the full sample index) is
+# moved to the front when the encode finishes, which seeks best. Fragmented
+# output writes an empty moov up front and a moof per keyframe, so a player
+# can start on a partial download of a finished clip. Clips are only written
+# once the post-roll has ended, so neither is served while still growing.
+_MOVFLAGS = {
+    CONTAINER_FRAGMENTED: "frag_keyframe+empty_moov+default_base_moof",
+    CONTAINER_FASTSTART: "+faststart",
+}
+
+
+def save_clip(frames, output_path, fps, *, keyframe_interval=2.0, container=CONTAINER_FASTSTART):
+    """Encode a finished clip's BGR frames into an MP4 in one ffmpeg run."""
     if not frames:
         return
 
@@ -8,25 +28,211 @@ def save_clip(frames, output_path, fps):
     except Exception:
         # If ffmpeg or numpy are not available, log and return silently; callers
         # should handle the absence of an output file.
-        try:
-            import logging
-            _LOGGER = logging.getLogger(__name__)
-            _LOGGER.exception("ffmpeg or numpy not available; cannot save clip %s", output_path)
-        except Exception:
-            pass
+        _LOGGER.exception("ffmpeg or numpy not available; cannot save clip %s", output_path)
         return
 
+    if container not in _MOVFLAGS:
+        _LOGGER.warning("Unknown clip container '%s'; using %s", container, CONTAINER_FASTSTART)
+        container = CONTAINER_FASTSTART
+
     height, width, _ = frames[0].shape
+    gop = max(1, int(round(fps * keyframe_interval)))
     process = (
         ffmpeg
         .input('pipe:', format='rawvideo', pix_fmt='bgr24', s=f'{width}x{height}', r=fps)
-        .output(output_path, pix_fmt='yuv420p')
+        .output(
+            output_path,
+            format='mp4',
+            vcodec='libx264',
+            pix_fmt='yuv420p',
+            g=gop,
+            keyint_min=gop,
+            sc_threshold=0,
+            movflags=_MOVFLAGS[container],
+        )
         .overwrite_output()
+        .global_args('-loglevel', 'error')
         .run_async(pipe_stdin=True)
     )
+    try:
+        for frame in frames:
+            process.stdin.write(np.ascontiguousarray(frame, dtype=np.uint8).tobytes())
+    finally:
+        try:
+            process.stdin.close()
+        finally:
+            process.wait()
+
+
+# Background ffmpeg runs (summaries, tiering) get the lowest CPU priority so
+# they never slow down live recording.
+BACKGROUND_NICENESS = 19
+
+
+def background_cmd(*, idle_io=False):
+    """``cmd`` for ffmpeg-python that runs ffmpeg under ``nice`` when available.
+
+    With ``idle_io`` ffmpeg is also put in the idle I/O class, so its disk
+    reads and writes only get time the recorders do not want.
+    """
+    cmd = ["ffmpeg"]
+    nice = shutil.which("nice")
+    if nice:
+        cmd = [nice, "-n", str(BACKGROUND_NICENESS), *cmd]
+    ionice = shutil.which("ionice") if idle_io else None
+    if ionice:
+        cmd = [ionice, "-c", "3", *cmd]
+    return cmd
+
+
+def probe_video(path):
+    """Return ``(width, height, duration)`` of the first video stream; duration may be None."""
+    import ffmpeg
+
+    info = ffmpeg.probe(path)
+    stream = next(s for s in info["streams"] if s.get("codec_type") == "video")
+    duration = stream.get("duration") or info.get("format", {}).get("duration")
+    return int(stream["width"]), int(stream["height"]), float(duration) if duration else None
+
+
+def _x264_options(fps, keyframe_interval):
+    gop = max(1, int(round(fps * keyframe_interval)))
+    return {"vcodec": "libx264", "pix_fmt": "yuv420p", "g": gop, "keyint_min": gop, "sc_threshold": 0}
+
+
+def cut_segment(src, dst, start, duration, *, size=None, fps=None, keyframe_interval=2.0):
+    """Write ``duration`` seconds of ``src`` from ``start`` as an MPEG-TS segment.
+
+    Without ``size`` the video is stream-copied, so the cut snaps back to the
+    keyframe at or before ``start``. With ``size`` (``(width, height)``) it
+    is re-encoded and scaled, for segments that must match a summary whose
+    resolution differs from the clip's.
+    """
+    import ffmpeg
+
+    node = ffmpeg.input(src, ss=max(0.0, start), t=duration)
+    if size is None:
+        output = node.output(dst, format="mpegts", vcodec="copy", an=None)
+    else:
+        output = node.filter("scale", size[0], size[1]).output(
+            dst, format="mpegts", an=None, **_x264_options(fps or 20, keyframe_interval)
+        )
+    output.overwrite_output().global_args("-loglevel", "error").run(cmd=background_cmd(), capture_stderr=True)
+
+
+def timelapse_segment(src, dst, fps, size, *, keyframe_interval=2.0):
+    """Encode only the keyframes of ``src`` at ``fps`` into an MPEG-TS segment of ``size``.
+
+    Non-key frames are skipped by the decoder, which makes this a fraction
+    of the cost of decoding the clip.
+    """
+    import ffmpeg
+
+    (
+        ffmpeg
+        .input(src, skip_frame="nokey")
+        .filter("setpts", f"N/({fps}*TB)")
+        .filter("scale", size[0], size[1])
+        .output(dst, format="mpegts", r=fps, an=None, **_x264_options(fps, keyframe_interval))
+        .overwrite_output()
+        .global_args("-loglevel", "error")
+        .run(cmd=background_cmd(), capture_stderr=True)
+    )
+
+
+def reencode_clip(src, dst, *, crf, height=None, threads=1, keyframe_interval=2.0):
+    """Re-encode ``src`` into a faststart MP4 at ``crf``, scaled down to ``height`` if given.
+
+    Runs niced in the idle I/O class with ``threads`` encoder threads, so an
+    archive pass never competes with live recording.
+    """
+    import ffmpeg
+
+    node = ffmpeg.input(src, threads=threads)
+    if height:
+        # -2 keeps the aspect ratio with an even width.
+        node = node.filter("scale", -2, height)
+    (
+        node
+        .output(
+            dst,
+            format="mp4",
+            vcodec="libx264",
+            pix_fmt="yuv420p",
+            crf=crf,
+            threads=threads,
+            force_key_frames=f"expr:gte(t,n_forced*{keyframe_interval})",
+            movflags="+faststart",
+            an=None,
+        )
+        .overwrite_output()
+        .global_args("-loglevel", "error")
+        .run(cmd=background_cmd(idle_io=True), capture_stderr=True)
+    )
+
+
+def concat_segments(list_path, dst):
+    """Stream-copy the segments named in a concat list file into a faststart MP4."""
+    import ffmpeg
+
+    (
+        ffmpeg
+        .input(list_path, format="concat", safe=0)
+        .output(dst, format="mp4", vcodec="copy", movflags="+faststart")
+        .overwrite_output()
+        .global_args("-loglevel", "error")
+        .run(cmd=background_cmd(), capture_stderr=True)
+    )
+
+
+class ClipReader:
+    """Decode a clip into BGR frames one at a time.
+
+    ``sample_fps`` keeps only that many frames per second (the fps filter
+    still decodes every frame); ``keyframes_only`` skips decoding everything
+    but keyframes, which for our clips means one frame per keyframe
+    interval at a fraction of the cost.
+    """
+
+    def __init__(self, path, *, sample_fps=None, keyframes_only=False):
+        import ffmpeg
+
+        self.width, self.height, _ = probe_video(path)
+        if keyframes_only:
+            node = ffmpeg.input(path, skip_frame="nokey")
+            output_options = {"vsync": "passthrough"}
+        else:
+            node = ffmpeg.input(path)
+            if sample_fps:
+                node = node.filter("fps", fps=sample_fps)
+            output_options = {}
+        self._process = (
+            node
+            .output("pipe:", format="rawvideo", pix_fmt="bgr24", **output_options)
+            .global_args("-loglevel", "error")
+            .run_async(pipe_stdout=True)
+        )
+
+    def __iter__(self):
+        import numpy as np
+
+        frame_size = self.width * self.height * 3
+        while True:
+            data = self._process.stdout.read(frame_size)
+            if len(data) < frame_size:
+                return
+            yield np.frombuffer(data, np.uint8).reshape((self.height, self.width, 3))
+
+    def close(self):
+        # Stopping early (e.g. on the first face) must not leave ffmpeg
+        # blocked on a full pipe.
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.stdout.close()
+        self._process.wait()
 
-    for frame in frames:
-        process.stdin.write(frame.astype(np.uint8).tobytes())
+    def __enter__(self):
+        return self
 
-    process.stdin.close()
-    process.wait()
+    def __exit__(self, *exc_info):
+        self.close()
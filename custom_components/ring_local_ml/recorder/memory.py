@@ -0,0 +1,158 @@
+"""Global budget for the raw frames held in recorder buffers.
+
+Each recorder keeps ``buffer_seconds * fps * width * height * 3`` bytes of
+raw frames, and nothing else bounds the total as cameras are added. The
+``FrameMemoryGovernor`` splits one budget across recorders. When the full
+quality profiles do not fit, it steps the lowest priority cameras down a
+quality ladder: shorter pre-roll first, then a lower frame rate, then a
+lower resolution. Every buffer also gets a hard byte cap matching its
+allocation, so a camera that delivers more frames than expected cannot
+exceed its share.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_BUDGET_MB = 512
+
+PRIORITY_HIGH = "high"
+PRIORITY_NORMAL = "normal"
+PRIORITY_LOW = "low"
+PRIORITIES = [PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW]
+_PRIORITY_RANK = {PRIORITY_HIGH: 0, PRIORITY_NORMAL: 1, PRIORITY_LOW: 2}
+
+# Resolutions tried after the recorder's own, largest first.
+RESOLUTION_STEPS = [(480, 270), (320, 180)]
+MIN_FPS = 5
+# Headroom over the nominal allocation for the hard byte cap.
+CAP_SLACK = 1.1
+
+
+@dataclass(frozen=True)
+class FrameProfile:
+    width: int
+    height: int
+    fps: int
+    buffer_seconds: float
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.width * self.height * 3 * self.fps * self.buffer_seconds)
+
+
+def quality_ladder(base: FrameProfile, min_buffer_seconds: float) -> List[FrameProfile]:
+    """Profiles from ``base`` down to the cheapest one, in degradation order."""
+    ladder = [base]
+    current = base
+    if min_buffer_seconds < current.buffer_seconds:
+        current = FrameProfile(current.width, current.height, current.fps, min_buffer_seconds)
+        ladder.append(current)
+    fps = current.fps
+    while fps // 2 >= MIN_FPS:
+        fps //= 2
+        current = FrameProfile(current.width, current.height, fps, current.buffer_seconds)
+        ladder.append(current)
+    for width, height in RESOLUTION_STEPS:
+        if width * height < current.width * current.height:
+            current = FrameProfile(width, height, current.fps, current.buffer_seconds)
+            ladder.append(current)
+    return ladder
+
+
+@dataclass
+class _Allocation:
+    recorder: object
+    priority: str
+    ladder: List[FrameProfile]
+    level: int = 0
+
+    @property
+    def profile(self) -> FrameProfile:
+        return self.ladder[self.level]
+
+
+class FrameMemoryGovernor:
+    """Allocate a frame memory budget across recorders by priority."""
+
+    def __init__(self, budget_bytes: int, *, min_buffer_seconds: float):
+        self.budget_bytes = budget_bytes
+        self.min_buffer_seconds = min_buffer_seconds
+        self._allocations: Dict[str, _Allocation] = {}
+
+    def register(self, recorder, priority: str = PRIORITY_NORMAL) -> None:
+        base = FrameProfile(recorder.width, recorder.height, recorder.fps, recorder.buffer.size_seconds)
+        self._allocations[recorder.camera_id] = _Allocation(
+            recorder=recorder,
+            priority=priority if priority in _PRIORITY_RANK else PRIORITY_NORMAL,
+            ladder=quality_ladder(base, min(self.min_buffer_seconds, base.buffer_seconds)),
+        )
+        self.rebalance()
+
+    def unregister(self, camera_id: str) -> None:
+        if self._allocations.pop(camera_id, None) is not None:
+            self.rebalance()
+
+    @property
+    def allocated_bytes(self) -> int:
+        return sum(allocation.profile.nbytes for allocation in self._allocations.values())
+
+    def rebalance(self) -> None:
+        """Pick the best profile per recorder that keeps the total in budget."""
+        for allocation in self._allocations.values():
+            allocation.level = 0
+        total = self.allocated_bytes
+        while total > self.budget_bytes:
+            candidates = [a for a in self._allocations.values() if a.level < len(a.ladder) - 1]
+            if not candidates:
+                _LOGGER.warning(
+                    "Frame memory budget of %d MB is too small for %d cameras even at the lowest quality",
+                    self.budget_bytes // (1024 * 1024),
+                    len(self._allocations),
+                )
+                break
+            # Degrade the least important camera first; among equals, the
+            # one currently using the most memory.
+            victim = max(candidates, key=lambda a: (_PRIORITY_RANK[a.priority], a.profile.nbytes))
+            total -= victim.profile.nbytes
+            victim.level += 1
+            total += victim.profile.nbytes
+
+        for camera_id, allocation in self._allocations.items():
+            profile = allocation.profile
+            if allocation.level:
+                _LOGGER.info(
+                    "Camera %s degraded to %dx%d@%d with %.0fs buffer to fit the frame memory budget",
+                    camera_id,
+                    profile.width,
+                    profile.height,
+                    profile.fps,
+                    profile.buffer_seconds,
+                )
+            allocation.recorder.apply_profile(
+                width=profile.width,
+                height=profile.height,
+                fps=profile.fps,
+                buffer_seconds=profile.buffer_seconds,
+                max_bytes=int(profile.nbytes * CAP_SLACK),
+            )
+
+    def usage(self, camera_id: str) -> Optional[Tuple[int, Dict]]:
+        """Return ``(bytes_in_use, details)`` for a camera, or None if unknown."""
+        allocation = self._allocations.get(camera_id)
+        if allocation is None:
+            return None
+        profile = allocation.profile
+        return allocation.recorder.buffer.nbytes, {
+            "allocated_bytes": profile.nbytes,
+            "priority": allocation.priority,
+            "degradation_level": allocation.level,
+            "width": profile.width,
+            "height": profile.height,
+            "fps": profile.fps,
+            "buffer_seconds": profile.buffer_seconds,
+        }
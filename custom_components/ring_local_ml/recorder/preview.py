@@ -0,0 +1,79 @@
+"""Live JPEG previews built from a recorder's newest buffered frame.
+
+Each frame is encoded at most once no matter how many viewers are watching;
+concurrent requests for the same frame await the same encode. Viewers never
+open extra RTSP sessions because everything comes from the existing buffer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+from typing import Optional, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+PREVIEW_JPEG_QUALITY = 70
+
+
+def encode_preview_jpeg(frame, quality: int = PREVIEW_JPEG_QUALITY) -> bytes:
+    """Encode a BGR frame as JPEG."""
+    import numpy as np
+    from PIL import Image
+
+    rgb = np.ascontiguousarray(frame[:, :, ::-1], dtype=np.uint8)
+    out = io.BytesIO()
+    Image.fromarray(rgb).save(out, format="JPEG", quality=quality)
+    return out.getvalue()
+
+
+class LivePreview:
+    """Shared, lazily refreshed JPEG of a recorder's newest frame."""
+
+    def __init__(self, recorder, *, quality: int = PREVIEW_JPEG_QUALITY):
+        self.recorder = recorder
+        self.quality = quality
+        self._sequence = -1
+        self._jpeg: Optional[bytes] = None
+        self._pending: Optional[asyncio.Future] = None
+        self.encodes = 0
+
+    @property
+    def max_fps(self) -> float:
+        return float(getattr(self.recorder, "fps", 0) or 1)
+
+    async def async_get(self) -> Optional[Tuple[int, bytes]]:
+        """Return ``(sequence, jpeg)`` for the newest frame, encoding if needed."""
+        # A viewer keeps an on-demand stream warm for as long as it polls.
+        self.recorder.request_stream()
+        latest = self.recorder.buffer.latest()
+        if latest is None:
+            return None
+        sequence, frame, _ = latest
+        if sequence <= self._sequence and self._jpeg is not None:
+            return self._sequence, self._jpeg
+
+        if self._pending is None:
+            loop = asyncio.get_running_loop()
+            self._pending = loop.run_in_executor(None, self._encode, sequence, frame)
+            self._pending.add_done_callback(self._on_encoded)
+        try:
+            return await asyncio.shield(self._pending)
+        except Exception:
+            _LOGGER.debug("Failed to encode live preview for %s", self.recorder.camera_id, exc_info=True)
+            return None
+
+    def _encode(self, sequence: int, frame) -> Tuple[int, bytes]:
+        return sequence, encode_preview_jpeg(frame, self.quality)
+
+    def _on_encoded(self, future: asyncio.Future) -> None:
+        if self._pending is future:
+            self._pending = None
+        if future.cancelled() or future.exception() is not None:
+            return
+        sequence, jpeg = future.result()
+        if sequence > self._sequence:
+            self._sequence = sequence
+            self._jpeg = jpeg
+            self.encodes += 1
@@ -1,20 +1,61 @@
+import collections
 import datetime as dt
 import logging
+import os
+import random
 import threading
 import time
-from typing import Optional
-
-import ffmpeg
-import numpy as np
+from typing import Deque, Optional
 
+from ..const import DEFAULT_WARM_SECONDS
 from .buffer import CircularBuffer
 from .ffmpeg_wrapper import save_clip as save_clip_ffmpeg
 
 _LOGGER = logging.getLogger(__name__)
 
+START_LATENCY_SAMPLES = 20
+
+# Reconnect backoff doubles per consecutive failure up to the cap, with full
+# jitter so cameras behind one flaky uplink do not reconnect in lockstep. A
+# session that delivered frames for STABLE_SESSION_SECONDS resets it.
+RECONNECT_BACKOFF_BASE = 1.0
+RECONNECT_BACKOFF_MAX = 60.0
+STABLE_SESSION_SECONDS = 30.0
+# Read watchdog: a session is killed when the first frame takes longer than
+# OPEN_TIMEOUT_SECONDS or later frames stop for STALL_TIMEOUT_SECONDS.
+WATCHDOG_INTERVAL = 1.0
+OPEN_TIMEOUT_SECONDS = 20.0
+STALL_TIMEOUT_SECONDS = 5.0
+# A pause of this many frame intervals counts as a gap in the stream.
+GAP_FRAME_INTERVALS = 3
+FPS_WINDOW_SECONDS = 5.0
+# Below this fraction of the target rate the stream is reported degraded.
+DEGRADED_FPS_RATIO = 0.8
+STDERR_TAIL_LINES = 20
+
+STREAM_IDLE = "idle"
+STREAM_CONNECTING = "connecting"
+STREAM_STREAMING = "streaming"
+STREAM_OK = "ok"
+STREAM_DEGRADED = "degraded"
+STREAM_STALLED = "stalled"
+STREAM_RECONNECTING = "reconnecting"
+
+
+def _kill(process) -> None:
+    try:
+        process.kill()
+    except Exception:
+        pass
+
 
 class Recorder(threading.Thread):
-    """Background RTSP reader that maintains a rolling frame buffer."""
+    """Background RTSP reader that maintains a rolling frame buffer.
+
+    With ``on_demand`` the RTSP session is only opened while something has
+    called ``request_stream`` within the last ``warm_seconds``; this keeps
+    battery cameras from streaming to the cloud around the clock.
+    """
 
     def __init__(
         self,
@@ -25,59 +66,294 @@ class Recorder(threading.Thread):
         width: int = 640,
         height: int = 360,
         fps: int = 10,
+        on_demand: bool = False,
+        warm_seconds: float = DEFAULT_WARM_SECONDS,
     ):
         super().__init__(daemon=True)
         self.camera_id = camera_id
         self.rtsp_url = rtsp_url
         self.buffer = CircularBuffer(buffer_seconds)
+        # Buffer sequences restart at 0 per recorder; this tells instances
+        # apart (e.g. in ETags) across reloads and restarts.
+        self.instance_id = os.urandom(4).hex()
         self.width = width
         self.height = height
         self.fps = fps
         self.running = False
         self._process = None
+        self.on_demand = on_demand
+        self.warm_seconds = warm_seconds
+        self._wanted = threading.Event()
+        self._demand_until = 0.0
+        self._requested_at: Optional[float] = None
+        self.start_latencies: Deque[float] = collections.deque(maxlen=START_LATENCY_SAMPLES)
+        self.sessions = 0
+        # Frames read from ffmpeg, and frames missing from the expected rate
+        # (stalls longer than a frame interval plus truncated reads).
+        self.frames_decoded = 0
+        self.frames_dropped = 0
+        # Stream health, see ``health`` and ``health_stats``.
+        self.gaps = 0
+        self.longest_gap = 0.0
+        self.last_gap_at: Optional[float] = None
+        self.reconnects = 0
+        self.stalls = 0
+        self.backoff_seconds = 0.0
+        self.last_error: Optional[str] = None
+        self.stderr_tail: Deque[str] = collections.deque(maxlen=STDERR_TAIL_LINES)
+        self._state = STREAM_IDLE
+        self._stopped = threading.Event()
+        # Set by ``apply_profile``; the session is ended from the recorder's
+        # own threads, never from the caller's.
+        self._restart = threading.Event()
+        self._last_frame_at: Optional[float] = None
+        self._frame_times: Deque[float] = collections.deque(maxlen=int(max(fps, 30) * FPS_WINDOW_SECONDS) + 2)
+
+    @property
+    def streaming(self) -> bool:
+        """True while an ffmpeg session is open."""
+        return self._process is not None
+
+    @property
+    def last_start_latency(self) -> Optional[float]:
+        """Seconds from the request that opened the last session to its first frame."""
+        return self.start_latencies[-1] if self.start_latencies else None
+
+    def request_stream(self, hold_seconds: float = 0.0) -> None:
+        """Keep an on-demand stream open for ``hold_seconds`` plus the warm period."""
+        if not self.on_demand:
+            return
+        now = time.monotonic()
+        self._demand_until = max(self._demand_until, now + hold_seconds + self.warm_seconds)
+        if not self._wanted.is_set():
+            if self._requested_at is None:
+                self._requested_at = now
+            self._wanted.set()
+
+    def _demanded(self) -> bool:
+        if not self.on_demand:
+            return True
+        if time.monotonic() < self._demand_until:
+            return True
+        self._wanted.clear()
+        # A request may have landed between the check and the clear.
+        if time.monotonic() < self._demand_until:
+            self._wanted.set()
+            return True
+        return False
 
     def start(self):
         self.running = True
         super().start()
 
     def run(self):
+        # Imported here so loading the integration does not pay for them.
+        import ffmpeg
+        import numpy as np
+
+        failures = 0
         while self.running:
+            if not self._demanded():
+                self._state = STREAM_IDLE
+                self._wanted.wait()
+                continue
+            # Read the profile once per session; the memory governor may
+            # change it and restarts the session when it does.
+            self._restart.clear()
+            width, height, fps = self.width, self.height, self.fps
+            self._state = STREAM_CONNECTING
             try:
-                self._process = (
+                process = (
                     ffmpeg
-                    .input(self.rtsp_url, rtsp_transport="tcp")
+                    .input(self.rtsp_url, **self._input_options())
                     .output(
                         "pipe:",
                         format="rawvideo",
                         pix_fmt="rgb24",
-                        s=f"{self.width}x{self.height}",
-                        r=self.fps,
+                        s=f"{width}x{height}",
+                        r=fps,
                     )
+                    .global_args("-loglevel", "warning", "-nostats")
                     .run_async(pipe_stdout=True, pipe_stderr=True)
                 )
-            except ffmpeg.Error as err:
+            except (ffmpeg.Error, OSError) as err:
                 _LOGGER.error("FFmpeg failed to open %s: %s", self.camera_id, err)
-                time.sleep(5)
+                self.last_error = str(err)
+                failures += 1
+                self._backoff(failures)
                 continue
 
-            frame_size = self.width * self.height * 3
+            self._process = process
+            self.sessions += 1
+            session_started = time.monotonic()
+            self._last_frame_at = None
+            self._frame_times.clear()
+            # ffmpeg blocks once the stderr pipe fills up, so always drain it.
+            threading.Thread(
+                target=self._drain_stderr, args=(process,), name=f"{self.name}-stderr", daemon=True
+            ).start()
+            threading.Thread(
+                target=self._watchdog, args=(process, session_started, fps), name=f"{self.name}-watchdog", daemon=True
+            ).start()
+
+            frame_size = width * height * 3
+            first_frame = True
+            idle_close = False
 
-            while self.running:
-                in_bytes = self._process.stdout.read(frame_size)
+            while self.running and not self._restart.is_set():
+                try:
+                    in_bytes = process.stdout.read(frame_size)
+                except (OSError, ValueError) as err:
+                    # The pipe went away under us (e.g. the process was killed).
+                    _LOGGER.debug("Read from %s ended: %s", self.camera_id, err)
+                    break
                 if not in_bytes or len(in_bytes) < frame_size:
+                    if in_bytes:
+                        self.frames_dropped += 1
                     break
 
+                now = time.monotonic()
+                self._record_frame_time(now, fps)
+                self.frames_decoded += 1
+
                 frame = (
                     np
                     .frombuffer(in_bytes, np.uint8)
-                    .reshape((self.height, self.width, 3))
+                    .reshape((height, width, 3))
                 )
                 # Convert RGB to BGR to stay compatible with legacy consumers.
                 frame_bgr = frame[:, :, ::-1]
                 self.buffer.add(frame_bgr, dt.datetime.now())
+                if first_frame:
+                    first_frame = False
+                    self._state = STREAM_STREAMING
+                    if self._requested_at is not None:
+                        latency = time.monotonic() - self._requested_at
+                        self.start_latencies.append(latency)
+                        self._requested_at = None
+                        _LOGGER.debug("First frame from %s after %.2fs", self.camera_id, latency)
+                if self.on_demand and not self._demanded():
+                    _LOGGER.debug("Closing idle on-demand stream for %s", self.camera_id)
+                    idle_close = True
+                    break
 
+            if self._restart.is_set():
+                _kill(process)
             self._close_process()
-            time.sleep(2)
+            profile_changed = (width, height, fps) != (self.width, self.height, self.fps)
+            if not self.running or idle_close or profile_changed or not self._demanded():
+                failures = 0
+                continue
+
+            # The stream ended while still wanted: reconnect with backoff.
+            if self._last_frame_at is not None and self._last_frame_at - session_started >= STABLE_SESSION_SECONDS:
+                failures = 0
+            failures += 1
+            self.reconnects += 1
+            if self.stderr_tail:
+                self.last_error = self.stderr_tail[-1]
+            _LOGGER.warning(
+                "Stream from %s ended after %.0fs (%s); reconnecting",
+                self.camera_id,
+                time.monotonic() - session_started,
+                self.last_error or "no error output",
+            )
+            self._backoff(failures)
+
+    def _backoff(self, failures: int) -> None:
+        """Sleep with exponential backoff and full jitter, waking early on stop."""
+        ceiling = min(RECONNECT_BACKOFF_MAX, RECONNECT_BACKOFF_BASE * 2 ** (failures - 1))
+        delay = random.uniform(RECONNECT_BACKOFF_BASE / 2, ceiling)
+        self.backoff_seconds = round(delay, 2)
+        self._state = STREAM_RECONNECTING
+        self._stopped.wait(delay)
+        self.backoff_seconds = 0.0
+
+    def _record_frame_time(self, now: float, fps: int) -> None:
+        last = self._last_frame_at
+        if last is not None:
+            gap = now - last
+            missed = int(gap * fps - 0.5)
+            if missed > 0:
+                self.frames_dropped += missed
+            if gap * fps >= GAP_FRAME_INTERVALS:
+                self.gaps += 1
+                self.longest_gap = max(self.longest_gap, gap)
+                self.last_gap_at = time.time()
+        self._last_frame_at = now
+        self._frame_times.append(now)
+
+    def _drain_stderr(self, process) -> None:
+        try:
+            for line in iter(process.stderr.readline, b""):
+                text = line.decode("utf-8", "replace").strip()
+                if text:
+                    self.stderr_tail.append(text)
+                    _LOGGER.debug("ffmpeg %s: %s", self.camera_id, text)
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def _watchdog(self, process, session_started: float, fps: int) -> None:
+        """Kill a session whose reads have stalled, or whose profile changed, so the run loop reopens it."""
+        stall_after = max(STALL_TIMEOUT_SECONDS, GAP_FRAME_INTERVALS * 2 / max(fps, 1))
+        while self._process is process and not self._stopped.wait(WATCHDOG_INTERVAL):
+            if self._process is not process:
+                return
+            if self._restart.is_set():
+                # A read blocked on a connecting or stalled stream would
+                # otherwise only notice the new profile at the next frame.
+                _kill(process)
+                return
+            last = self._last_frame_at
+            waited = time.monotonic() - (last if last is not None else session_started)
+            limit = stall_after if last is not None else OPEN_TIMEOUT_SECONDS
+            if waited < limit:
+                continue
+            self.stalls += 1
+            self._state = STREAM_STALLED
+            _LOGGER.warning("No frames from %s for %.0fs; restarting the stream", self.camera_id, waited)
+            _kill(process)
+            return
+
+    @property
+    def measured_fps(self) -> float:
+        """Frames per second delivered over the last few seconds."""
+        times = list(self._frame_times)
+        if len(times) < 2 or time.monotonic() - times[-1] > FPS_WINDOW_SECONDS:
+            return 0.0
+        cutoff = times[-1] - FPS_WINDOW_SECONDS
+        times = [stamp for stamp in times if stamp >= cutoff]
+        if len(times) < 2 or times[-1] == times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    @property
+    def health(self) -> str:
+        """idle, connecting, ok, degraded, stalled or reconnecting."""
+        state = self._state
+        if state != STREAM_STREAMING:
+            return state
+        last = self._last_frame_at
+        waiting = last is not None and (time.monotonic() - last) * self.fps >= GAP_FRAME_INTERVALS
+        recent_gap = self.last_gap_at is not None and time.time() - self.last_gap_at < FPS_WINDOW_SECONDS * 6
+        if waiting or recent_gap or self.measured_fps < self.fps * DEGRADED_FPS_RATIO:
+            return STREAM_DEGRADED
+        return STREAM_OK
+
+    def health_stats(self) -> dict:
+        return {
+            "measured_fps": round(self.measured_fps, 1),
+            "target_fps": self.fps,
+            "frames_decoded": self.frames_decoded,
+            "frames_dropped": self.frames_dropped,
+            "gaps": self.gaps,
+            "longest_gap": round(self.longest_gap, 2),
+            "sessions": self.sessions,
+            "reconnects": self.reconnects,
+            "stalls": self.stalls,
+            "backoff_seconds": self.backoff_seconds,
+            "last_error": self.last_error,
+        }
 
     def _close_process(self):
         if self._process:
@@ -88,12 +364,51 @@ class Recorder(threading.Thread):
             self._process.wait(timeout=1)
             self._process = None
 
+    def _input_options(self):
+        if self.rtsp_url.startswith(("rtsp://", "rtsps://")):
+            return {"rtsp_transport": "tcp"}
+        # Files and test sources (used by the load harness) are read at their
+        # native rate and looped so they behave like a live camera.
+        return {"re": None, "stream_loop": -1}
+
+    def apply_profile(self, *, width: int, height: int, fps: int, buffer_seconds: float, max_bytes=None):
+        """Change capture size, rate and buffer window; restarts the session if needed.
+
+        Called from the event loop, so it only records the new profile; the
+        run loop or the watchdog ends the current session.
+        """
+        self.buffer.size_seconds = buffer_seconds
+        self.buffer.max_bytes = max_bytes
+        if (width, height, fps) == (self.width, self.height, self.fps):
+            self.buffer.trim()
+            return
+        self.width, self.height, self.fps = width, height, fps
+        self._restart.set()
+
     def stop(self):
         self.running = False
+        self._stopped.set()
+        self._wanted.set()
         self._close_process()
 
-    def save_clip(self, output_path, pre_event_seconds, post_event_seconds, fps):
+    def clip_frames(self, pre_event_seconds, post_event_seconds, end=None):
+        """Return the buffered frames that fall inside the clip window.
+
+        The window ends at ``end`` (now by default), so a clip encoded after
+        waiting in a queue still covers the event rather than the wait.
+        """
         frames_with_ts = self.buffer.get_all()
-        cutoff = dt.datetime.now() - dt.timedelta(seconds=pre_event_seconds + post_event_seconds)
-        frames = [frame for frame, ts in frames_with_ts if ts >= cutoff]
-        save_clip_ffmpeg(frames, output_path, fps)
+        if end is None:
+            end = dt.datetime.now()
+        cutoff = end - dt.timedelta(seconds=pre_event_seconds + post_event_seconds)
+        frames = [frame for frame, ts in frames_with_ts if cutoff <= ts <= end]
+        if frames:
+            # A profile change mid-window leaves frames of another size behind.
+            shape = frames[-1].shape
+            frames = [frame for frame in frames if frame.shape == shape]
+        return frames
+
+    def save_clip(self, output_path, pre_event_seconds, post_event_seconds, fps, frames=None, **encode_options):
+        if frames is None:
+            frames = self.clip_frames(pre_event_seconds, post_event_seconds)
+        save_clip_ffmpeg(frames, output_path, fps, **encode_options)
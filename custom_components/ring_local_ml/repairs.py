@@ -0,0 +1,36 @@
+"""Repair flows for Ring Local ML."""
+from __future__ import annotations
+
+import voluptuous as vol
+
+from homeassistant import data_entry_flow
+from homeassistant.components.repairs import RepairsFlow
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_API_TOKEN
+
+
+class ApiTokenRepairFlow(RepairsFlow):
+    """Show a generated media API token once, to an administrator."""
+
+    def __init__(self, entry_id: str | None):
+        self._entry_id = entry_id
+
+    async def async_step_init(self, user_input=None) -> data_entry_flow.FlowResult:
+        return await self.async_step_confirm()
+
+    async def async_step_confirm(self, user_input=None) -> data_entry_flow.FlowResult:
+        if user_input is not None:
+            return self.async_create_entry(data={})
+        entry = self.hass.config_entries.async_get_entry(self._entry_id) if self._entry_id else None
+        token = entry.data.get(CONF_API_TOKEN, "") if entry is not None else ""
+        return self.async_show_form(
+            step_id="confirm",
+            data_schema=vol.Schema({}),
+            description_placeholders={"token": token},
+        )
+
+
+async def async_create_fix_flow(hass: HomeAssistant, issue_id: str, data) -> RepairsFlow:
+    """Create the fix flow for an issue raised by this integration."""
+    return ApiTokenRepairFlow((data or {}).get("entry_id"))
@@ -1,30 +1,88 @@
 """Sensor platform for the Ring Local ML integration."""
 import asyncio
+from dataclasses import dataclass
 from datetime import datetime
 import json
 import logging
 import os
-from typing import Dict, Tuple
+import secrets
+import time
+from typing import Callable, Dict, List, Optional, Tuple
 
-import numpy as np
-from PIL import Image
 import voluptuous as vol
+from homeassistant.components import network
 from homeassistant.components.sensor import SensorEntity
+from homeassistant.const import EntityCategory
 from homeassistant.core import callback
-import homeassistant.components.mqtt as mqtt
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import issue_registry as ir
 from homeassistant.helpers.device_registry import DeviceInfo
-
-from .const import DOMAIN, CONF_MEDIA_DIR
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    CONF_MEDIA_DIR,
+    CONF_CLIP_CONTAINER,
+    CONF_KEYFRAME_INTERVAL,
+    CONF_API_CORS_ORIGINS,
+    CONF_API_HOST,
+    CONF_API_PORT,
+    CONF_API_TOKEN,
+    CONF_STREAM_MODE,
+    DEFAULT_API_HOST,
+    DEFAULT_API_PORT,
+    DEFAULT_CLIP_CONTAINER,
+    DEFAULT_KEYFRAME_INTERVAL,
+    CONF_WARM_SECONDS,
+    CONF_PRIORITY,
+    CONF_FRAME_MEMORY_MB,
+    CONF_SUMMARY_MODE,
+    CONF_TIER_AFTER_DAYS,
+    CONF_TIER_PRUNE_PREVIEWS,
+    DEFAULT_FRAME_MEMORY_MB,
+    DEFAULT_PRIORITY,
+    DEFAULT_STREAM_MODE,
+    DEFAULT_SUMMARY_MODE,
+    DEFAULT_TIER_AFTER_DAYS,
+    DEFAULT_TIER_PRUNE_PREVIEWS,
+    DEFAULT_WARM_SECONDS,
+    ISSUE_API_TOKEN_GENERATED,
+    STREAM_MODE_ON_DEMAND,
+    STREAM_MODE_SNAPSHOT,
+    SUMMARY_MODE_OFF,
+)
+from .api.server import MediaAPIServer
+from .recorder.memory import FrameMemoryGovernor
 from .recorder.recorder import Recorder
 from .ml.detector import Detector
-from .storage.db import record_event
-from .storage.filesystem import create_media_paths, get_clip_path, get_snapshot_path
-from .mqtt import parse_ring_topic, SUPPORTED_RING_CATEGORIES
-
+from .feed import EventFeed
+from .jobs import JobScheduler
+from .metrics import (
+    TIMER_DB_COMMIT,
+    TIMER_DETECT,
+    TIMER_DETECT_FRAME,
+    TIMER_ENCODE,
+    TIMER_EVENT_TO_CLIP,
+    TIMER_EVENT_WAIT,
+    TIMER_PREVIEWS,
+    TIMER_QUEUE_WAIT,
+    TIMER_SNAPSHOT_WRITE,
+    PipelineMetrics,
+    SamplingProfiler,
+    SetupTimer,
+    job_samples,
+    recorder_samples,
+)
+from .ml.workers import MLWorkerPool
+from .pipeline import CLIP_FPS, EventPipeline
+from .reanalysis import ClipReanalyzer
+from .snapshots import SnapshotIngestor
+from .summaries import DailySummaryBuilder
+from .tiering import StorageTiering
+from .storage.thumbnails import ThumbnailCache
+from .mqtt import EVENT_TRIGGER_SUFFIXES, SNAPSHOT_IMAGE_SUFFIX, ParsedMessage, payload_is_active
 
-PRE_EVENT_SECONDS = 5
-POST_EVENT_SECONDS = 10
-CLIP_FPS = 20
 
 
 def _default_camera_name(camera_id: str) -> str:
@@ -33,38 +91,6 @@ def _default_camera_name(camera_id: str) -> str:
         return f"Ring Camera {suffix}"
     return "Ring Camera"
 
-DEFAULT_TOPIC_SUFFIXES = [
-    "motion/state",
-    "motion/attributes",
-    "motion/last_motion",
-    "motion/last_motion_time",
-    "motion/person_detected",
-    "motion/detection_enabled",
-    "ding/state",
-    "ding/attributes",
-    "wireless/attributes",
-    "wireless/network",
-    "wireless/signal",
-    "battery/attributes",
-    "battery/level",
-    "battery/life",
-    "motion_detection/state",
-    "motion_warning/state",
-    "light/state",
-    "siren/state",
-    "info/state",
-    "snapshot/attributes",
-    "snapshot_interval/state",
-    "stream/state",
-    "stream/attributes",
-    "event_stream/state",
-    "event_stream/attributes",
-    "event_select/state",
-    "event_select/attributes",
-    "motion_duration/state",
-    "ding_duration/state",
-]
-
 TOPIC_LABELS = {
     "motion/state": "Motion",
     "motion/attributes": "Motion Attributes",
@@ -163,6 +189,13 @@ ATTRIBUTE_SPLITS = {
     },
 }
 
+# Minimum seconds between state writes of one mirror sensor. Changes inside
+# the window are coalesced into a single trailing write.
+WRITE_MIN_INTERVAL = 1.0
+
+MANIFEST_VERSION = 1
+MANIFEST_SAVE_DELAY = 30
+
 _LOGGER = logging.getLogger(__name__)
 
 CAMERA_SCHEMA = vol.Schema(
@@ -173,16 +206,6 @@ CAMERA_SCHEMA = vol.Schema(
 )
 
 
-def _decode_payload(payload) -> str:
-    """Return a safe string representation of an MQTT payload."""
-    if isinstance(payload, bytes):
-        try:
-            return payload.decode("utf-8")
-        except UnicodeDecodeError:
-            return payload.decode("utf-8", "ignore")
-    return str(payload)
-
-
 def _camera_display_name(camera_id: str, camera_meta: Dict[str, Dict]) -> str:
     meta = camera_meta.get(camera_id) or {}
     for key in ("name", "label", "friendly_name"):
@@ -206,26 +229,53 @@ def _default_state_for_topic(topic_suffix: str):
     return DEFAULT_ENTITY_STATE_OVERRIDES.get(base, DEFAULT_SENSOR_STATE)
 
 
-def _split_attribute_payload(camera_id: str, topic_suffix: str, payload_text: str, entity_manager):
+def _recorder_settings(camera: Dict) -> Tuple:
+    """Camera options that require the recorder to be restarted when changed."""
+    return (
+        camera.get("rtsp_url"),
+        camera.get(CONF_STREAM_MODE, DEFAULT_STREAM_MODE),
+        camera.get(CONF_WARM_SECONDS, DEFAULT_WARM_SECONDS),
+        camera.get(CONF_PRIORITY, DEFAULT_PRIORITY),
+    )
+
+
+# Stages that make up a clip's latency, in pipeline order.
+CLIP_LATENCY_STAGES = (TIMER_EVENT_WAIT, TIMER_QUEUE_WAIT, TIMER_ENCODE, TIMER_PREVIEWS, TIMER_DB_COMMIT)
+
+
+def _clip_latency(metrics: Optional[PipelineMetrics], **labels) -> Tuple[object, Dict]:
+    """p90 trigger-to-clip time with the p50 of each stage that adds to it."""
+    if metrics is None:
+        return None, {}
+    total = metrics.summary(TIMER_EVENT_TO_CLIP, **labels)
+    attrs = {"clips": total["count"], "p50": total["p50"], "max": total["max"]}
+    for stage in CLIP_LATENCY_STAGES:
+        # Queue wait is recorded per job stage, not per camera.
+        stage_labels = {} if stage == TIMER_QUEUE_WAIT else labels
+        attrs[f"{stage}_p50"] = metrics.summary(stage, **stage_labels)["p50"]
+    return (round(total["p90"], 2) if total["p90"] is not None else None), attrs
+
+
+def _timer_value(metrics: PipelineMetrics, name: str, *, scale: float = 1.0, quantile: str = "p90"):
+    summary = metrics.summary(name)
+    value = summary[quantile]
+    return (round(value * scale, 2) if value is not None else None), summary
+
+
+def _split_attribute_payload(camera_id: str, topic_suffix: str, message: ParsedMessage, entity_manager):
     mapping = ATTRIBUTE_SPLITS.get(topic_suffix)
-    if not mapping or not payload_text:
+    if not mapping:
         return
 
-    try:
-        parsed = json.loads(payload_text)
-    except (json.JSONDecodeError, TypeError):
+    parsed = message.value
+    if not isinstance(parsed, dict):
         return
 
     for key, spec in mapping.items():
         if key not in parsed:
             continue
-        suffix = spec["suffix"]
-        sensor = entity_manager.get_or_create(camera_id, suffix)
-        try:
-            child_payload = json.dumps({"state": parsed[key]}, ensure_ascii=False)
-        except (TypeError, ValueError):
-            child_payload = json.dumps({"state": str(parsed[key])})
-        sensor.handle_payload(child_payload)
+        sensor = entity_manager.get_or_create(camera_id, spec["suffix"])
+        sensor.handle_value(parsed[key])
 
 
 def _normalize_state(value):
@@ -237,20 +287,11 @@ def _normalize_state(value):
     return json.dumps(value, ensure_ascii=False)
 
 
-def _extract_state_and_attrs(text):
-    """Derive sensor state/attributes from MQTT payload text."""
-    if text is None:
+def _extract_state_and_attrs(parsed):
+    """Derive sensor state/attributes from an already parsed payload value."""
+    if parsed is None:
         return None, {}
 
-    stripped = text.strip()
-    if not stripped:
-        return None, {}
-
-    try:
-        parsed = json.loads(stripped)
-    except (json.JSONDecodeError, TypeError):
-        return stripped, {}
-
     if isinstance(parsed, dict):
         state = parsed.get("state")
         if state is None:
@@ -266,43 +307,13 @@ def _extract_state_and_attrs(text):
     return parsed, {}
 
 
-_NEGATIVE_STRINGS = {"false", "off", "idle", "inactive", "0", "standby", "clear"}
-
-
-def _payload_is_active(text: str) -> bool:
-    """Determine whether a payload signifies an active motion/ding event."""
-
-    if text is None:
-        return False
-
-    stripped = text.strip()
-    if not stripped:
-        return False
-
-    def _value_truthy(value):
-        if isinstance(value, str):
-            return value.strip().lower() not in _NEGATIVE_STRINGS
-        return bool(value)
-
-    try:
-        parsed = json.loads(stripped)
-    except (json.JSONDecodeError, TypeError):
-        return _value_truthy(stripped)
-
-    if isinstance(parsed, dict):
-        for key in ("state", "value", "event", "active", "level"):
-            if key in parsed:
-                return _value_truthy(parsed[key])
-        return True
-
-    return _value_truthy(parsed)
+@dataclass
+class WriteStats:
+    """Per-camera counters for mirror sensor state writes."""
 
-
-def _save_snapshot(path: str, frame):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    rgb_frame = frame[:, :, ::-1]
-    image = Image.fromarray(rgb_frame.astype(np.uint8))
-    image.save(path)
+    written: int = 0
+    suppressed: int = 0
+    coalesced: int = 0
 
 
 class RingLocalMQTTSensor(SensorEntity):
@@ -310,9 +321,14 @@ class RingLocalMQTTSensor(SensorEntity):
 
     _attr_should_poll = False
 
-    def __init__(self, camera_id: str, topic_suffix: str, device_name: str):
+    def __init__(self, camera_id: str, topic_suffix: str, device_name: str, write_stats: "WriteStats" = None):
         self._camera_id = camera_id
         self._topic_suffix = topic_suffix or "state"
+        self._write_stats = write_stats if write_stats is not None else WriteStats()
+        self._min_write_interval = 0.0 if self._topic_suffix in EVENT_TRIGGER_SUFFIXES else WRITE_MIN_INTERVAL
+        self._written = None
+        self._last_write = 0.0
+        self._flush_unsub = None
         slug = self._topic_suffix.replace("/", "_")
         label = _topic_label(self._topic_suffix)
         self._friendly_name = f"{device_name} {label}".strip()
@@ -322,6 +338,7 @@ class RingLocalMQTTSensor(SensorEntity):
             "camera_id": camera_id,
             "topic": self._topic_suffix,
         }
+        self._pending_attrs: Dict = self._attr_extra_state_attributes
         self._attr_native_value = _default_state_for_topic(self._topic_suffix)
         self._device_info = DeviceInfo(
             identifiers={(DOMAIN, camera_id)},
@@ -333,34 +350,98 @@ class RingLocalMQTTSensor(SensorEntity):
     def device_info(self):
         return self._device_info
 
-    def handle_payload(self, payload_text: str):
-        state, attrs = _extract_state_and_attrs(payload_text)
+    def handle_payload(self, message: ParsedMessage):
+        state, attrs = _extract_state_and_attrs(message.value)
+        self._apply_state(state, attrs, message.text)
+
+    def handle_value(self, value):
+        """Update from a value split out of another topic's attributes."""
+        self._apply_state(value, {"state": value}, None)
+
+    def _apply_state(self, state, attrs, payload_text):
         state = _normalize_state(state)
         if state is None:
             state = _default_state_for_topic(self._topic_suffix)
         metadata = {
             "camera_id": self._camera_id,
             "topic": self._topic_suffix,
-            "last_update": datetime.utcnow().isoformat(),
         }
         if attrs:
             # Merge parsed attributes with metadata for easier debugging.
-            metadata.update({k: v for k, v in attrs.items() if k not in metadata})
+            metadata.update({k: v for k, v in attrs.items() if k not in metadata and k != "last_update"})
         else:
             metadata["payload"] = payload_text
 
-        self._attr_extra_state_attributes = metadata
         self._attr_native_value = state
+        self._pending_attrs = metadata
+        if self._written == (state, metadata):
+            # Heartbeats repeat the same payload; writing them would only
+            # create recorder rows for an unchanged state.
+            self._write_stats.suppressed += 1
+            return
+        self._request_write()
+
+    def _request_write(self):
+        if self.hass is None:
+            # Not added yet; Home Assistant writes the initial state on add.
+            self._attr_extra_state_attributes = self._pending_attrs
+            return
+        wait = self._last_write + self._min_write_interval - time.monotonic()
+        if wait <= 0 and self._flush_unsub is None:
+            self._write_now()
+            return
+        self._write_stats.coalesced += 1
+        if self._flush_unsub is None:
+            self._flush_unsub = async_call_later(self.hass, max(wait, 0), self._async_flush)
+
+    @callback
+    def _async_flush(self, _now=None):
+        self._flush_unsub = None
+        if self._written == (self._attr_native_value, self._pending_attrs):
+            return
+        self._write_now()
+
+    def _write_now(self):
+        self._written = (self._attr_native_value, self._pending_attrs)
+        self._last_write = time.monotonic()
+        self._attr_extra_state_attributes = {
+            **self._pending_attrs,
+            "last_update": datetime.utcnow().isoformat(),
+        }
+        self._write_stats.written += 1
         self.async_write_ha_state()
 
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        self._written = (self._attr_native_value, self._pending_attrs)
+        self._last_write = time.monotonic()
+
+    async def async_will_remove_from_hass(self):
+        await super().async_will_remove_from_hass()
+        if self._flush_unsub is not None:
+            self._flush_unsub()
+            self._flush_unsub = None
+
 
 class RingMQTTSensorManager:
-    """Ensure one HA sensor per MQTT topic."""
+    """Ensure one HA sensor per MQTT topic.
+
+    Sensors are created lazily when their topic first publishes and handed
+    to Home Assistant in one batch per event-loop iteration. The topics seen
+    per camera are persisted so the same sensors are restored on restart
+    without waiting for Ring-MQTT to republish them.
+    """
 
-    def __init__(self, async_add_entities, camera_meta):
+    def __init__(self, hass, async_add_entities, camera_meta, store=None):
+        self._hass = hass
         self._async_add_entities = async_add_entities
         self._entities: Dict[Tuple[str, str], RingLocalMQTTSensor] = {}
         self._camera_meta = camera_meta
+        self.write_stats: Dict[str, WriteStats] = {}
+        self._pending: list = []
+        self._flush_scheduled = False
+        self._store = store
+        self._manifest: Dict[str, list] = {}
 
     def update_camera_meta(self, camera_id: str, meta: Dict):
         self._camera_meta[camera_id] = meta
@@ -368,183 +449,630 @@ class RingMQTTSensorManager:
     def get_or_create(self, camera_id: str, topic_suffix: str) -> RingLocalMQTTSensor:
         normalized = topic_suffix or "state"
         key = (camera_id, normalized)
-        if key not in self._entities:
+        entity = self._entities.get(key)
+        if entity is None:
             name = _camera_display_name(camera_id, self._camera_meta)
-            entity = RingLocalMQTTSensor(camera_id, normalized, name)
+            stats = self.write_stats.setdefault(camera_id, WriteStats())
+            entity = RingLocalMQTTSensor(camera_id, normalized, name, stats)
             self._entities[key] = entity
-            self._async_add_entities([entity])
-        return self._entities[key]
+            self._queue_add(entity)
+            self._remember(camera_id, normalized)
+        return entity
 
-    def prime_camera_topics(self, camera_id: str):
-        for suffix in DEFAULT_TOPIC_SUFFIXES:
-            self.get_or_create(camera_id, suffix)
+    def _queue_add(self, entity: RingLocalMQTTSensor):
+        self._pending.append(entity)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._hass.loop.call_soon(self._flush_pending)
 
+    @callback
+    def _flush_pending(self):
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, []
+        if pending:
+            self._async_add_entities(pending)
+
+    def _remember(self, camera_id: str, topic_suffix: str):
+        topics = self._manifest.setdefault(camera_id, [])
+        if topic_suffix in topics:
+            return
+        topics.append(topic_suffix)
+        if self._store is not None:
+            self._store.async_delay_save(lambda: self._manifest, MANIFEST_SAVE_DELAY)
 
-async def async_setup_entry(hass, entry, async_add_entities):
-    """Set up the sensor platform."""
+    async def async_restore(self, camera_ids):
+        """Recreate the sensors recorded in the topic manifest."""
+        if self._store is None:
+            return
+        data = await self._store.async_load() or {}
+        wanted = set(camera_ids)
+        for camera_id, topics in data.items():
+            if camera_id not in wanted or not isinstance(topics, list):
+                continue
+            for topic_suffix in topics:
+                self.get_or_create(camera_id, topic_suffix)
+
+    def forget_camera(self, camera_id: str):
+        """Drop a camera's sensors and manifest entry so they are not restored."""
+        for key in [key for key in self._entities if key[0] == camera_id]:
+            del self._entities[key]
+        self.write_stats.pop(camera_id, None)
+        if self._manifest.pop(camera_id, None) is not None and self._store is not None:
+            self._store.async_delay_save(lambda: self._manifest, MANIFEST_SAVE_DELAY)
+
+
+class CameraLifecycleManager:
+    """Start and stop recorders and per-camera entities as cameras change.
+
+    Option updates are applied as a diff, so adding or removing one camera
+    never restarts the recorders (and loses the pre-roll) of the others.
+    """
+
+    def __init__(
+        self,
+        hass,
+        async_add_entities,
+        entity_manager: RingMQTTSensorManager,
+        dispatcher,
+        *,
+        recorders: Dict,
+        camera_meta: Dict[str, Dict],
+        buffer_seconds: int,
+        memory: Optional[FrameMemoryGovernor] = None,
+        metrics: Optional[PipelineMetrics] = None,
+    ):
+        self.hass = hass
+        self._async_add_entities = async_add_entities
+        self.entity_manager = entity_manager
+        self.dispatcher = dispatcher
+        self.recorders = recorders
+        self.camera_meta = camera_meta
+        self.buffer_seconds = buffer_seconds
+        self.memory = memory
+        self.metrics = metrics
+        self.event_entities: Dict[str, "RingLocalMLEventSensor"] = {}
+        self._configured: Dict[str, Dict] = {}
+
+    def _build_entities(self, camera_id: str) -> list:
+        device_name = _camera_display_name(camera_id, self.camera_meta)
+        event_sensor = RingLocalMLEventSensor(camera_id, device_name)
+        self.event_entities[camera_id] = event_sensor
+        stats = self.entity_manager.write_stats.setdefault(camera_id, WriteStats())
+        return [
+            event_sensor,
+            RingLocalMLDiagnosticSensor(
+                camera_id,
+                device_name,
+                "writes_suppressed",
+                "State Writes Suppressed",
+                lambda: (stats.suppressed, {"written": stats.written, "coalesced": stats.coalesced}),
+            ),
+            RingLocalMLDiagnosticSensor(
+                camera_id,
+                device_name,
+                "stream_start_latency",
+                "Stream Start Latency",
+                lambda: self._stream_start_latency(camera_id),
+                unit="s",
+            ),
+            RingLocalMLDiagnosticSensor(
+                camera_id,
+                device_name,
+                "frame_memory",
+                "Frame Buffer Memory",
+                lambda: self._frame_memory(camera_id),
+                unit="MB",
+            ),
+            RingLocalMLDiagnosticSensor(
+                camera_id,
+                device_name,
+                "stream_health",
+                "Stream Health",
+                lambda: self._stream_health(camera_id),
+            ),
+            RingLocalMLDiagnosticSensor(
+                camera_id,
+                device_name,
+                "stream_fps",
+                "Stream FPS",
+                lambda: self._stream_fps(camera_id),
+                unit="fps",
+            ),
+            RingLocalMLDiagnosticSensor(
+                camera_id,
+                device_name,
+                "frames_dropped",
+                "Frames Dropped",
+                lambda: self._frames_dropped(camera_id),
+            ),
+            RingLocalMLDiagnosticSensor(
+                camera_id,
+                device_name,
+                "clip_latency",
+                "Clip Latency",
+                lambda: _clip_latency(self.metrics, camera=camera_id),
+                unit="s",
+            ),
+        ]
+
+    def _stream_health(self, camera_id: str) -> Tuple[object, Dict]:
+        """ok, degraded, stalled, reconnecting, connecting or idle."""
+        recorder = self.recorders.get(camera_id)
+        if recorder is None:
+            return "disabled", {}
+        return recorder.health, recorder.health_stats()
+
+    def _stream_fps(self, camera_id: str) -> Tuple[object, Dict]:
+        recorder = self.recorders.get(camera_id)
+        if recorder is None:
+            return None, {}
+        return round(recorder.measured_fps, 1), {"target_fps": recorder.fps}
+
+    def _frames_dropped(self, camera_id: str) -> Tuple[object, Dict]:
+        recorder = self.recorders.get(camera_id)
+        if recorder is None:
+            return None, {}
+        seen = recorder.frames_decoded + recorder.frames_dropped
+        return recorder.frames_dropped, {
+            "frames_decoded": recorder.frames_decoded,
+            "drop_ratio": round(recorder.frames_dropped / seen, 4) if seen else 0.0,
+            "streaming": recorder.streaming,
+        }
 
-    media_dir = entry.data[CONF_MEDIA_DIR]
-    media_db = os.path.join(media_dir, "media.db")
-    cameras = [c for c in entry.options.get("cameras", []) if c.get("id")]
-    camera_meta: Dict[str, Dict] = {c["id"]: c for c in cameras}
+    def _frame_memory(self, camera_id: str) -> Tuple[object, Dict]:
+        usage = self.memory.usage(camera_id) if self.memory is not None else None
+        if usage is None:
+            return 0, {}
+        used, details = usage
+        details = dict(details, allocated_mb=round(details.pop("allocated_bytes") / 1048576, 1))
+        return round(used / 1048576, 1), details
+
+    def _stream_start_latency(self, camera_id: str) -> Tuple[object, Dict]:
+        """Event (or viewer) to first frame for on-demand streams."""
+        recorder = self.recorders.get(camera_id)
+        if recorder is None or not recorder.start_latencies:
+            return None, {"streaming": bool(recorder and recorder.streaming)}
+        samples = sorted(recorder.start_latencies)
+        return round(recorder.last_start_latency, 2), {
+            "streaming": recorder.streaming,
+            "on_demand": recorder.on_demand,
+            "sessions": recorder.sessions,
+            "median": round(samples[len(samples) // 2], 2),
+            "max": round(samples[-1], 2),
+        }
 
-    recorders = {}
-    for camera in cameras:
+    def add_observed_device(self, camera_id: str, meta: Dict):
+        """Create entities for a device seen on MQTT that is not configured."""
+        self.camera_meta[camera_id] = meta
+        self.entity_manager.update_camera_meta(camera_id, meta)
+        self._async_add_entities(self._build_entities(camera_id))
+
+    async def async_apply(self, cameras) -> None:
+        desired = {c["id"]: dict(c) for c in cameras if c.get("id")}
+        removed = [camera_id for camera_id in self._configured if camera_id not in desired]
+        added = [camera_id for camera_id in desired if camera_id not in self._configured]
+        # Cameras discovery moved from their location id to a device id.
+        renamed = {
+            camera_id
+            for camera_id in added
+            if desired[camera_id].get("location_id") in removed
+        }
+        restarted = [
+            camera_id
+            for camera_id in desired
+            if camera_id in self._configured
+            and _recorder_settings(desired[camera_id]) != _recorder_settings(self._configured[camera_id])
+        ]
+
+        await asyncio.gather(*(self._async_stop_recorder(camera_id) for camera_id in removed + restarted))
+        for camera_id in removed:
+            self._remove_camera(camera_id)
+
+        new_entities = []
+        for camera_id in added:
+            meta = self.camera_meta.setdefault(camera_id, {})
+            meta.update(desired[camera_id])
+            self.entity_manager.update_camera_meta(camera_id, meta)
+            self.dispatcher.add_known_device(camera_id)
+            # Observed devices already have entities; renamed cameras lost
+            # theirs with the old device above.
+            if camera_id in renamed or camera_id not in self.event_entities:
+                new_entities.extend(self._build_entities(camera_id))
+        for camera_id in restarted:
+            self.camera_meta.setdefault(camera_id, {}).update(desired[camera_id])
+        if new_entities:
+            self._async_add_entities(new_entities)
+
+        await asyncio.gather(*(self._async_start_recorder(desired[camera_id]) for camera_id in added + restarted))
+        self._configured = desired
+        if added:
+            await self.entity_manager.async_restore(added)
+        if added or removed or restarted:
+            _LOGGER.info(
+                "Applied camera changes: %d added, %d removed, %d restarted, %d renamed",
+                len(added) - len(renamed),
+                len(removed) - len(renamed),
+                len(restarted),
+                len(renamed),
+            )
+
+    async def _async_start_recorder(self, camera: Dict) -> None:
         camera_id = camera["id"]
         rtsp_url = camera.get("rtsp_url")
+        stream_mode = camera.get(CONF_STREAM_MODE, DEFAULT_STREAM_MODE)
+        if stream_mode == STREAM_MODE_SNAPSHOT:
+            _LOGGER.debug("Camera %s is in snapshot mode; skipping recorder", camera_id)
+            return
         if not rtsp_url:
             _LOGGER.debug("Camera %s has no RTSP URL; skipping recorder", camera_id)
-            continue
-
-        buffer_window = PRE_EVENT_SECONDS + POST_EVENT_SECONDS + 5
+            return
         recorder = Recorder(
             camera_id,
             rtsp_url,
-            buffer_window,
+            self.buffer_seconds,
             fps=CLIP_FPS,
+            on_demand=stream_mode == STREAM_MODE_ON_DEMAND,
+            warm_seconds=float(camera.get(CONF_WARM_SECONDS, DEFAULT_WARM_SECONDS)),
+        )
+        self.recorders[camera_id] = recorder
+        if self.memory is not None:
+            self.memory.register(recorder, camera.get(CONF_PRIORITY, DEFAULT_PRIORITY))
+        await self.hass.async_add_executor_job(recorder.start)
+
+    async def _async_stop_recorder(self, camera_id: str) -> None:
+        recorder = self.recorders.get(camera_id)
+        if recorder is None:
+            return
+        # Legacy location-id aliases point at the same recorder object.
+        for key in [key for key, value in self.recorders.items() if value is recorder]:
+            del self.recorders[key]
+        if self.memory is not None:
+            self.memory.unregister(recorder.camera_id)
+        await self.hass.async_add_executor_job(recorder.stop)
+
+    def _remove_camera(self, camera_id: str) -> None:
+        self.event_entities.pop(camera_id, None)
+        self.camera_meta.pop(camera_id, None)
+        self.entity_manager.forget_camera(camera_id)
+        self.dispatcher.forget_device(camera_id)
+        registry = dr.async_get(self.hass)
+        device = registry.async_get_device(identifiers={(DOMAIN, camera_id)})
+        if device is not None:
+            # Removing the device also removes its entities.
+            registry.async_remove_device(device.id)
+
+    async def async_shutdown(self) -> None:
+        recorders = {id(recorder): recorder for recorder in self.recorders.values()}
+        self.recorders.clear()
+        await asyncio.gather(
+            *(self.hass.async_add_executor_job(recorder.stop) for recorder in recorders.values())
         )
-        recorders[camera_id] = recorder
-        await hass.async_add_executor_job(recorder.start)
 
+
+async def async_setup_entry(hass, entry, async_add_entities):
+    """Set up the sensor platform."""
+
+    media_dir = entry.data[CONF_MEDIA_DIR]
+    media_db = os.path.join(media_dir, "media.db")
+    encode_options = {
+        "container": entry.data.get(CONF_CLIP_CONTAINER, DEFAULT_CLIP_CONTAINER),
+        "keyframe_interval": entry.data.get(CONF_KEYFRAME_INTERVAL, DEFAULT_KEYFRAME_INTERVAL),
+    }
+    cameras = entry.options.get("cameras", [])
+    camera_meta: Dict[str, Dict] = {}
+
+    entry_data = hass.data.setdefault(DOMAIN, {}).setdefault(entry.entry_id, {})
+    recorders = {}
+    # Cheap to create: the face cascade loads on first use or in the
+    # background warm-up below.
     detector = Detector()
-    entity_manager = RingMQTTSensorManager(async_add_entities, camera_meta)
+    thumbnail_cache = ThumbnailCache()
+    entry_data["thumbnail_cache"] = thumbnail_cache
+
+    metrics = PipelineMetrics()
+    entry_data["metrics"] = metrics
+    setup = SetupTimer(metrics)
+    profiler = SamplingProfiler()
+    entry_data["profiler"] = profiler
+    entry.async_on_unload(profiler.stop)
+
+    feed = EventFeed(media_db)
+    entry_data["feed"] = feed
+    entry.async_on_unload(feed.async_stop)
+
+    # Worker processes are spawned by the warm-up task, not here.
+    ml_pool = MLWorkerPool()
+    try:
+        ml_pool.start()
+    except (OSError, ValueError):
+        _LOGGER.warning("Could not start ML worker processes; detecting in-process", exc_info=True)
+    else:
+        entry_data["ml_pool"] = ml_pool
+        entry.async_on_unload(ml_pool.stop)
+
+    # One detect worker per ML process keeps every process busy.
+    jobs = JobScheduler(detect_workers=ml_pool.workers, metrics=metrics)
+    entry_data["jobs"] = jobs
+    entry.async_on_unload(jobs.async_stop)
+
+    # Idle until started through the media API.
+    reanalyzer = ClipReanalyzer(media_dir, media_db, jobs=jobs, feed=feed)
+    entry_data["reanalysis"] = reanalyzer
+    entry.async_on_unload(reanalyzer.stop)
+
+    summaries = None
+    summary_mode = entry.data.get(CONF_SUMMARY_MODE, DEFAULT_SUMMARY_MODE)
+    if summary_mode != SUMMARY_MODE_OFF:
+        summaries = DailySummaryBuilder(
+            media_dir,
+            media_db,
+            mode=summary_mode,
+            keyframe_interval=encode_options["keyframe_interval"],
+            jobs=jobs,
+            feed=feed,
+            metrics=metrics,
+        )
+        entry_data["summaries"] = summaries
+        entry.async_on_unload(summaries.stop)
+
+    # Idle unless clips are set to be archived after some days.
+    tiering = StorageTiering(
+        media_db,
+        after_days=entry.data.get(CONF_TIER_AFTER_DAYS, DEFAULT_TIER_AFTER_DAYS),
+        prune_previews=entry.data.get(CONF_TIER_PRUNE_PREVIEWS, DEFAULT_TIER_PRUNE_PREVIEWS),
+        keyframe_interval=encode_options["keyframe_interval"],
+        jobs=jobs,
+        feed=feed,
+        thumbnail_cache=thumbnail_cache,
+        metrics=metrics,
+    )
+    entry_data["tiering"] = tiering
+    entry.async_on_unload(tiering.stop)
+
+    api_server = None
+    api_port = entry.data.get(CONF_API_PORT, DEFAULT_API_PORT)
+    if api_port:
+        api_host, api_token, cors_origins = await _async_api_settings(hass, entry)
+        api_server = MediaAPIServer(
+            media_dir,
+            media_db,
+            host=api_host,
+            port=api_port,
+            token=api_token,
+            cors_origins=cors_origins,
+            thumbnail_cache=thumbnail_cache,
+            recorders=recorders,
+            feed=feed,
+            metrics=metrics,
+            profiler=profiler,
+            reanalyzer=reanalyzer,
+            summaries=summaries,
+            tiering=tiering,
+        )
 
-    event_entities = []
-    event_entity_index: Dict[str, RingLocalMLEventSensor] = {}
-    for camera in cameras:
-        camera_id = camera["id"]
-        device_name = _camera_display_name(camera_id, camera_meta)
-        event_sensor = RingLocalMLEventSensor(camera_id, device_name)
-        event_entities.append(event_sensor)
-        event_entity_index[camera_id] = event_sensor
-        entity_manager.prime_camera_topics(camera_id)
+    async def _async_start_api():
+        try:
+            await api_server.start()
+        except (OSError, ValueError):
+            _LOGGER.exception("Failed to start media API on %s:%s", api_server.host, api_port)
+        else:
+            entry_data["api_server"] = api_server
+            entry.async_on_unload(api_server.stop)
+
+    # The feed reads its sequence from SQLite and the API binds a socket;
+    # neither waits for the other.
+    await asyncio.gather(
+        setup.measure("feed", feed.async_start()),
+        *([setup.measure("api", _async_start_api())] if api_server is not None else []),
+    )
 
-    if event_entities:
-        async_add_entities(event_entities)
+    if summaries is not None:
+        # Catches up on clips recorded while we were down, then follows the feed.
+        summaries.start()
+    tiering.start()
+    metrics.add_collector(lambda: job_samples(jobs))
+    metrics.add_collector(lambda: recorder_samples(recorders))
+
+    pipeline = EventPipeline(
+        recorders,
+        detector,
+        media_dir,
+        media_db,
+        thumbnail_cache=thumbnail_cache,
+        feed=feed,
+        encode_options=encode_options,
+        jobs=jobs,
+        ml_pool=ml_pool,
+        metrics=metrics,
+    )
+    entry_data["pipeline"] = pipeline
+    snapshots = SnapshotIngestor(
+        detector,
+        media_dir,
+        media_db,
+        feed=feed,
+        thumbnail_cache=thumbnail_cache,
+        jobs=jobs,
+        ml_pool=ml_pool,
+        metrics=metrics,
+    )
+    entry_data["snapshots"] = snapshots
 
-    @callback
-    def message_received(msg):
-        """Handle new MQTT messages from the Ring-MQTT addon."""
-        topic = parse_ring_topic(msg.topic)
-        if not topic or topic.category not in SUPPORTED_RING_CATEGORIES:
-            return
+    manifest_store = Store(hass, MANIFEST_VERSION, f"{DOMAIN}.{entry.entry_id}.topics")
+    entity_manager = RingMQTTSensorManager(hass, async_add_entities, camera_meta, manifest_store)
+    dispatcher = entry_data["dispatcher"]
 
-        if topic.topic_suffix.endswith("image"):
+    memory = FrameMemoryGovernor(
+        entry.data.get(CONF_FRAME_MEMORY_MB, DEFAULT_FRAME_MEMORY_MB) * 1024 * 1024,
+        min_buffer_seconds=pipeline.min_buffer_seconds,
+    )
+    entry_data["memory"] = memory
+
+    lifecycle = CameraLifecycleManager(
+        hass,
+        async_add_entities,
+        entity_manager,
+        dispatcher,
+        recorders=recorders,
+        camera_meta=camera_meta,
+        buffer_seconds=pipeline.buffer_seconds,
+        memory=memory,
+        metrics=metrics,
+    )
+    entry_data["lifecycle"] = lifecycle
+    entry.async_on_unload(lifecycle.async_shutdown)
+    # Recorders start concurrently and connect in their own threads; setup
+    # does not wait for the first frame.
+    await setup.measure("cameras", lifecycle.async_apply(cameras))
+    event_entity_index = lifecycle.event_entities
+    async_add_entities(_pipeline_entities(entry, metrics, jobs, profiler, reanalyzer, tiering))
+
+    def _on_unknown_device(message: ParsedMessage):
+        """Create metadata and entities for a device seen for the first time."""
+        topic = message.topic
+        camera_id = topic.device_id
+        if camera_id in camera_meta:
             return
 
-        last_segment = topic.topic_suffix.split("/")[-1] if topic.topic_suffix else ""
-        if last_segment.endswith("command"):
+        legacy_meta = camera_meta.get(topic.location_id)
+        if legacy_meta:
+            camera_meta[camera_id] = legacy_meta
+            entity_manager.update_camera_meta(camera_id, legacy_meta)
+            # Only the recorder is shared until discovery renames the camera
+            # in the options; the lifecycle manager then replaces the old
+            # device and builds the entities under the new id.
+            if topic.location_id in recorders and camera_id not in recorders:
+                recorders[camera_id] = recorders[topic.location_id]
             return
 
-        topic_suffix = topic.topic_suffix or "state"
-        payload_text = _decode_payload(msg.payload)
-        camera_id = topic.device_id
+        lifecycle.add_observed_device(
+            camera_id,
+            {
+                "id": camera_id,
+                "name": _default_camera_name(camera_id),
+                "location_id": topic.location_id,
+            },
+        )
 
+    def _mirror_route(topic):
+        """Bind the (camera, suffix) mirror sensor once per route."""
+        camera_id = topic.device_id
         meta = camera_meta.get(camera_id)
-        if not meta:
-            legacy_meta = camera_meta.get(topic.location_id)
-            if legacy_meta:
-                meta = legacy_meta
-                camera_meta[camera_id] = meta
-                entity_manager.update_camera_meta(camera_id, meta)
-                if topic.location_id in event_entity_index and camera_id not in event_entity_index:
-                    event_entity_index[camera_id] = event_entity_index[topic.location_id]
-                if topic.location_id in recorders and camera_id not in recorders:
-                    recorders[camera_id] = recorders[topic.location_id]
-            else:
-                meta = {
-                    "id": camera_id,
-                    "name": _default_camera_name(camera_id),
-                    "location_id": topic.location_id,
-                }
-                camera_meta[camera_id] = meta
-                entity_manager.update_camera_meta(camera_id, meta)
-                entity_manager.prime_camera_topics(camera_id)
-                device_name = _camera_display_name(camera_id, camera_meta)
-                event_sensor = RingLocalMLEventSensor(camera_id, device_name)
-                event_entity_index[camera_id] = event_sensor
-                async_add_entities([event_sensor])
-
-        meta.setdefault("location_id", topic.location_id)
-        meta.setdefault("category", topic.category)
+        if meta is not None:
+            meta.setdefault("location_id", topic.location_id)
+            meta.setdefault("category", topic.category)
 
+        topic_suffix = topic.topic_suffix or "state"
+        if topic.last_segment == "image":
+            # Binary snapshots are ingested, not mirrored as sensor states.
+            return None
         sensor_entity = entity_manager.get_or_create(camera_id, topic_suffix)
-        sensor_entity.handle_payload(payload_text)
-        _split_attribute_payload(camera_id, topic_suffix, payload_text, entity_manager)
+        if topic_suffix not in ATTRIBUTE_SPLITS:
+            return sensor_entity.handle_payload
+
+        def _handle(message: ParsedMessage):
+            sensor_entity.handle_payload(message)
+            _split_attribute_payload(camera_id, topic_suffix, message, entity_manager)
 
-        base_event = topic.entity or topic_suffix.split("/", 1)[0]
-        if topic_suffix.endswith("/state") and base_event in {"motion", "ding"} and _payload_is_active(payload_text):
+        return _handle
+
+    def _trigger_route(topic):
+        event_type = EVENT_TRIGGER_SUFFIXES.get(topic.topic_suffix)
+        if event_type is None:
+            return None
+        camera_id = topic.device_id
+
+        def _handle(message: ParsedMessage):
+            if not payload_is_active(message.value):
+                return
             event_sensor = event_entity_index.get(camera_id)
             if event_sensor:
-                event_sensor.handle_event(base_event, payload_text)
-            hass.async_create_task(
-                handle_mqtt_message(
-                    hass,
-                    camera_id,
-                    base_event,
-                    recorders,
-                    detector,
-                    media_dir,
-                    media_db,
-                )
-            )
+                event_sensor.handle_event(event_type, message.text)
+            hass.async_create_task(pipeline.handle_mqtt_message(camera_id, event_type))
 
-    unsub = await mqtt.async_subscribe(
-        hass,
-        "ring/#",
-        message_received,
-        1,
-    )
-    entry.async_on_unload(unsub)
+        return _handle
 
-    entry.add_update_listener(async_reload_entry)
+    def _snapshot_route(topic):
+        if topic.topic_suffix != SNAPSHOT_IMAGE_SUFFIX:
+            return None
+        camera_id = topic.device_id
 
+        def _handle(message: ParsedMessage):
+            # Cameras with an open RTSP session already get better frames.
+            recorder = recorders.get(camera_id)
+            if recorder is not None and recorder.streaming:
+                return
+            snapshots.handle_image(camera_id, message.payload)
 
-async def async_reload_entry(hass, entry):
-    """Reload the config entry."""
-    await hass.config_entries.async_reload(entry.entry_id)
+        return _handle
 
+    entry.async_on_unload(dispatcher.add_unknown_device_handler(_on_unknown_device))
+    entry.async_on_unload(dispatcher.add_route_factory(_mirror_route))
+    entry.async_on_unload(dispatcher.add_route_factory(_trigger_route))
+    entry.async_on_unload(dispatcher.add_route_factory(_snapshot_route))
 
-async def handle_mqtt_message(hass, camera_id, event_type, recorders, detector, media_dir, media_db):
-    """Handle motion/ding MQTT messages that trigger recording and ML."""
+    async def _async_options_updated(hass, entry):
+        """Apply camera list changes without reloading the entry."""
+        await lifecycle.async_apply(entry.options.get("cameras", []))
 
-    recorder = recorders.get(camera_id)
-    if not recorder:
-        return
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
+
+    _LOGGER.info(
+        "Ring Local ML set up in %s with %d camera(s); loading models in the background",
+        setup.format(),
+        len(cameras),
+    )
+    entry.async_create_background_task(
+        hass, _async_warm_up(hass, detector, ml_pool, metrics), f"{DOMAIN} warm-up {entry.entry_id}"
+    )
 
-    await asyncio.sleep(POST_EVENT_SECONDS)
-    
-    def _save_and_detect():
+
+async def _async_api_settings(hass, entry) -> Tuple[str, str, List[str]]:
+    """Bind address, token and allowed CORS origins of the media API."""
+    host = entry.data.get(CONF_API_HOST) or ""
+    if not host:
+        # Home Assistant's own LAN address rather than every interface.
         try:
-            media_path = create_media_paths(media_dir, camera_id)
-            clip_path = get_clip_path(media_path, event_type)
-            recorder.save_clip(clip_path, PRE_EVENT_SECONDS, POST_EVENT_SECONDS, CLIP_FPS)
-
-            frames = recorder.buffer.get_all()
-            face_detected = False
-            snapshot_path = None
-            for frame, ts in frames:
-                _, face = detector.detect(frame, detect_motion=False, detect_faces=True)
-                if face:
-                    face_detected = True
-                    snapshot_path = get_snapshot_path(media_path, f"{event_type}_face")
-                    _save_snapshot(snapshot_path, frame)
-                    break
+            host = await network.async_get_source_ip(hass)
+        except Exception:
+            _LOGGER.warning("Could not determine the internal address; media API listens on %s", DEFAULT_API_HOST)
+            host = DEFAULT_API_HOST
+    token = entry.data.get(CONF_API_TOKEN)
+    if not token:
+        # Entries created while the token was optional.
+        token = secrets.token_urlsafe(24)
+        hass.config_entries.async_update_entry(entry, data={**entry.data, CONF_API_TOKEN: token})
+        # The token itself is only shown by the repair flow (admins only),
+        # never in the issue text; fixing the issue dismisses it.
+        ir.async_create_issue(
+            hass,
+            DOMAIN,
+            f"{ISSUE_API_TOKEN_GENERATED}_{entry.entry_id}",
+            is_fixable=True,
+            is_persistent=True,
+            severity=ir.IssueSeverity.WARNING,
+            translation_key=ISSUE_API_TOKEN_GENERATED,
+            data={"entry_id": entry.entry_id},
+        )
+    origins = [origin.strip() for origin in (entry.data.get(CONF_API_CORS_ORIGINS) or "").split(",")]
+    return host, token, [origin for origin in origins if origin]
 
-            record_event(
-                media_db,
-                camera_id=camera_id,
-                event_type=event_type,
-                clip_path=clip_path,
-                snapshot_path=snapshot_path,
-                face_detected=face_detected,
-                duration=PRE_EVENT_SECONDS + POST_EVENT_SECONDS,
-            )
-        except Exception as e:
-            _LOGGER.exception("Error during save and detect: %s", e)
 
+async def _async_warm_up(hass, detector: Detector, ml_pool: MLWorkerPool, metrics: PipelineMetrics) -> None:
+    """Load the face model where it will run, off the setup path."""
+    warm_up = SetupTimer(metrics)
+    try:
+        if ml_pool.running:
+            # Face scans go to the worker processes; the in-process cascade
+            # is only a fallback and loads on demand.
+            await warm_up.measure("ml_workers", hass.async_add_executor_job(ml_pool.warm_up))
+        else:
+            await warm_up.measure("face_model", hass.async_add_executor_job(detector.warm_up))
+    except Exception:
+        _LOGGER.warning("Model warm-up failed; models load on first use", exc_info=True)
+        return
+    _LOGGER.info("Ring Local ML models ready in %s", warm_up.format())
 
-    await hass.async_add_executor_job(_save_and_detect)
 
 class RingLocalMLEventSensor(SensorEntity):
     """Tracks the latest high-level event (motion/ding) per camera."""
@@ -573,4 +1101,115 @@ class RingLocalMLEventSensor(SensorEntity):
             "payload": payload,
             "last_update": datetime.utcnow().isoformat(),
         }
-        self.async_write_ha_state()
\ No newline at end of file
+        self.async_write_ha_state()
+
+class RingLocalMLDiagnosticSensor(SensorEntity):
+    """Per-camera diagnostic value polled from in-memory counters."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        camera_id: str,
+        device_name: str,
+        key: str,
+        label: str,
+        value_fn: Callable[[], Tuple[object, Dict]],
+        unit: str = None,
+    ):
+        self._camera_id = camera_id
+        self._value_fn = value_fn
+        self._attr_name = f"{device_name} {label}"
+        self._attr_unique_id = f"ring_local_ml_{key}_{camera_id}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, camera_id)},
+            manufacturer="Ring",
+            name=device_name,
+        )
+
+    async def async_update(self):
+        value, attrs = self._value_fn()
+        self._attr_native_value = value
+        self._attr_extra_state_attributes = {"camera_id": self._camera_id, **attrs}
+
+
+def _pipeline_entities(
+    entry,
+    metrics: PipelineMetrics,
+    jobs: JobScheduler,
+    profiler: SamplingProfiler,
+    reanalyzer: ClipReanalyzer,
+    tiering: StorageTiering,
+) -> list:
+    """Integration-wide diagnostics on a 'Ring Local ML' service device."""
+
+    def _queue_depth():
+        stats = jobs.stats()
+        return sum(stage.depth for stage in jobs.stages), stats
+
+    def _face_scan():
+        value, attrs = _timer_value(metrics, TIMER_DETECT_FRAME, scale=1000, quantile="p50")
+        return value, {"per_frame": attrs, "per_scan": metrics.summary(TIMER_DETECT)}
+
+    def _encode():
+        value, attrs = _timer_value(metrics, TIMER_ENCODE)
+        return value, {**attrs, "previews": metrics.summary(TIMER_PREVIEWS)}
+
+    def _db_commit():
+        value, attrs = _timer_value(metrics, TIMER_DB_COMMIT, scale=1000)
+        return value, {**attrs, "snapshot_write": metrics.summary(TIMER_SNAPSHOT_WRITE)}
+
+    def _profiler():
+        status = profiler.status()
+        return ("on" if status["running"] else "off"), status
+
+    def _reanalysis():
+        status = reanalyzer.status()
+        return status.pop("state"), status
+
+    def _tiering():
+        status = tiering.status()
+        if tiering.after_days <= 0:
+            return "off", status
+        return status.pop("state"), status
+
+    return [
+        RingLocalMLPipelineSensor(entry, "clip_latency", "Clip Latency", lambda: _clip_latency(metrics), unit="s"),
+        RingLocalMLPipelineSensor(entry, "encode_time", "Encode Time", _encode, unit="s"),
+        RingLocalMLPipelineSensor(entry, "face_scan_time", "Face Scan Time per Frame", _face_scan, unit="ms"),
+        RingLocalMLPipelineSensor(entry, "db_commit_time", "Database Commit Time", _db_commit, unit="ms"),
+        RingLocalMLPipelineSensor(entry, "job_queue_depth", "Job Queue Depth", _queue_depth),
+        RingLocalMLPipelineSensor(entry, "profiler", "Sampling Profiler", _profiler),
+        RingLocalMLPipelineSensor(entry, "reanalysis", "Clip Re-analysis", _reanalysis),
+        RingLocalMLPipelineSensor(entry, "storage_tiering", "Storage Tiering", _tiering),
+    ]
+
+
+class RingLocalMLPipelineSensor(SensorEntity):
+    """Integration-wide pipeline diagnostic polled from ``PipelineMetrics``."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        entry,
+        key: str,
+        label: str,
+        value_fn: Callable[[], Tuple[object, Dict]],
+        unit: str = None,
+    ):
+        self._value_fn = value_fn
+        self._attr_name = f"Ring Local ML {label}"
+        self._attr_unique_id = f"ring_local_ml_pipeline_{key}_{entry.entry_id}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, entry.entry_id)},
+            name="Ring Local ML",
+            entry_type=dr.DeviceEntryType.SERVICE,
+        )
+
+    async def async_update(self):
+        value, attrs = self._value_fn()
+        self._attr_native_value = value
+        self._attr_extra_state_attributes = attrs
@@ -0,0 +1,198 @@
+"""Ingest Ring-MQTT snapshot images as a detection source.
+
+Ring-MQTT publishes JPEG snapshots on ``ring/<location>/camera/<device>/snapshot/image``
+(periodically and on motion). Decoding one still is far cheaper than keeping
+an RTSP stream open, which makes these the only video source for cameras in
+snapshot mode. Every image is stored as a snapshot event, run through the
+face detector and announced on the feed.
+
+Like the pipeline this module has no Home Assistant dependency.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import zlib
+from typing import Dict, Optional
+
+from .feed import FEED_SNAPSHOT_READY
+from .jobs import EVENT_PRIORITIES, JobShed
+from .metrics import TIMER_DB_COMMIT, TIMER_DETECT, TIMER_SNAPSHOT_WRITE, PipelineMetrics
+from .ml.workers import find_first_face
+from .storage.db import record_event
+from .storage.filesystem import create_media_paths, get_snapshot_path
+from .storage.thumbnails import write_snapshot_thumbnail
+
+_LOGGER = logging.getLogger(__name__)
+
+SNAPSHOT_EVENT_TYPE = "snapshot"
+
+
+def decode_jpeg(data: bytes):
+    """Decode JPEG bytes into a BGR ``numpy`` frame like the recorder produces."""
+    import io
+
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        rgb = np.asarray(image.convert("RGB"))
+    return np.ascontiguousarray(rgb[:, :, ::-1])
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(data)
+    os.replace(tmp_path, path)
+
+
+def _unique_path(path: str) -> str:
+    """Avoid overwriting a snapshot taken within the same second."""
+    base, ext = os.path.splitext(path)
+    candidate, index = path, 1
+    while os.path.exists(candidate):
+        candidate = f"{base}_{index}{ext}"
+        index += 1
+    return candidate
+
+
+class SnapshotIngestor:
+    """Decode, store and analyse snapshot images off the event loop.
+
+    At most one image per camera is processed at a time. An image that
+    arrives while the previous one is still being handled replaces any other
+    waiting image, so a slow disk or detector never builds a backlog, and a
+    byte-identical repeat of the last image is dropped without decoding.
+    """
+
+    def __init__(
+        self,
+        detector,
+        media_dir: str,
+        media_db: str,
+        *,
+        feed=None,
+        thumbnail_cache=None,
+        jobs=None,
+        ml_pool=None,
+        metrics: Optional[PipelineMetrics] = None,
+    ):
+        self.detector = detector
+        self.media_dir = media_dir
+        self.media_db = media_db
+        self.feed = feed
+        self.thumbnail_cache = thumbnail_cache
+        self.jobs = jobs
+        self.ml_pool = ml_pool
+        self.metrics = metrics or PipelineMetrics()
+        self._busy: Dict[str, bool] = {}
+        self._waiting: Dict[str, bytes] = {}
+        self._last_crc: Dict[str, int] = {}
+        self.ingested = 0
+        self.duplicates = 0
+        self.replaced = 0
+
+    def handle_image(self, camera_id: str, payload) -> None:
+        """Accept an image from MQTT; must be called from the event loop."""
+        if not payload or not isinstance(payload, (bytes, bytearray)):
+            return
+        data = bytes(payload)
+        crc = zlib.crc32(data)
+        if self._last_crc.get(camera_id) == crc:
+            self.duplicates += 1
+            return
+        self._last_crc[camera_id] = crc
+
+        if self._busy.get(camera_id):
+            if camera_id in self._waiting:
+                self.replaced += 1
+            self._waiting[camera_id] = data
+            return
+        self._busy[camera_id] = True
+        asyncio.get_running_loop().create_task(self._async_drain(camera_id, data))
+
+    async def _async_drain(self, camera_id: str, data: Optional[bytes]) -> None:
+        try:
+            while data is not None:
+                event_id, face = await self._process(camera_id, data)
+                if event_id is not None:
+                    self.ingested += 1
+                    if self.feed is not None:
+                        self.feed.publish(
+                            FEED_SNAPSHOT_READY,
+                            camera_id,
+                            event_id=event_id,
+                            event_type=SNAPSHOT_EVENT_TYPE,
+                            face_detected=face,
+                            source="mqtt",
+                        )
+                data = self._waiting.pop(camera_id, None)
+        finally:
+            self._busy[camera_id] = False
+
+    async def _process(self, camera_id: str, data: bytes):
+        """Decode and detect on the detect stage, then store on the persist stage."""
+        priority = EVENT_PRIORITIES[SNAPSHOT_EVENT_TYPE]
+        try:
+            analysed = await self._submit("detect", self._analyse, camera_id, data, priority=priority)
+            if analysed is None:
+                return None, False
+            frame, face = analysed
+            event_id = await self._submit("persist", self._persist, camera_id, data, frame, face, priority=priority)
+        except JobShed:
+            return None, False
+        return event_id, face
+
+    async def _submit(self, stage: str, func, *args, priority: int):
+        if self.jobs is None:
+            return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+        return await getattr(self.jobs, stage).submit(func, *args, priority=priority)
+
+    def _analyse(self, camera_id: str, data: bytes):
+        """Return ``(frame, face_detected)``, or None for an unusable image."""
+        try:
+            frame = decode_jpeg(data)
+        except Exception:
+            _LOGGER.debug("Discarding undecodable snapshot from %s", camera_id, exc_info=True)
+            return None
+        try:
+            with self.metrics.timer(TIMER_DETECT, camera=camera_id, source=SNAPSHOT_EVENT_TYPE):
+                face = find_first_face(self.ml_pool, self.detector, [frame]) is not None
+        except Exception as e:
+            _LOGGER.exception("Error analysing snapshot from %s: %s", camera_id, e)
+            return None
+        return frame, face
+
+    def _persist(self, camera_id: str, data: bytes, frame, face: bool) -> Optional[int]:
+        try:
+            media_path = create_media_paths(self.media_dir, camera_id)
+            snapshot_path = _unique_path(get_snapshot_path(media_path, SNAPSHOT_EVENT_TYPE))
+            # Ring already encoded the JPEG; store it as-is.
+            with self.metrics.timer(TIMER_SNAPSHOT_WRITE, camera=camera_id):
+                _write_atomic(snapshot_path, data)
+            try:
+                previews = write_snapshot_thumbnail(frame, snapshot_path)
+            except Exception:
+                _LOGGER.exception("Failed to write thumbnail for %s", snapshot_path)
+                previews = None
+            if previews and self.thumbnail_cache is not None:
+                self.thumbnail_cache.prime(previews)
+
+            with self.metrics.timer(TIMER_DB_COMMIT, camera=camera_id):
+                event_id = record_event(
+                    self.media_db,
+                    camera_id=camera_id,
+                    event_type=SNAPSHOT_EVENT_TYPE,
+                    clip_path=None,
+                    snapshot_path=snapshot_path,
+                    face_detected=bool(face),
+                    duration=0,
+                    thumbnail_path=previews.thumbnail_path if previews else None,
+                )
+            return event_id
+        except Exception as e:
+            _LOGGER.exception("Error ingesting snapshot from %s: %s", camera_id, e)
+            return None
@@ -3,9 +3,11 @@
 from __future__ import annotations
 
 import datetime as dt
+import json
 import os
 import sqlite3
 from contextlib import contextmanager
+from typing import List, Optional
 
 _DDL = """
 CREATE TABLE IF NOT EXISTS events (
@@ -20,18 +22,80 @@ CREATE TABLE IF NOT EXISTS events (
 )
 """
 
+_FEED_DDL = """
+CREATE TABLE IF NOT EXISTS event_feed (
+    seq INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    camera_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT
+)
+"""
+
+# Per-clip motion index, see ``ml/activity.py``. ``active_cells`` is the OR
+# of the per-second cell masks so zone searches can be pre-filtered in SQL.
+_ACTIVITY_DDL = """
+CREATE TABLE IF NOT EXISTS clip_activity (
+    event_id INTEGER PRIMARY KEY REFERENCES events (id),
+    peak INTEGER NOT NULL,
+    active_cells INTEGER NOT NULL,
+    scores BLOB NOT NULL,
+    masks BLOB NOT NULL,
+    grid BLOB NOT NULL
+)
+"""
+
+_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_events_camera_id ON events (camera_id, id)",
+)
+
+# Columns added after the first release. ``init_db`` adds any that are missing
+# so databases created by older versions keep working.
+_COLUMN_MIGRATIONS = {
+    "events": [
+        ("thumbnail_path", "TEXT"),
+        ("sprite_path", "TEXT"),
+        ("sprite_meta", "TEXT"),
+        ("clip_bytes", "INTEGER"),
+        # 0 for clips as recorded, TIER_ARCHIVED once re-encoded for storage.
+        ("tier", "INTEGER DEFAULT 0"),
+    ],
+}
+
+_INITIALIZED: set[str] = set()
+
+
+def _apply_migrations(conn: sqlite3.Connection) -> None:
+    for table, columns in _COLUMN_MIGRATIONS.items():
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for name, column_type in columns:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
 
 def init_db(path: str) -> None:
+    if path in _INITIALIZED and os.path.exists(path):
+        return
     directory = os.path.dirname(path)
     if directory:
         os.makedirs(directory, exist_ok=True)
     with sqlite3.connect(path) as conn:
+        # WAL lets API readers run while the pipeline is writing.
+        conn.execute("PRAGMA journal_mode=WAL")
         conn.execute(_DDL)
+        conn.execute(_FEED_DDL)
+        conn.execute(_ACTIVITY_DDL)
+        _apply_migrations(conn)
+        for statement in _INDEXES:
+            conn.execute(statement)
+    _INITIALIZED.add(path)
 
 
 @contextmanager
-def db_connection(path: str):
+def db_connection(path: str, *, rows: bool = False):
     conn = sqlite3.connect(path)
+    if rows:
+        conn.row_factory = sqlite3.Row
     try:
         yield conn
     finally:
@@ -48,14 +112,23 @@ def record_event(
     face_detected: bool,
     duration: int,
     timestamp: dt.datetime | None = None,
-) -> None:
+    thumbnail_path: str | None = None,
+    sprite_path: str | None = None,
+    sprite_meta: dict | None = None,
+    clip_bytes: int | None = None,
+    activity=None,
+) -> int:
+    """Insert an event row, plus its ``ActivityIndex`` in the same transaction."""
     init_db(path)
     when = (timestamp or dt.datetime.utcnow()).isoformat()
     with db_connection(path) as conn:
-        conn.execute(
+        cursor = conn.execute(
             """
-            INSERT INTO events (timestamp, camera_id, event_type, clip_path, snapshot_path, face_detected, duration)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO events (
+                timestamp, camera_id, event_type, clip_path, snapshot_path, face_detected, duration,
+                thumbnail_path, sprite_path, sprite_meta, clip_bytes
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
             (
                 when,
@@ -65,6 +138,297 @@ def record_event(
                 snapshot_path,
                 1 if face_detected else 0,
                 duration,
+                thumbnail_path,
+                sprite_path,
+                json.dumps(sprite_meta) if sprite_meta else None,
+                clip_bytes,
             ),
         )
+        if activity is not None:
+            _insert_activity(conn, cursor.lastrowid, activity)
+        conn.commit()
+        return cursor.lastrowid
+
+
+def list_events(
+    path: str,
+    *,
+    camera_id: str | None = None,
+    event_type: str | None = None,
+    before_id: int | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    face_only: bool = False,
+    limit: int = 50,
+) -> List[sqlite3.Row]:
+    """Return events newest first, paging backwards from ``before_id``."""
+    init_db(path)
+    clauses = []
+    params: list = []
+    if camera_id:
+        clauses.append("camera_id = ?")
+        params.append(camera_id)
+    if event_type:
+        clauses.append("event_type = ?")
+        params.append(event_type)
+    if before_id is not None:
+        clauses.append("id < ?")
+        params.append(before_id)
+    if since:
+        clauses.append("timestamp >= ?")
+        params.append(since)
+    if until:
+        clauses.append("timestamp < ?")
+        params.append(until)
+    if face_only:
+        clauses.append("face_detected = 1")
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    params.append(limit)
+    with db_connection(path, rows=True) as conn:
+        return conn.execute(
+            f"SELECT * FROM events {where} ORDER BY id DESC LIMIT ?",
+            params,
+        ).fetchall()
+
+
+def get_event(path: str, event_id: int) -> Optional[sqlite3.Row]:
+    init_db(path)
+    with db_connection(path, rows=True) as conn:
+        return conn.execute("SELECT * FROM events WHERE id = ?", (event_id,)).fetchone()
+
+
+def _clip_clauses(after_id: int, until_id: int | None, camera_id: str | None):
+    clauses = ["clip_path IS NOT NULL", "id > ?"]
+    params: list = [after_id]
+    if until_id is not None:
+        clauses.append("id <= ?")
+        params.append(until_id)
+    if camera_id:
+        clauses.append("camera_id = ?")
+        params.append(camera_id)
+    return " AND ".join(clauses), params
+
+
+def list_clip_events(
+    path: str,
+    *,
+    after_id: int = 0,
+    until_id: int | None = None,
+    camera_id: str | None = None,
+    limit: int = 100,
+) -> List[sqlite3.Row]:
+    """Return events that have a clip, oldest first, paging forwards from ``after_id``."""
+    init_db(path)
+    where, params = _clip_clauses(after_id, until_id, camera_id)
+    with db_connection(path, rows=True) as conn:
+        return conn.execute(
+            f"SELECT * FROM events WHERE {where} ORDER BY id LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+
+
+def count_clip_events(
+    path: str,
+    *,
+    after_id: int = 0,
+    until_id: int | None = None,
+    camera_id: str | None = None,
+) -> int:
+    init_db(path)
+    where, params = _clip_clauses(after_id, until_id, camera_id)
+    with db_connection(path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM events WHERE {where}", params).fetchone()[0]
+
+
+def max_event_id(path: str) -> int:
+    init_db(path)
+    with db_connection(path) as conn:
+        row = conn.execute("SELECT MAX(id) FROM events").fetchone()
+    return row[0] or 0
+
+
+def list_tier_candidates(
+    path: str,
+    *,
+    before: str,
+    after_id: int = 0,
+    limit: int = 100,
+) -> List[sqlite3.Row]:
+    """Clips recorded before ``before`` (ISO timestamp) that are still at their original tier."""
+    init_db(path)
+    with db_connection(path, rows=True) as conn:
+        return conn.execute(
+            """
+            SELECT * FROM events
+            WHERE clip_path IS NOT NULL AND COALESCE(tier, 0) = 0 AND timestamp < ? AND id > ?
+            ORDER BY id LIMIT ?
+            """,
+            (before, after_id, limit),
+        ).fetchall()
+
+
+_UPDATABLE_EVENT_COLUMNS = {
+    "clip_path",
+    "snapshot_path",
+    "face_detected",
+    "duration",
+    "thumbnail_path",
+    "sprite_path",
+    "sprite_meta",
+    "clip_bytes",
+    "tier",
+}
+
+
+def update_event(path: str, event_id: int, *, expect_clip_path: str | None = None, **fields) -> bool:
+    """Update selected columns of an existing event row; return whether it matched.
+
+    With ``expect_clip_path`` the row is only updated while its clip is still
+    that file, so swapping a clip for a new one is a single atomic
+    compare-and-set.
+    """
+    unknown = set(fields) - _UPDATABLE_EVENT_COLUMNS
+    if unknown:
+        raise ValueError(f"Cannot update event columns: {sorted(unknown)}")
+    if not fields:
+        return False
+    if "face_detected" in fields:
+        fields["face_detected"] = 1 if fields["face_detected"] else 0
+    if isinstance(fields.get("sprite_meta"), dict):
+        fields["sprite_meta"] = json.dumps(fields["sprite_meta"])
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    init_db(path)
+    where = "id = ?"
+    params = [event_id]
+    if expect_clip_path is not None:
+        where += " AND clip_path = ?"
+        params.append(expect_clip_path)
+    with db_connection(path) as conn:
+        cursor = conn.execute(
+            f"UPDATE events SET {assignments} WHERE {where}",
+            (*fields.values(), *params),
+        )
+        conn.commit()
+    return cursor.rowcount > 0
+
+
+def _signed64(value: int) -> int:
+    """SQLite integers are signed; store 64-bit masks in two's complement."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def record_activity(path: str, event_id: int, activity, *, replace: bool = True) -> None:
+    """Store the ``ActivityIndex`` of an event's clip; keep an existing one unless ``replace``."""
+    init_db(path)
+    with db_connection(path) as conn:
+        _insert_activity(conn, event_id, activity, replace=replace)
+        conn.commit()
+
+
+def _insert_activity(conn: sqlite3.Connection, event_id: int, activity, *, replace: bool = True) -> None:
+    conflict = "REPLACE" if replace else "IGNORE"
+    conn.execute(
+        f"""
+        INSERT OR {conflict} INTO clip_activity (event_id, peak, active_cells, scores, masks, grid)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        (
+            event_id,
+            activity.peak,
+            _signed64(activity.active_cells),
+            activity.scores,
+            activity.pack_masks(),
+            activity.grid,
+        ),
+    )
+
+
+def get_activity(path: str, event_id: int) -> Optional[sqlite3.Row]:
+    init_db(path)
+    with db_connection(path, rows=True) as conn:
+        return conn.execute("SELECT * FROM clip_activity WHERE event_id = ?", (event_id,)).fetchone()
+
+
+def search_activity(
+    path: str,
+    *,
+    zone: int | None = None,
+    min_peak: int = 0,
+    camera_id: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    before_id: int | None = None,
+    limit: int = 50,
+) -> List[sqlite3.Row]:
+    """Events whose clip index passes the coarse zone and peak filters, newest first.
+
+    Rows carry the ``events`` columns plus the index blobs; callers refine
+    per second with ``ActivityIndex.matching_seconds``.
+    """
+    init_db(path)
+    clauses = ["a.peak >= ?"]
+    params: list = [min_peak]
+    if zone is not None:
+        clauses.append("(a.active_cells & ?) != 0")
+        params.append(_signed64(zone))
+    if camera_id:
+        clauses.append("e.camera_id = ?")
+        params.append(camera_id)
+    if since:
+        clauses.append("e.timestamp >= ?")
+        params.append(since)
+    if until:
+        clauses.append("e.timestamp < ?")
+        params.append(until)
+    if before_id is not None:
+        clauses.append("e.id < ?")
+        params.append(before_id)
+    params.append(limit)
+    with db_connection(path, rows=True) as conn:
+        return conn.execute(
+            f"""
+            SELECT e.*, a.peak, a.scores, a.masks, a.grid
+            FROM clip_activity a JOIN events e ON e.id = a.event_id
+            WHERE {' AND '.join(clauses)}
+            ORDER BY e.id DESC LIMIT ?
+            """,
+            params,
+        ).fetchall()
+
+
+def append_feed(path: str, messages, *, keep: int | None = None) -> None:
+    """Persist ``(seq, timestamp, camera_id, kind, payload)`` feed rows.
+
+    With ``keep``, rows more than ``keep`` sequence numbers behind the newest
+    one are deleted in the same transaction.
+    """
+    init_db(path)
+    with db_connection(path) as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO event_feed (seq, timestamp, camera_id, kind, payload) VALUES (?, ?, ?, ?, ?)",
+            messages,
+        )
+        if keep is not None and messages:
+            newest = max(message[0] for message in messages)
+            conn.execute("DELETE FROM event_feed WHERE seq <= ?", (newest - keep,))
         conn.commit()
+
+
+def read_feed(path: str, after_seq: int, before_seq: int | None = None, limit: int = 500) -> List[sqlite3.Row]:
+    init_db(path)
+    query = "SELECT * FROM event_feed WHERE seq > ?"
+    params: list = [after_seq]
+    if before_seq is not None:
+        query += " AND seq < ?"
+        params.append(before_seq)
+    query += " ORDER BY seq LIMIT ?"
+    params.append(limit)
+    with db_connection(path, rows=True) as conn:
+        return conn.execute(query, params).fetchall()
+
+
+def last_feed_seq(path: str) -> int:
+    init_db(path)
+    with db_connection(path) as conn:
+        row = conn.execute("SELECT MAX(seq) FROM event_feed").fetchone()
+    return row[0] or 0
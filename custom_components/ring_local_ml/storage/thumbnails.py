@@ -0,0 +1,226 @@
+"""Thumbnail and scrub-sprite generation plus an in-memory preview cache.
+
+Previews are produced at clip write time from the frames that are already in
+the recorder's ``CircularBuffer`` so no clip ever has to be decoded again just
+to render a gallery.
+"""
+
+from __future__ import annotations
+
+import collections
+import io
+import logging
+import math
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+_LOGGER = logging.getLogger(__name__)
+
+THUMBNAIL_WIDTH = 320
+SPRITE_TILE_WIDTH = 160
+SPRITE_COLUMNS = 5
+SPRITE_MAX_TILES = 10
+JPEG_QUALITY = 80
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024
+
+
+@dataclass
+class ClipPreviews:
+    """Result of preview generation for a single clip."""
+
+    thumbnail_path: Optional[str] = None
+    sprite_path: Optional[str] = None
+    sprite_meta: Dict[str, object] = field(default_factory=dict)
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+
+def get_thumbnail_path(clip_path: str) -> str:
+    """Return the thumbnail path stored next to ``clip_path``."""
+    base, _ = os.path.splitext(clip_path)
+    return f"{base}_thumb.jpg"
+
+
+def get_sprite_path(clip_path: str) -> str:
+    """Return the scrub sprite path stored next to ``clip_path``."""
+    base, _ = os.path.splitext(clip_path)
+    return f"{base}_sprite.jpg"
+
+
+def _to_image(frame, width: int):
+    """Downscale a BGR frame to ``width`` pixels wide and return a PIL image."""
+    import numpy as np
+    from PIL import Image
+
+    height, src_width = frame.shape[:2]
+    # Decimate with array slicing first so PIL only resamples a small image;
+    # keep at least 2x the target so the final filter still has data to use.
+    step = max(1, src_width // (width * 2))
+    small = np.ascontiguousarray(frame[::step, ::step, ::-1], dtype=np.uint8)
+    target_height = max(1, round(height * width / src_width))
+    return Image.fromarray(small).resize((width, target_height), Image.BILINEAR)
+
+
+def _encode_jpeg(image) -> bytes:
+    out = io.BytesIO()
+    image.save(out, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    return out.getvalue()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(data)
+    os.replace(tmp_path, path)
+
+
+def _pick_indices(count: int, wanted: int) -> List[int]:
+    if count <= wanted:
+        return list(range(count))
+    step = count / wanted
+    return [min(count - 1, int(step * i + step / 2)) for i in range(wanted)]
+
+
+def write_clip_previews(
+    frames: Sequence,
+    clip_path: str,
+    fps: float,
+    *,
+    thumbnail_width: int = THUMBNAIL_WIDTH,
+    tile_width: int = SPRITE_TILE_WIDTH,
+    columns: int = SPRITE_COLUMNS,
+    max_tiles: int = SPRITE_MAX_TILES,
+) -> ClipPreviews:
+    """Write a thumbnail and a scrub sprite sheet for ``clip_path``.
+
+    ``frames`` are the BGR frames that were encoded into the clip. The
+    sprite tiles are evenly spaced over the clip and ``sprite_meta``
+    describes the grid so a UI can map a scrub position to a tile.
+    """
+    previews = ClipPreviews()
+    if not frames:
+        return previews
+
+    try:
+        from PIL import Image
+    except Exception:
+        _LOGGER.debug("Pillow not available; skipping previews for %s", clip_path)
+        return previews
+
+    thumb = _to_image(frames[len(frames) // 2], thumbnail_width)
+    thumb_bytes = _encode_jpeg(thumb)
+    previews.thumbnail_path = get_thumbnail_path(clip_path)
+    _write_atomic(previews.thumbnail_path, thumb_bytes)
+    previews.encoded[previews.thumbnail_path] = thumb_bytes
+
+    indices = _pick_indices(len(frames), max_tiles)
+    tiles = [_to_image(frames[i], tile_width) for i in indices]
+    tile_height = tiles[0].height
+    columns = min(columns, len(tiles))
+    rows = math.ceil(len(tiles) / columns)
+    sheet = Image.new("RGB", (columns * tile_width, rows * tile_height))
+    for position, tile in enumerate(tiles):
+        row, column = divmod(position, columns)
+        sheet.paste(tile, (column * tile_width, row * tile_height))
+
+    sprite_bytes = _encode_jpeg(sheet)
+    previews.sprite_path = get_sprite_path(clip_path)
+    _write_atomic(previews.sprite_path, sprite_bytes)
+    previews.encoded[previews.sprite_path] = sprite_bytes
+    previews.sprite_meta = {
+        "columns": columns,
+        "rows": rows,
+        "tile_width": tile_width,
+        "tile_height": tile_height,
+        "count": len(tiles),
+        "offsets": [round(i / fps, 2) for i in indices] if fps else [],
+    }
+    return previews
+
+
+def write_snapshot_thumbnail(
+    frame, snapshot_path: str, *, thumbnail_width: int = THUMBNAIL_WIDTH
+) -> ClipPreviews:
+    """Write a thumbnail for a single still image stored at ``snapshot_path``."""
+    previews = ClipPreviews()
+    if frame is None:
+        return previews
+    thumb_bytes = _encode_jpeg(_to_image(frame, thumbnail_width))
+    previews.thumbnail_path = get_thumbnail_path(snapshot_path)
+    _write_atomic(previews.thumbnail_path, thumb_bytes)
+    previews.encoded[previews.thumbnail_path] = thumb_bytes
+    return previews
+
+
+class ThumbnailCache:
+    """Thread-safe LRU of encoded preview images bounded by total bytes."""
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._items: "collections.OrderedDict[str, bytes]" = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, path: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._items.pop(path, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._items[path] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def peek(self, path: str) -> Optional[bytes]:
+        """Return a cached image without touching the disk."""
+        with self._lock:
+            data = self._items.get(path)
+            if data is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(path)
+            self.hits += 1
+            return data
+
+    def get(self, path: str) -> Optional[bytes]:
+        """Return the image for ``path``, loading it from disk on a miss.
+
+        Disk reads block, so call this from an executor when on the loop.
+        """
+        data = self.peek(path)
+        if data is not None:
+            return data
+        return self.load(path)
+
+    def load(self, path: str) -> Optional[bytes]:
+        """Read ``path`` from disk and cache it."""
+        try:
+            with open(path, "rb") as handle:
+                data = handle.read()
+        except OSError:
+            return None
+        self.put(path, data)
+        return data
+
+    def prime(self, previews: ClipPreviews) -> None:
+        for path, data in previews.encoded.items():
+            self.put(path, data)
+
+    def invalidate(self, path: str) -> None:
+        with self._lock:
+            data = self._items.pop(path, None)
+            if data is not None:
+                self._size -= len(data)
@@ -0,0 +1,431 @@
+"""Per-camera daily summary videos, built as clips arrive.
+
+``DailySummaryBuilder`` adds one short segment per clip to the summary of
+the clip's day as soon as the clip is ready, so there is no batch job at
+midnight:
+
+* ``highlights`` stream-copies a few seconds around the second with the
+  most motion (from the clip's activity index), which costs little more
+  than copying the bytes;
+* ``timelapse`` decodes only the clip's keyframes and encodes them at a
+  fixed frame rate.
+
+Segments are MPEG-TS files in a ``summary`` directory next to the day's
+clips, listed with their offsets in a ``manifest.json``. The playable
+``summary.mp4`` is a stream-copy concatenation of them, rebuilt when it is
+requested and once more after the day is over. All ffmpeg work is niced
+and runs on the encode stage at low priority, behind live clips.
+
+This module has no Home Assistant dependency.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from .const import SUMMARY_MODE_HIGHLIGHTS, SUMMARY_MODE_OFF, SUMMARY_MODE_TIMELAPSE
+from .feed import FEED_CLIP_READY
+from .jobs import PRIORITY_LOW, JobShed
+from .metrics import TIMER_SUMMARY
+from .ml.activity import ActivityIndex
+from .pipeline import PRE_EVENT_SECONDS
+from .storage.db import get_activity, list_clip_events, max_event_id
+
+_LOGGER = logging.getLogger(__name__)
+
+CURSOR_FILENAME = "summaries.json"
+SUMMARY_DIRNAME = "summary"
+SUMMARY_FILENAME = "summary.mp4"
+MANIFEST_FILENAME = "manifest.json"
+LIST_FILENAME = "segments.txt"
+DEFAULT_SEGMENT_SECONDS = 4.0
+DEFAULT_TIMELAPSE_FPS = 10.0
+PAGE_SIZE = 100
+# Wake up this often without new clips, to finish the previous day.
+IDLE_POLL_SECONDS = 300.0
+RETRY_SECONDS = 2.0
+
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def _valid_camera_id(camera_id: str) -> bool:
+    return bool(camera_id) and camera_id not in (".", "..") and os.sep not in camera_id
+
+
+def _today() -> str:
+    # Same local date the clip directories are named after.
+    return dt.datetime.now().strftime("%Y-%m-%d")
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(data, handle)
+    os.replace(tmp_path, path)
+
+
+def _manifest_path(day_dir: str) -> str:
+    return os.path.join(day_dir, SUMMARY_DIRNAME, MANIFEST_FILENAME)
+
+
+def _read_manifest(day_dir: str) -> Dict[str, Any]:
+    manifest = _read_json(_manifest_path(day_dir)) or {}
+    manifest.setdefault("segments", [])
+    return manifest
+
+
+def _present_segments(day_dir: str, segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Segments whose file still exists, with offsets into a concat of just those.
+
+    Retention may already have removed some of them.
+    """
+    segment_dir = os.path.join(day_dir, SUMMARY_DIRNAME)
+    present = []
+    offset = 0.0
+    for segment in segments:
+        if not os.path.isfile(os.path.join(segment_dir, segment["file"])):
+            continue
+        present.append(dict(segment, offset=round(offset, 2)))
+        offset += segment["duration"]
+    return present
+
+
+class DailySummaryBuilder:
+    """Keep a summary video per camera and day up to date as clips are recorded."""
+
+    def __init__(
+        self,
+        media_dir: str,
+        media_db: str,
+        *,
+        mode: str = SUMMARY_MODE_HIGHLIGHTS,
+        segment_seconds: float = DEFAULT_SEGMENT_SECONDS,
+        timelapse_fps: float = DEFAULT_TIMELAPSE_FPS,
+        trigger_offset: float = PRE_EVENT_SECONDS,
+        keyframe_interval: float = 2.0,
+        jobs=None,
+        feed=None,
+        metrics=None,
+    ):
+        if mode not in (SUMMARY_MODE_HIGHLIGHTS, SUMMARY_MODE_TIMELAPSE, SUMMARY_MODE_OFF):
+            _LOGGER.warning("Unknown summary mode '%s'; using %s", mode, SUMMARY_MODE_HIGHLIGHTS)
+            mode = SUMMARY_MODE_HIGHLIGHTS
+        self.media_dir = os.path.realpath(media_dir)
+        self.media_db = media_db
+        self.mode = mode
+        self.segment_seconds = segment_seconds
+        self.timelapse_fps = timelapse_fps
+        self.trigger_offset = trigger_offset
+        self.keyframe_interval = keyframe_interval
+        self.jobs = jobs
+        self.feed = feed
+        self.metrics = metrics
+        self.cursor_path = os.path.join(os.path.dirname(media_db) or ".", CURSOR_FILENAME)
+        self.last_id: Optional[int] = None
+        self.segments_added = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        # Day directories whose summary.mp4 is behind their manifest.
+        self._stale: Set[str] = set()
+        # Serialises manifest updates with summary builds.
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != SUMMARY_MODE_OFF
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.enabled and not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "running": self.running,
+            "last_event_id": self.last_id,
+            "segments_added": self.segments_added,
+            "pending_days": len(self._stale),
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+    def day_dir(self, camera_id: str, date: str) -> Optional[str]:
+        """The clip directory of ``camera_id`` on ``date`` (``YYYY-MM-DD``), if valid."""
+        if not _DATE_RE.match(date) or not _valid_camera_id(camera_id):
+            return None
+        return os.path.join(self.media_dir, camera_id, date)
+
+    def describe(self, day_dir: str, *, events: bool = True) -> Optional[Dict[str, Any]]:
+        manifest = _read_manifest(day_dir)
+        segments = _present_segments(day_dir, manifest["segments"])
+        if not segments:
+            return None
+        camera_id = os.path.basename(os.path.dirname(day_dir))
+        date = os.path.basename(day_dir)
+        info = {
+            "camera_id": camera_id,
+            "date": date,
+            "mode": manifest.get("mode", self.mode),
+            "segments": len(segments),
+            "duration": round(sum(segment["duration"] for segment in segments), 2),
+            "up_to_date": manifest.get("built") == len(manifest["segments"]) == len(segments),
+            "url": f"/api/summaries/{camera_id}/{date}.mp4",
+        }
+        if events:
+            # Where each event starts in the summary, for chapter marks.
+            info["events"] = segments
+        return info
+
+    def list_days(self, camera_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Summaries on disk, newest day first."""
+        days = []
+        if camera_id is not None and not _valid_camera_id(camera_id):
+            return days
+        try:
+            cameras = [camera_id] if camera_id else sorted(os.listdir(self.media_dir))
+        except OSError:
+            return days
+        for camera in cameras:
+            camera_dir = os.path.join(self.media_dir, camera)
+            try:
+                dates = [name for name in os.listdir(camera_dir) if _DATE_RE.match(name)]
+            except OSError:
+                continue
+            for date in dates:
+                info = self.describe(os.path.join(camera_dir, date), events=False)
+                if info is not None:
+                    days.append(info)
+        days.sort(key=lambda info: (info["date"], info["camera_id"]), reverse=True)
+        return days
+
+    async def async_summary(self, camera_id: str, date: str) -> Optional[str]:
+        """Path of the day's ``summary.mp4``, bringing it up to date first if possible."""
+        day_dir = self.day_dir(camera_id, date)
+        if day_dir is None:
+            return None
+        try:
+            return await self._submit(self.build, day_dir, retry=False)
+        except JobShed:
+            # Busy with live clips; serve the last build if there is one.
+            path = os.path.join(day_dir, SUMMARY_FILENAME)
+            return path if os.path.isfile(path) else None
+
+    def build(self, day_dir: str) -> Optional[str]:
+        """(Re)build ``summary.mp4`` if it is behind the manifest; return its path."""
+        from .recorder.ffmpeg_wrapper import concat_segments
+
+        output = os.path.join(day_dir, SUMMARY_FILENAME)
+        segment_dir = os.path.join(day_dir, SUMMARY_DIRNAME)
+        with self._lock:
+            manifest = _read_manifest(day_dir)
+            segments = _present_segments(day_dir, manifest["segments"])
+            if not segments:
+                self._stale.discard(day_dir)
+                return None
+            if manifest.get("built") == len(manifest["segments"]) == len(segments) and os.path.isfile(output):
+                self._stale.discard(day_dir)
+                return output
+            list_path = os.path.join(segment_dir, LIST_FILENAME)
+            with open(list_path, "w", encoding="utf-8") as handle:
+                # Paths in a concat list are relative to the list file.
+                handle.writelines(f"file '{segment['file']}'\n" for segment in segments)
+            tmp_path = f"{output}.tmp"
+            concat_segments(list_path, tmp_path)
+            os.replace(tmp_path, output)
+            # Drop what retention removed so later offsets follow the summary.
+            manifest["segments"] = segments
+            manifest["built"] = len(segments)
+            _write_json(_manifest_path(day_dir), manifest)
+            self._stale.discard(day_dir)
+        return output
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        cursor = await loop.run_in_executor(None, _read_json, self.cursor_path)
+        if cursor is None or "last_id" not in cursor:
+            # Summaries start with the clips recorded from now on.
+            cursor = {"last_id": await loop.run_in_executor(None, max_event_id, self.media_db)}
+        self.last_id = cursor["last_id"]
+        self._stale.update(cursor.get("stale", []))
+        subscription = self.feed.subscribe() if self.feed is not None else None
+        try:
+            while True:
+                try:
+                    await self._catch_up()
+                    await self._finish_past_days()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as err:  # the cursor is persisted; retry on the next wake-up
+                    _LOGGER.exception("Daily summary update failed")
+                    self.last_error = str(err)
+                subscription = await self._wait_for_clips(subscription)
+        finally:
+            if subscription is not None:
+                subscription.close()
+
+    async def _wait_for_clips(self, subscription):
+        """Sleep until the feed announces a clip, or for ``IDLE_POLL_SECONDS``."""
+        if subscription is None:
+            await asyncio.sleep(IDLE_POLL_SECONDS)
+            return None
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + IDLE_POLL_SECONDS
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if message is None:
+                # Cut off for falling behind; the events table has everything.
+                subscription.close()
+                return self.feed.subscribe()
+            if message.kind == FEED_CLIP_READY:
+                break
+        return subscription
+
+    async def _catch_up(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            after_id = self.last_id
+            rows = await loop.run_in_executor(
+                None, lambda: list_clip_events(self.media_db, after_id=after_id, limit=PAGE_SIZE)
+            )
+            if not rows:
+                return
+            for row in rows:
+                await self._submit(self._add_clip, row)
+                self.last_id = row["id"]
+                await loop.run_in_executor(None, self._write_cursor)
+
+    async def _finish_past_days(self) -> None:
+        today = _today()
+        for day_dir in sorted(self._stale.copy()):
+            if os.path.basename(day_dir) != today:
+                await self._submit(self.build, day_dir)
+                await asyncio.get_running_loop().run_in_executor(None, self._write_cursor)
+
+    async def _submit(self, func, *args, retry: bool = True):
+        """Run blocking work on the encode stage, behind live clips."""
+        if self.jobs is None:
+            return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+        while True:
+            try:
+                return await self.jobs.encode.submit(func, *args, priority=PRIORITY_LOW)
+            except JobShed:
+                if not retry:
+                    raise
+                await asyncio.sleep(RETRY_SECONDS)
+
+    def _add_clip(self, row) -> None:
+        import ffmpeg
+
+        from .recorder.ffmpeg_wrapper import cut_segment, probe_video, timelapse_segment
+
+        clip_path = row["clip_path"]
+        day_dir = os.path.dirname(os.path.realpath(clip_path))
+        segment_dir = os.path.join(day_dir, SUMMARY_DIRNAME)
+        filename = f"{row['id']}.ts"
+        segment_path = os.path.join(segment_dir, filename)
+        started = time.perf_counter()
+        try:
+            width, height, duration = probe_video(clip_path)
+            # Only this task appends, so the manifest can be read unlocked.
+            size = _read_manifest(day_dir).get("size") or [width, height]
+            os.makedirs(segment_dir, exist_ok=True)
+            if self.mode == SUMMARY_MODE_TIMELAPSE:
+                start = 0.0
+                timelapse_segment(
+                    clip_path, segment_path, self.timelapse_fps, tuple(size), keyframe_interval=self.keyframe_interval
+                )
+            else:
+                start = self._highlight_start(row, duration)
+                # A clip recorded at a different resolution (e.g. while the
+                # memory governor degraded the camera) cannot be copied as is.
+                cut_segment(
+                    clip_path,
+                    segment_path,
+                    start,
+                    self.segment_seconds,
+                    size=None if [width, height] == size else tuple(size),
+                    keyframe_interval=self.keyframe_interval,
+                )
+            _, _, segment_duration = probe_video(segment_path)
+        except (ffmpeg.Error, OSError, StopIteration, KeyError, ValueError) as err:
+            self.errors += 1
+            self.last_error = str(err) or err.__class__.__name__
+            _LOGGER.debug("No summary segment for event %s (%s): %s", row["id"], clip_path, self.last_error)
+            return
+        if self.metrics is not None:
+            self.metrics.observe(TIMER_SUMMARY, time.perf_counter() - started, camera=row["camera_id"])
+
+        with self._lock:
+            manifest = _read_manifest(day_dir)
+            manifest.setdefault("size", size)
+            manifest.setdefault("mode", self.mode)
+            segments = manifest["segments"]
+            offset = segments[-1]["offset"] + segments[-1]["duration"] if segments else 0.0
+            segments.append(
+                {
+                    "event_id": row["id"],
+                    "event_type": row["event_type"],
+                    "timestamp": row["timestamp"],
+                    "file": filename,
+                    "clip_offset": round(start, 2),
+                    "offset": round(offset, 2),
+                    "duration": round(segment_duration or 0.0, 2),
+                }
+            )
+            _write_json(_manifest_path(day_dir), manifest)
+            self._stale.add(day_dir)
+        self.segments_added += 1
+
+    def _highlight_start(self, row, duration: Optional[float]) -> float:
+        """Start of the segment centred on the clip's busiest second."""
+        centre = self.trigger_offset
+        activity_row = get_activity(self.media_db, row["id"])
+        if activity_row is not None:
+            index = ActivityIndex.from_row(activity_row)
+            if index.peak:
+                centre = index.scores.index(index.peak) + 0.5
+        start = centre - self.segment_seconds / 2
+        if duration:
+            start = min(start, duration - self.segment_seconds)
+        return max(0.0, start)
+
+    def _write_cursor(self) -> None:
+        _write_json(
+            self.cursor_path,
+            {
+                "last_id": self.last_id,
+                "stale": sorted(self._stale.copy()),
+                "updated": dt.datetime.utcnow().isoformat(),
+            },
+        )
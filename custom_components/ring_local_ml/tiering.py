@@ -0,0 +1,289 @@
+"""Background storage tiering of aging clips.
+
+Clips stay at their recorded bitrate for ``after_days``; after that
+``StorageTiering`` re-encodes them at a higher CRF and, above
+``max_height``, a lower resolution, which typically frees most of their
+size while keeping them watchable. Motion events without a face can also
+lose their scrub sprite, keeping only the thumbnail.
+
+Each new file is written next to the original and swapped in with a single
+compare-and-set ``UPDATE`` of the event's ``clip_path``, ``clip_bytes`` and
+``tier``; the original is deleted only after that commit. A crash at any
+point leaves the row pointing at a complete file.
+
+ffmpeg runs one clip at a time with a single thread, niced and in the idle
+I/O class, and only while the host's own CPU use is low and no live clip
+is waiting to be encoded.
+
+This module has no Home Assistant dependency.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set
+
+from .feed import FEED_EVENT_UPDATED
+from .jobs import PRIORITY_LOW, JobShed
+from .metrics import COUNTER_TIER_BYTES_SAVED, TIMER_TIER
+from .reanalysis import DEFAULT_MAX_BUSY, THROTTLE_POLL_SECONDS, CpuSampler
+from .storage.db import list_tier_candidates, update_event
+
+_LOGGER = logging.getLogger(__name__)
+
+TIER_ORIGINAL = 0
+TIER_ARCHIVED = 1
+
+DEFAULT_MAX_HEIGHT = 360
+DEFAULT_CRF = 32
+ENCODER_THREADS = 1
+PAGE_SIZE = 50
+# Time between passes over the events table.
+DEFAULT_INTERVAL_SECONDS = 3600.0
+
+STATE_IDLE = "idle"
+STATE_RUNNING = "running"
+STATE_THROTTLED = "throttled"
+STATE_FAILED = "failed"
+
+
+def archive_clip_path(clip_path: str) -> str:
+    """``<ts>_<type>.mp4`` -> ``<ts>_<type>_archive.mp4``."""
+    return f"{os.path.splitext(clip_path)[0]}_archive.mp4"
+
+
+@dataclass
+class _Reencoded:
+    clip_path: str
+    clip_bytes: int
+    original_bytes: int
+
+
+class StorageTiering:
+    """Periodically re-encode clips older than ``after_days`` to save space."""
+
+    def __init__(
+        self,
+        media_db: str,
+        *,
+        after_days: float,
+        max_height: int = DEFAULT_MAX_HEIGHT,
+        crf: int = DEFAULT_CRF,
+        prune_previews: bool = True,
+        keyframe_interval: float = 2.0,
+        interval: float = DEFAULT_INTERVAL_SECONDS,
+        max_busy: float = DEFAULT_MAX_BUSY,
+        jobs=None,
+        feed=None,
+        thumbnail_cache=None,
+        metrics=None,
+    ):
+        self.media_db = media_db
+        self.after_days = after_days
+        self.max_height = max_height
+        self.crf = crf
+        self.prune_previews = prune_previews
+        self.keyframe_interval = keyframe_interval
+        self.interval = interval
+        self.max_busy = max_busy
+        self.jobs = jobs
+        self.feed = feed
+        self.thumbnail_cache = thumbnail_cache
+        self.metrics = metrics
+        self.state = STATE_IDLE
+        self.last_error: Optional[str] = None
+        self.last_pass: Optional[str] = None
+        self.clips = 0
+        self.bytes_saved = 0
+        self.previews_pruned = 0
+        self.errors = 0
+        self._throttled_seconds = 0.0
+        # Clips that failed to re-encode are not retried until restart.
+        self._failed: Set[int] = set()
+        self._cpu = CpuSampler()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.after_days > 0 and not self.running:
+            # One clip at a time, off the loop's shared default executor.
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ring_local_ml_tiering")
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "after_days": self.after_days,
+            "max_height": self.max_height,
+            "crf": self.crf,
+            "prune_previews": self.prune_previews,
+            "clips": self.clips,
+            "bytes_saved": self.bytes_saved,
+            "previews_pruned": self.previews_pruned,
+            "errors": self.errors,
+            "throttled_seconds": round(self._throttled_seconds, 1),
+            "last_pass": self.last_pass,
+            "last_error": self.last_error,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._pass()
+                self.state = STATE_IDLE
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:  # rows are only changed per clip; retry next pass
+                _LOGGER.exception("Storage tiering pass failed")
+                self.state = STATE_FAILED
+                self.last_error = str(err)
+            await asyncio.sleep(self.interval)
+
+    async def _pass(self) -> None:
+        loop = asyncio.get_running_loop()
+        cutoff = (dt.datetime.utcnow() - dt.timedelta(days=self.after_days)).isoformat()
+        after_id = 0
+        before = (self.clips, self.bytes_saved)
+        while True:
+            rows = await loop.run_in_executor(
+                None,
+                lambda: list_tier_candidates(self.media_db, before=cutoff, after_id=after_id, limit=PAGE_SIZE),
+            )
+            if not rows:
+                break
+            for row in rows:
+                after_id = row["id"]
+                if row["id"] in self._failed:
+                    continue
+                await self._wait_until_idle()
+                result = await loop.run_in_executor(self._executor, self._reencode, row)
+                if result is None:
+                    self._failed.add(row["id"])
+                    continue
+                await self._persist(self._apply, row, result)
+        self.last_pass = dt.datetime.utcnow().isoformat()
+        if self.clips != before[0]:
+            _LOGGER.info(
+                "Storage tiering archived %s clips, freeing %.1f MB",
+                self.clips - before[0],
+                (self.bytes_saved - before[1]) / 1e6,
+            )
+
+    async def _wait_until_idle(self) -> None:
+        while True:
+            busy = self._cpu.busy_fraction()
+            live_work = self.jobs is not None and (self.jobs.encode.depth or self.jobs.persist.saturated)
+            if not live_work and (busy is None or busy <= self.max_busy):
+                self.state = STATE_RUNNING
+                return
+            self.state = STATE_THROTTLED
+            await asyncio.sleep(THROTTLE_POLL_SECONDS)
+            self._throttled_seconds += THROTTLE_POLL_SECONDS
+
+    async def _persist(self, func, *args):
+        """Run a DB write on the shared persist stage, behind live clips."""
+        if self.jobs is None:
+            return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+        while True:
+            try:
+                return await self.jobs.persist.submit(func, *args, priority=PRIORITY_LOW)
+            except JobShed:
+                await asyncio.sleep(THROTTLE_POLL_SECONDS)
+
+    def _reencode(self, row) -> Optional[_Reencoded]:
+        import ffmpeg
+
+        from .recorder.ffmpeg_wrapper import probe_video, reencode_clip
+
+        clip_path = row["clip_path"]
+        archive_path = archive_clip_path(clip_path)
+        started = time.perf_counter()
+        try:
+            original_bytes = os.path.getsize(clip_path)
+            _, height, _ = probe_video(clip_path)
+            reencode_clip(
+                clip_path,
+                archive_path,
+                crf=self.crf,
+                height=self.max_height if height > self.max_height else None,
+                threads=ENCODER_THREADS,
+                keyframe_interval=self.keyframe_interval,
+            )
+            archive_bytes = os.path.getsize(archive_path)
+        except (ffmpeg.Error, OSError, StopIteration, KeyError, ValueError) as err:
+            self.errors += 1
+            self.last_error = str(err) or err.__class__.__name__
+            _LOGGER.debug("Could not archive event %s (%s): %s", row["id"], clip_path, self.last_error)
+            _remove(archive_path)
+            return None
+        if self.metrics is not None:
+            self.metrics.observe(TIMER_TIER, time.perf_counter() - started, camera=row["camera_id"])
+        if archive_bytes >= original_bytes:
+            # Already small (e.g. a dark, static scene); keep the original.
+            _remove(archive_path)
+            return _Reencoded(clip_path, original_bytes, original_bytes)
+        return _Reencoded(archive_path, archive_bytes, original_bytes)
+
+    def _apply(self, row, result: _Reencoded) -> None:
+        """Swap the row to the archived clip, then delete what it no longer references."""
+        fields: Dict[str, Any] = {"clip_path": result.clip_path, "clip_bytes": result.clip_bytes, "tier": TIER_ARCHIVED}
+        prune_sprite = (
+            self.prune_previews
+            and row["sprite_path"]
+            and row["event_type"] == "motion"
+            and not row["face_detected"]
+        )
+        if prune_sprite:
+            fields.update(sprite_path=None, sprite_meta=None)
+        if not update_event(self.media_db, row["id"], expect_clip_path=row["clip_path"], **fields):
+            # The row changed or went away meanwhile; leave it to whoever did that.
+            if result.clip_path != row["clip_path"]:
+                _remove(result.clip_path)
+            return
+        if result.clip_path != row["clip_path"]:
+            _remove(row["clip_path"])
+        if prune_sprite:
+            _remove(row["sprite_path"])
+            if self.thumbnail_cache is not None:
+                self.thumbnail_cache.invalidate(row["sprite_path"])
+            self.previews_pruned += 1
+        saved = result.original_bytes - result.clip_bytes
+        self.clips += 1
+        self.bytes_saved += saved
+        if self.metrics is not None and saved:
+            self.metrics.inc(COUNTER_TIER_BYTES_SAVED, saved, camera=row["camera_id"])
+        if self.feed is not None:
+            self.feed.publish_threadsafe(
+                FEED_EVENT_UPDATED,
+                row["camera_id"],
+                event_id=row["id"],
+                event_type=row["event_type"],
+                clip_bytes=result.clip_bytes,
+                source="tiering",
+            )
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
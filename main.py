@@ -0,0 +1,63 @@
+"""Run Ring Local ML as a standalone service, without Home Assistant.
+
+Usage::
+
+    python main.py --config config.yaml
+
+The service subscribes to Ring-MQTT directly, records and analyses clips with
+the same core modules as the integration, serves the media API and publishes
+pipeline results back to MQTT. See ``config.yaml.example``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+
+from src.config import ConfigError, load_config
+from src.service import RingLocalMLService
+
+_LOGGER = logging.getLogger("ring_local_ml")
+
+
+async def _run(config) -> None:
+    service = RingLocalMLService(config)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+
+    await service.async_start()
+    try:
+        await stop.wait()
+    finally:
+        _LOGGER.info("Shutting down")
+        await service.async_stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ring Local ML standalone service")
+    parser.add_argument("-c", "--config", default="config.yaml", help="path to the YAML configuration")
+    parser.add_argument("--log-level", default="INFO", help="DEBUG, INFO, WARNING, ...")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+    )
+    try:
+        config = load_config(args.config)
+    except ConfigError as err:
+        _LOGGER.error("Invalid configuration: %s", err)
+        sys.exit(2)
+    asyncio.run(_run(config))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""Headless Ring Local ML service.
+
+The recorder, ML, storage, pipeline and API code lives once, in
+``custom_components/ring_local_ml``. That package's ``__init__`` imports Home
+Assistant, so its directory is registered here as ``ring_local_ml_core`` and
+the core modules import without it. The modules under ``src`` re-export from
+there; ``src.service`` wires them to MQTT directly instead of through HA.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import types
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORE_DIR = os.environ.get(
+    "RING_LOCAL_ML_CORE", os.path.join(REPO_ROOT, "custom_components", "ring_local_ml")
+)
+CORE_PACKAGE = "ring_local_ml_core"
+
+if CORE_PACKAGE not in sys.modules:
+    _package = types.ModuleType(CORE_PACKAGE)
+    _package.__path__ = [CORE_DIR]
+    sys.modules[CORE_PACKAGE] = _package
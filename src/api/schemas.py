@@ -0,0 +1,9 @@
+"""API request/response schemas shared with the Home Assistant integration."""
+
+from ring_local_ml_core.api.schemas import (  # noqa: F401
+    ErrorResponse,
+    EventListResponse,
+    EventQuery,
+    EventSchema,
+    SchemaError,
+)
@@ -0,0 +1,3 @@
+"""Media API shared with the Home Assistant integration."""
+
+from ring_local_ml_core.api.server import MediaAPIServer  # noqa: F401
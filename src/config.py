@@ -0,0 +1,196 @@
+"""YAML configuration for the headless service.
+
+The keys mirror the Home Assistant config flow and camera options, so a
+camera block can be copied between the two. See ``config.yaml.example``.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from ring_local_ml_core.const import (
+    CAMERA_PRIORITIES,
+    DEFAULT_API_HOST,
+    DEFAULT_API_PORT,
+    DEFAULT_CLIP_CONTAINER,
+    DEFAULT_FRAME_MEMORY_MB,
+    DEFAULT_KEYFRAME_INTERVAL,
+    DEFAULT_PRIORITY,
+    DEFAULT_STREAM_MODE,
+    DEFAULT_SUMMARY_MODE,
+    DEFAULT_TIER_AFTER_DAYS,
+    DEFAULT_TIER_PRUNE_PREVIEWS,
+    DEFAULT_WARM_SECONDS,
+    STREAM_MODES,
+    SUMMARY_MODES,
+)
+from ring_local_ml_core.pipeline import POST_EVENT_SECONDS, PRE_EVENT_SECONDS
+from ring_local_ml_core.tiering import DEFAULT_CRF, DEFAULT_MAX_HEIGHT
+
+from . import REPO_ROOT
+
+DEFAULT_MEDIA_DIR = "/media/ring_local_ml"
+DEFAULT_RESULT_PREFIX = "ring_local_ml"
+
+
+class ConfigError(ValueError):
+    """The configuration file is missing or invalid."""
+
+
+@dataclass
+class MQTTConfig:
+    host: str = "localhost"
+    port: int = 1883
+    username: Optional[str] = None
+    password: Optional[str] = None
+    client_id: str = "ring-local-ml"
+    # Feed messages and service status are published under this prefix so
+    # Home Assistant (or anything else) can consume the results. Empty
+    # disables publishing.
+    result_prefix: str = DEFAULT_RESULT_PREFIX
+
+
+@dataclass
+class CameraConfig:
+    id: str
+    name: Optional[str] = None
+    rtsp_url: str = ""
+    stream_mode: str = DEFAULT_STREAM_MODE
+    warm_seconds: float = DEFAULT_WARM_SECONDS
+    priority: str = DEFAULT_PRIORITY
+
+
+@dataclass
+class TieringConfig:
+    # 0 keeps every clip as recorded.
+    after_days: float = DEFAULT_TIER_AFTER_DAYS
+    max_height: int = DEFAULT_MAX_HEIGHT
+    crf: int = DEFAULT_CRF
+    prune_previews: bool = DEFAULT_TIER_PRUNE_PREVIEWS
+
+
+@dataclass
+class ServiceConfig:
+    media_dir: str = DEFAULT_MEDIA_DIR
+    mqtt: MQTTConfig = field(default_factory=MQTTConfig)
+    cameras: List[CameraConfig] = field(default_factory=list)
+    api_host: str = DEFAULT_API_HOST
+    api_port: int = DEFAULT_API_PORT
+    api_token: Optional[str] = None
+    # Browser origins allowed to call the API; none by default.
+    api_cors_origins: List[str] = field(default_factory=list)
+    clip_container: str = DEFAULT_CLIP_CONTAINER
+    keyframe_interval: float = DEFAULT_KEYFRAME_INTERVAL
+    pre_event_seconds: int = PRE_EVENT_SECONDS
+    post_event_seconds: int = POST_EVENT_SECONDS
+    frame_memory_mb: int = DEFAULT_FRAME_MEMORY_MB
+    summary_mode: str = DEFAULT_SUMMARY_MODE
+    tiering: TieringConfig = field(default_factory=TieringConfig)
+    ml_workers: Optional[int] = None
+    face_cascade_path: str = os.path.join(REPO_ROOT, "haarcascade_frontalface_default.xml")
+
+    @property
+    def media_db(self) -> str:
+        return os.path.join(self.media_dir, "media.db")
+
+
+def _section(data: Dict[str, Any], key: str) -> Dict[str, Any]:
+    value = data.get(key) or {}
+    if not isinstance(value, dict):
+        raise ConfigError(f"'{key}' must be a mapping")
+    return value
+
+
+def _camera(raw: Any, index: int) -> CameraConfig:
+    if not isinstance(raw, dict) or not raw.get("id"):
+        raise ConfigError(f"cameras[{index}] needs an 'id'")
+    if not isinstance(raw["id"], str):
+        # YAML reads an unquoted all-digit id as a number and drops leading zeros.
+        raise ConfigError(f"cameras[{index}].id must be a quoted string, e.g. id: \"0123456789\"")
+    camera = CameraConfig(
+        id=raw["id"],
+        name=raw.get("name"),
+        rtsp_url=raw.get("rtsp_url") or "",
+        stream_mode=raw.get("stream_mode", DEFAULT_STREAM_MODE),
+        warm_seconds=float(raw.get("warm_seconds", DEFAULT_WARM_SECONDS)),
+        priority=raw.get("priority", DEFAULT_PRIORITY),
+    )
+    if camera.stream_mode not in STREAM_MODES:
+        raise ConfigError(f"cameras[{index}].stream_mode must be one of {', '.join(STREAM_MODES)}")
+    if camera.priority not in CAMERA_PRIORITIES:
+        raise ConfigError(f"cameras[{index}].priority must be one of {', '.join(CAMERA_PRIORITIES)}")
+    return camera
+
+
+def parse_config(data: Optional[Dict[str, Any]]) -> ServiceConfig:
+    data = data or {}
+    if not isinstance(data, dict):
+        raise ConfigError("the configuration must be a mapping")
+    mqtt = _section(data, "mqtt")
+    api = _section(data, "api")
+    clip = _section(data, "clip")
+    tiering = _section(data, "tiering")
+    cameras = data.get("cameras") or []
+    if not isinstance(cameras, list):
+        raise ConfigError("'cameras' must be a list")
+
+    defaults = ServiceConfig()
+    cors_origins = api.get("cors_origins") or []
+    if not isinstance(cors_origins, list):
+        raise ConfigError("api.cors_origins must be a list")
+    summary_mode = data.get("summary_mode", defaults.summary_mode)
+    if summary_mode not in SUMMARY_MODES:
+        raise ConfigError(f"summary_mode must be one of {', '.join(SUMMARY_MODES)}")
+    try:
+        config = ServiceConfig(
+            media_dir=data.get("media_dir", defaults.media_dir),
+            mqtt=MQTTConfig(
+                host=mqtt.get("host", "localhost"),
+                port=int(mqtt.get("port", 1883)),
+                username=mqtt.get("username"),
+                password=mqtt.get("password"),
+                client_id=mqtt.get("client_id", "ring-local-ml"),
+                result_prefix=mqtt.get("result_prefix", DEFAULT_RESULT_PREFIX) or "",
+            ),
+            cameras=[_camera(raw, index) for index, raw in enumerate(cameras)],
+            api_host=api.get("host", defaults.api_host),
+            api_port=int(api.get("port", defaults.api_port)),
+            api_token=api.get("token") or None,
+            api_cors_origins=[str(origin) for origin in cors_origins],
+            clip_container=clip.get("container", defaults.clip_container),
+            keyframe_interval=float(clip.get("keyframe_interval", defaults.keyframe_interval)),
+            pre_event_seconds=int(clip.get("pre_event_seconds", defaults.pre_event_seconds)),
+            post_event_seconds=int(clip.get("post_event_seconds", defaults.post_event_seconds)),
+            frame_memory_mb=int(data.get("frame_memory_mb", defaults.frame_memory_mb)),
+            summary_mode=summary_mode,
+            tiering=TieringConfig(
+                after_days=float(tiering.get("after_days", DEFAULT_TIER_AFTER_DAYS)),
+                max_height=int(tiering.get("max_height", DEFAULT_MAX_HEIGHT)),
+                crf=int(tiering.get("crf", DEFAULT_CRF)),
+                prune_previews=bool(tiering.get("prune_previews", DEFAULT_TIER_PRUNE_PREVIEWS)),
+            ),
+            ml_workers=data.get("ml_workers"),
+            face_cascade_path=data.get("face_cascade_path", defaults.face_cascade_path),
+        )
+    except (TypeError, ValueError) as err:
+        if isinstance(err, ConfigError):
+            raise
+        raise ConfigError(str(err)) from err
+    if config.api_port and not config.api_token:
+        raise ConfigError("api.token is required while the media API is enabled (api.port: 0 disables it)")
+    return config
+
+
+def load_config(path: str) -> ServiceConfig:
+    import yaml
+
+    try:
+        with open(path, encoding="utf-8") as handle:
+            data = yaml.safe_load(handle)
+    except OSError as err:
+        raise ConfigError(f"cannot read {path}: {err}") from err
+    except yaml.YAMLError as err:
+        raise ConfigError(f"invalid YAML in {path}: {err}") from err
+    return parse_config(data)
@@ -0,0 +1,3 @@
+"""Motion + face detector shared with the Home Assistant integration."""
+
+from ring_local_ml_core.ml.detector import Detector  # noqa: F401
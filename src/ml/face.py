@@ -0,0 +1,3 @@
+"""Face detector shared with the Home Assistant integration."""
+
+from ring_local_ml_core.ml.face import FaceDetector  # noqa: F401
@@ -0,0 +1,3 @@
+"""Motion detector shared with the Home Assistant integration."""
+
+from ring_local_ml_core.ml.motion import MotionDetector  # noqa: F401
@@ -0,0 +1,102 @@
+"""Direct MQTT connection for the headless service.
+
+paho runs its network loop on its own thread; every received message is
+handed to the asyncio loop, where the shared ``RingMQTTDispatcher`` routes it
+exactly as it does inside Home Assistant.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Callable, Iterable, Optional
+
+from .config import MQTTConfig
+
+_LOGGER = logging.getLogger(__name__)
+
+STATUS_ONLINE = "online"
+STATUS_OFFLINE = "offline"
+
+
+def _make_client(client_id: str):
+    import paho.mqtt.client as mqtt
+
+    # paho-mqtt 2.x requires choosing a callback API; 1.x has no such enum.
+    if hasattr(mqtt, "CallbackAPIVersion"):
+        return mqtt.Client(mqtt.CallbackAPIVersion.VERSION1, client_id=client_id)
+    return mqtt.Client(client_id=client_id)
+
+
+class MQTTBridge:
+    """Subscribe to Ring-MQTT topics and publish results, reconnecting as needed."""
+
+    def __init__(
+        self,
+        config: MQTTConfig,
+        on_message: Callable[[object], None],
+        topic_filters: Iterable[str],
+    ):
+        self.config = config
+        self.on_message = on_message
+        self.topic_filters = tuple(topic_filters)
+        self.connected = False
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def status_topic(self) -> Optional[str]:
+        prefix = self.config.result_prefix
+        return f"{prefix}/status" if prefix else None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        client = _make_client(self.config.client_id)
+        if self.config.username:
+            client.username_pw_set(self.config.username, self.config.password)
+        if self.status_topic:
+            client.will_set(self.status_topic, STATUS_OFFLINE, qos=1, retain=True)
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.on_message = self._on_message
+        client.reconnect_delay_set(min_delay=1, max_delay=60)
+        # connect_async + loop_start keeps retrying if the broker is not up yet.
+        client.connect_async(self.config.host, self.config.port)
+        client.loop_start()
+        self._client = client
+
+    def stop(self) -> None:
+        client, self._client = self._client, None
+        if client is None:
+            return
+        if self.connected and self.status_topic:
+            client.publish(self.status_topic, STATUS_OFFLINE, qos=1, retain=True).wait_for_publish(2)
+        client.disconnect()
+        client.loop_stop()
+        self.connected = False
+
+    def publish(self, topic: str, payload, *, retain: bool = False) -> None:
+        if self._client is not None:
+            self._client.publish(topic, payload, qos=0, retain=retain)
+
+    def _on_connect(self, client, _userdata, _flags, rc, *_):
+        if rc != 0:
+            _LOGGER.warning("MQTT connection to %s:%s refused (rc=%s)", self.config.host, self.config.port, rc)
+            return
+        self.connected = True
+        _LOGGER.info("Connected to MQTT broker %s:%s", self.config.host, self.config.port)
+        # Subscriptions do not survive a reconnect with a clean session.
+        for topic_filter in self.topic_filters:
+            client.subscribe(topic_filter, qos=1)
+        if self.status_topic:
+            client.publish(self.status_topic, STATUS_ONLINE, qos=1, retain=True)
+
+    def _on_disconnect(self, _client, _userdata, rc, *_):
+        self.connected = False
+        if rc != 0:
+            _LOGGER.warning("Lost MQTT connection (rc=%s); reconnecting", rc)
+
+    def _on_message(self, _client, _userdata, msg):
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.on_message, msg)
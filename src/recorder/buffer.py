@@ -0,0 +1,3 @@
+"""Frame buffer shared with the Home Assistant integration."""
+
+from ring_local_ml_core.recorder.buffer import CircularBuffer  # noqa: F401
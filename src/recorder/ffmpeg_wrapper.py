@@ -0,0 +1,3 @@
+"""Clip encoding shared with the Home Assistant integration."""
+
+from ring_local_ml_core.recorder.ffmpeg_wrapper import save_clip  # noqa: F401
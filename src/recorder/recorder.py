@@ -0,0 +1,3 @@
+"""RTSP recorder shared with the Home Assistant integration."""
+
+from ring_local_ml_core.recorder.recorder import Recorder  # noqa: F401
@@ -0,0 +1,308 @@
+"""The headless service: recorders, pipeline, API and MQTT without Home Assistant.
+
+This wires the same core objects the integration's sensor platform builds
+(``EventPipeline``, ``SnapshotIngestor``, ``JobScheduler``, ``MLWorkerPool``,
+``FrameMemoryGovernor``, ``MediaAPIServer``, ...) to a direct MQTT
+connection. Decoding and ML then run in their own process, on their own box
+if needed, and Home Assistant only consumes the results: every feed message
+is published as JSON on ``<result_prefix>/<camera_id>/<kind>`` and the media
+API serves events, clips and live previews as usual.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Set
+
+from ring_local_ml_core.api.server import MediaAPIServer
+from ring_local_ml_core.const import STREAM_MODE_ON_DEMAND, STREAM_MODE_SNAPSHOT, SUMMARY_MODE_OFF
+from ring_local_ml_core.dispatcher import IMAGE_TOPIC_FILTERS, TOPIC_FILTERS, RingMQTTDispatcher
+from ring_local_ml_core.feed import EventFeed
+from ring_local_ml_core.jobs import JobScheduler
+from ring_local_ml_core.metrics import PipelineMetrics, SamplingProfiler, SetupTimer, job_samples, recorder_samples
+from ring_local_ml_core.ml.detector import Detector
+from ring_local_ml_core.ml.workers import MLWorkerPool
+from ring_local_ml_core.mqtt import EVENT_TRIGGER_SUFFIXES, SNAPSHOT_IMAGE_SUFFIX, ParsedMessage, payload_is_active
+from ring_local_ml_core.pipeline import CLIP_FPS, EventPipeline
+from ring_local_ml_core.reanalysis import ClipReanalyzer
+from ring_local_ml_core.recorder.memory import FrameMemoryGovernor
+from ring_local_ml_core.recorder.recorder import Recorder
+from ring_local_ml_core.snapshots import SnapshotIngestor
+from ring_local_ml_core.summaries import DailySummaryBuilder
+from ring_local_ml_core.tiering import StorageTiering
+from ring_local_ml_core.storage.thumbnails import ThumbnailCache
+
+from .config import CameraConfig, ServiceConfig
+from .mqtt_client import MQTTBridge
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RingLocalMLService:
+    """Own every long-lived object of the standalone service."""
+
+    def __init__(self, config: ServiceConfig):
+        self.config = config
+        self.recorders: Dict[str, Recorder] = {}
+        self.metrics = PipelineMetrics()
+        self.profiler = SamplingProfiler()
+        self.feed = EventFeed(config.media_db)
+        self.thumbnail_cache = ThumbnailCache()
+        self.ml_pool: Optional[MLWorkerPool] = None
+        self.jobs: Optional[JobScheduler] = None
+        self.pipeline: Optional[EventPipeline] = None
+        self.snapshots: Optional[SnapshotIngestor] = None
+        self.memory: Optional[FrameMemoryGovernor] = None
+        self.reanalyzer: Optional[ClipReanalyzer] = None
+        self.summaries: Optional[DailySummaryBuilder] = None
+        self.tiering: Optional[StorageTiering] = None
+        self.api_server: Optional[MediaAPIServer] = None
+        self.mqtt: Optional[MQTTBridge] = None
+        self.dispatcher = RingMQTTDispatcher(camera.id for camera in config.cameras)
+        self._tasks: List[asyncio.Task] = []
+        self._event_tasks: Set[asyncio.Task] = set()
+        self._unknown_devices = set()
+
+    async def async_start(self) -> None:
+        config = self.config
+        setup = SetupTimer(self.metrics)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, os.makedirs, config.media_dir, 0o755, True)
+        await setup.measure("feed", self.feed.async_start())
+
+        self.ml_pool = MLWorkerPool(config.ml_workers, cascade_path=config.face_cascade_path)
+        try:
+            self.ml_pool.start()
+        except (OSError, ValueError):
+            _LOGGER.warning("Could not start ML worker processes; detecting in-process", exc_info=True)
+            self.ml_pool = None
+
+        self.jobs = JobScheduler(
+            detect_workers=self.ml_pool.workers if self.ml_pool else 1, metrics=self.metrics
+        )
+        self.metrics.add_collector(lambda: job_samples(self.jobs))
+        self.metrics.add_collector(lambda: recorder_samples(self.recorders))
+        detector = Detector(face_cascade_path=config.face_cascade_path)
+        self.pipeline = EventPipeline(
+            self.recorders,
+            detector,
+            config.media_dir,
+            config.media_db,
+            thumbnail_cache=self.thumbnail_cache,
+            feed=self.feed,
+            encode_options={"container": config.clip_container, "keyframe_interval": config.keyframe_interval},
+            jobs=self.jobs,
+            ml_pool=self.ml_pool,
+            metrics=self.metrics,
+            pre_event_seconds=config.pre_event_seconds,
+            post_event_seconds=config.post_event_seconds,
+        )
+        self.snapshots = SnapshotIngestor(
+            detector,
+            config.media_dir,
+            config.media_db,
+            feed=self.feed,
+            thumbnail_cache=self.thumbnail_cache,
+            jobs=self.jobs,
+            ml_pool=self.ml_pool,
+            metrics=self.metrics,
+        )
+        self.reanalyzer = ClipReanalyzer(
+            config.media_dir,
+            config.media_db,
+            cascade_path=config.face_cascade_path,
+            jobs=self.jobs,
+            feed=self.feed,
+        )
+        if config.summary_mode != SUMMARY_MODE_OFF:
+            self.summaries = DailySummaryBuilder(
+                config.media_dir,
+                config.media_db,
+                mode=config.summary_mode,
+                trigger_offset=config.pre_event_seconds,
+                keyframe_interval=config.keyframe_interval,
+                jobs=self.jobs,
+                feed=self.feed,
+                metrics=self.metrics,
+            )
+            self.summaries.start()
+        self.tiering = StorageTiering(
+            config.media_db,
+            after_days=config.tiering.after_days,
+            max_height=config.tiering.max_height,
+            crf=config.tiering.crf,
+            prune_previews=config.tiering.prune_previews,
+            keyframe_interval=config.keyframe_interval,
+            jobs=self.jobs,
+            feed=self.feed,
+            thumbnail_cache=self.thumbnail_cache,
+            metrics=self.metrics,
+        )
+        self.tiering.start()
+        self.memory = FrameMemoryGovernor(
+            config.frame_memory_mb * 1024 * 1024,
+            min_buffer_seconds=self.pipeline.min_buffer_seconds,
+        )
+        with setup.step("cameras"):
+            for camera in config.cameras:
+                self._start_recorder(camera)
+
+        if config.api_port:
+            api_server = MediaAPIServer(
+                config.media_dir,
+                config.media_db,
+                host=config.api_host,
+                port=config.api_port,
+                token=config.api_token,
+                cors_origins=config.api_cors_origins,
+                thumbnail_cache=self.thumbnail_cache,
+                recorders=self.recorders,
+                feed=self.feed,
+                metrics=self.metrics,
+                profiler=self.profiler,
+                reanalyzer=self.reanalyzer,
+                summaries=self.summaries,
+                tiering=self.tiering,
+            )
+            try:
+                await setup.measure("api", api_server.start())
+            except (OSError, ValueError):
+                _LOGGER.exception("Failed to start media API on %s:%s", config.api_host, config.api_port)
+            else:
+                self.api_server = api_server
+
+        self.dispatcher.add_route_factory(self._trigger_route)
+        self.dispatcher.add_route_factory(self._snapshot_route)
+        self.dispatcher.add_unknown_device_handler(self._on_unknown_device)
+        self.mqtt = MQTTBridge(config.mqtt, self.dispatcher.dispatch, TOPIC_FILTERS + IMAGE_TOPIC_FILTERS)
+        self.mqtt.start()
+
+        if config.mqtt.result_prefix:
+            self._tasks.append(loop.create_task(self._publish_results()))
+        self._tasks.append(loop.create_task(self._warm_up(detector)))
+        _LOGGER.info(
+            "Ring Local ML service started in %s with %s camera(s), %s recording",
+            setup.format(),
+            len(config.cameras),
+            len(self.recorders),
+        )
+
+    async def async_stop(self) -> None:
+        tasks = self._tasks + list(self._event_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        if self.mqtt is not None:
+            self.mqtt.stop()
+        self.profiler.stop()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(None, recorder.stop) for recorder in set(self.recorders.values()))
+        )
+        self.recorders.clear()
+        if self.api_server is not None:
+            await self.api_server.stop()
+        if self.reanalyzer is not None:
+            await self.reanalyzer.stop()
+        if self.summaries is not None:
+            await self.summaries.stop()
+        if self.tiering is not None:
+            await self.tiering.stop()
+        if self.jobs is not None:
+            await self.jobs.async_stop()
+        if self.ml_pool is not None:
+            self.ml_pool.stop()
+        await self.feed.async_stop()
+
+    async def _warm_up(self, detector: Detector) -> None:
+        """Spawn the ML workers (or load the in-process cascade) off the start-up path."""
+        warm_up = SetupTimer(self.metrics)
+        loop = asyncio.get_running_loop()
+        try:
+            if self.ml_pool is not None:
+                await warm_up.measure("ml_workers", loop.run_in_executor(None, self.ml_pool.warm_up))
+            else:
+                await warm_up.measure("face_model", loop.run_in_executor(None, detector.warm_up))
+        except Exception:
+            _LOGGER.warning("Model warm-up failed; models load on first use", exc_info=True)
+            return
+        _LOGGER.info("Models ready in %s", warm_up.format())
+
+    def _start_recorder(self, camera: CameraConfig) -> None:
+        if camera.stream_mode == STREAM_MODE_SNAPSHOT:
+            return
+        if not camera.rtsp_url:
+            _LOGGER.warning("Camera %s has no RTSP URL; only snapshots will be used", camera.id)
+            return
+        recorder = Recorder(
+            camera.id,
+            camera.rtsp_url,
+            self.pipeline.buffer_seconds,
+            fps=CLIP_FPS,
+            on_demand=camera.stream_mode == STREAM_MODE_ON_DEMAND,
+            warm_seconds=camera.warm_seconds,
+        )
+        self.recorders[camera.id] = recorder
+        self.memory.register(recorder, camera.priority)
+        recorder.start()
+
+    def _trigger_route(self, topic):
+        event_type = EVENT_TRIGGER_SUFFIXES.get(topic.topic_suffix)
+        if event_type is None:
+            return None
+        camera_id = topic.device_id
+
+        def _handle(message: ParsedMessage):
+            if not payload_is_active(message.value):
+                return
+            task = asyncio.get_running_loop().create_task(self.pipeline.handle_mqtt_message(camera_id, event_type))
+            self._event_tasks.add(task)
+            task.add_done_callback(self._event_tasks.discard)
+
+        return _handle
+
+    def _snapshot_route(self, topic):
+        if topic.topic_suffix != SNAPSHOT_IMAGE_SUFFIX:
+            return None
+        camera_id = topic.device_id
+
+        def _handle(message: ParsedMessage):
+            # Cameras with an open RTSP session already get better frames.
+            recorder = self.recorders.get(camera_id)
+            if recorder is not None and recorder.streaming:
+                return
+            self.snapshots.handle_image(camera_id, message.payload)
+
+        return _handle
+
+    def _on_unknown_device(self, message: ParsedMessage) -> None:
+        device_id = message.topic.device_id
+        if device_id not in self._unknown_devices:
+            self._unknown_devices.add(device_id)
+            _LOGGER.info(
+                "Ring-MQTT publishes camera %s (location %s), which is not in the configuration",
+                device_id,
+                message.topic.location_id,
+            )
+
+    async def _publish_results(self) -> None:
+        """Mirror the event feed to MQTT for Home Assistant or other consumers."""
+        prefix = self.config.mqtt.result_prefix
+        while True:
+            subscription = self.feed.subscribe()
+            try:
+                while True:
+                    message = await subscription.queue.get()
+                    if message is None:
+                        # Fell behind; resubscribe and carry on with live messages.
+                        break
+                    self.mqtt.publish(
+                        f"{prefix}/{message.camera_id}/{message.kind}",
+                        json.dumps(message.to_dict(), separators=(",", ":")),
+                    )
+            finally:
+                subscription.close()
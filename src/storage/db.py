@@ -0,0 +1,9 @@
+"""Event database shared with the Home Assistant integration."""
+
+from ring_local_ml_core.storage.db import (  # noqa: F401
+    get_event,
+    init_db,
+    list_events,
+    record_event,
+    update_event,
+)
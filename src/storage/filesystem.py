@@ -0,0 +1,7 @@
+"""Media paths shared with the Home Assistant integration."""
+
+from ring_local_ml_core.storage.filesystem import (  # noqa: F401
+    create_media_paths,
+    get_clip_path,
+    get_snapshot_path,
+)
@@ -0,0 +1,3 @@
+"""Retention shared with the Home Assistant integration."""
+
+from ring_local_ml_core.storage.retention import enforce_retention  # noqa: F401